@@ -5,18 +5,88 @@
 # VOLTAR_PILHA = []  # Pilha 'VOLTAR'
 # AVANCAR_PILHA = [] # Pilha 'AVANCAR'
 
-# --- Funções de Roteiro do Visitante (Pilhas) ---
+import functools
 
-def ir_local(caminho, local_atual, voltar_pilha, avancar_pilha):
+# --- Locais internados ---
+# Cada local visitado recebe um id inteiro; as pilhas VOLTAR/AVANCAR guardam
+# só esses ids (um histórico longo não repete a mesma string várias vezes)
+# e o local atual é sempre a string única guardada aqui. As funções de
+# navegação também aceitam pilhas com os caminhos (strings), como antes.
+#
+# A tabela só cresce quando alguém vai a um local novo (IR, ou um TRECHO do
+# mapa dos estandes), por admitir(), e no máximo até MAX_LOCAIS locais;
+# consultas (ROTA, OCUPACAO <caminho>) usam buscar_id() e não internam nada.
+MAX_LOCAIS = 100_000
+
+_LOCAIS = ["/"]      # id -> caminho
+_IDS = {"/": 0}      # caminho -> id
+
+
+def id_local(local):
+    """Id inteiro do local (cria um novo na primeira vez, sem limite: caminhos
+    vindos de comandos passam antes por admitir())."""
+    id_ = _IDS.get(local)
+    if id_ is None:
+        id_ = _IDS[local] = len(_LOCAIS)
+        _LOCAIS.append(local)
+    return id_
+
+
+def buscar_id(local):
+    """Id do local, ou None se ele ainda não foi internado (não cria)."""
+    return _IDS.get(local)
+
+
+def admitir(local):
     """
-    IR <caminho>
-    Altera o local atual. Empilha o local anterior em VOLTAR e limpa AVANCAR.
-    Caminhos absolutos (ex: /IA/Visao) ou relativos (ex: Palco).
+    Id do local (caminho normalizado), internando também os ancestrais que
+    faltarem (a ocupação usa os ids deles). Retorna None, sem internar
+    nada, se a tabela passaria de MAX_LOCAIS locais.
     """
-    if not isinstance(caminho, str) or not caminho:
-        print("ERRO: O caminho deve ser uma string não vazia.")
-        return local_atual, voltar_pilha, avancar_pilha
+    id_ = _IDS.get(local)
+    if id_ is not None:
+        return id_
+    partes = [parte for parte in local.split("/") if parte]
+    novos = [caminho for caminho in ("/" + "/".join(partes[:tamanho]) for tamanho in range(1, len(partes) + 1))
+             if caminho not in _IDS]
+    if len(_LOCAIS) + len(novos) > MAX_LOCAIS:
+        return None
+    for caminho in novos:
+        id_local(caminho)
+    return _IDS[local]
+
+
+def nome_local(id_):
+    """Caminho do local a partir do id (um caminho já em string volta como está)."""
+    if isinstance(id_, str):
+        return id_
+    return _LOCAIS[id_]
+
+
+def locais():
+    """Cópia da tabela id -> caminho (gravada junto com os snapshots)."""
+    return list(_LOCAIS)
+
+
+def restaurar_locais(nomes):
+    """
+    Recarrega a tabela gravada por locais(), para que os ids guardados nas
+    pilhas voltem a apontar para os mesmos caminhos. A tabela atual precisa
+    ser um prefixo da gravada (ex.: processo recém iniciado).
+    """
+    for id_, nome in enumerate(nomes):
+        if id_ < len(_LOCAIS):
+            if _LOCAIS[id_] != nome:
+                raise ValueError("Tabela de locais incompatível com a gravada.")
+        else:
+            id_local(nome)
+
 
+# --- Resolução de caminhos (compartilhada com pilha.py) ---
+
+@functools.lru_cache(maxsize=4096)
+def _resolver(local_atual, caminho):
+    """Local resultante de `caminho` a partir de `local_atual` (sem internar)."""
     novo_local = ""
 
     # 1. Determinar o novo local
@@ -52,15 +122,50 @@ def ir_local(caminho, local_atual, voltar_pilha, avancar_pilha):
     # Garantir que o local mínimo é a raiz
     if not novo_local:
          novo_local = "/"
+    return novo_local
+
+
+def resolver_caminho(local_atual, caminho):
+    """
+    Caminho normalizado de `caminho` (absoluto ou relativo, com '.' e '..')
+    a partir de `local_atual`. Resultados ficam em cache LRU por
+    (local atual, caminho). Não interna o resultado; se ele já estiver na
+    tabela, a string retornada é a internada.
+    """
+    novo_local = _resolver(local_atual, caminho)
+    id_ = _IDS.get(novo_local)
+    return novo_local if id_ is None else _LOCAIS[id_]
+
+
+# --- Funções de Roteiro do Visitante (Pilhas) ---
+
+def ir_local(caminho, local_atual, voltar_pilha, avancar_pilha):
+    """
+    IR <caminho>
+    Altera o local atual. Empilha o local anterior em VOLTAR e limpa AVANCAR.
+    Caminhos absolutos (ex: /IA/Visao) ou relativos (ex: Palco).
+    As pilhas recebem ids de local (ver id_local/nome_local).
+    """
+    if not isinstance(caminho, str) or not caminho:
+        print("ERRO: O caminho deve ser uma string não vazia.")
+        return local_atual, voltar_pilha, avancar_pilha
+
+    # 1. Determinar o novo local
+    novo_local = resolver_caminho(local_atual, caminho)
 
     # 2. Empilhar o local atual (se for diferente)
-    if local_atual != novo_local:
-        voltar_pilha.append(local_atual)
+    if novo_local != local_atual:
+        id_novo = admitir(novo_local)
+        if id_novo is None:
+            print(f"ERRO: Limite de {MAX_LOCAIS} locais atingido; não é possível ir para '{novo_local}'.")
+            return local_atual, voltar_pilha, avancar_pilha
+        voltar_pilha.append(id_local(local_atual))
         
         # 3. Limpar AVANCAR
         avancar_pilha.clear()
         
         # 4. Atualizar o local
+        novo_local = _LOCAIS[id_novo]
         print(f"INFO: Movendo de '{local_atual}' para '{novo_local}'.")
         return novo_local, voltar_pilha, avancar_pilha
     else:
@@ -78,10 +183,10 @@ def voltar_local(local_atual, voltar_pilha, avancar_pilha):
         return local_atual, voltar_pilha, avancar_pilha
     
     # Move local atual para AVANCAR
-    avancar_pilha.append(local_atual)
+    avancar_pilha.append(id_local(local_atual))
     
     # Retira o local anterior de VOLTAR e define como novo local atual
-    novo_local = voltar_pilha.pop()
+    novo_local = nome_local(voltar_pilha.pop())
     
     print(f"INFO: Retornando para '{novo_local}'.")
     return novo_local, voltar_pilha, avancar_pilha
@@ -97,10 +202,10 @@ def avancar_local(local_atual, voltar_pilha, avancar_pilha):
         return local_atual, voltar_pilha, avancar_pilha
 
     # Move local atual para VOLTAR
-    voltar_pilha.append(local_atual)
+    voltar_pilha.append(id_local(local_atual))
     
     # Retira o local avançado de AVANCAR e define como novo local atual
-    novo_local = avancar_pilha.pop()
+    novo_local = nome_local(avancar_pilha.pop())
     
     print(f"INFO: Avançando para '{novo_local}'.")
     return novo_local, voltar_pilha, avancar_pilha
@@ -126,7 +231,7 @@ def mapa_simples(voltar_pilha, local_atual, avancar_pilha):
         print("<- VOLTAR:")
         # Exibe do topo para a base (topo = último elemento da lista)
         for i, local in enumerate(reversed(voltar_pilha)):
-            print(f"  ({len(voltar_pilha) - i}) {local}")
+            print(f"  ({len(voltar_pilha) - i}) {nome_local(local)}")
     else:
         print("<- VOLTAR: (Vazio)")
 
@@ -138,7 +243,7 @@ def mapa_simples(voltar_pilha, local_atual, avancar_pilha):
         print("\n-> AVANÇAR:")
         # Exibe do topo para a base (topo = último elemento da lista)
         for i, local in enumerate(reversed(avancar_pilha)):
-            print(f"  ({len(avancar_pilha) - i}) {local}")
+            print(f"  ({len(avancar_pilha) - i}) {nome_local(local)}")
     else:
         print("\n-> AVANÇAR: (Vazio)")
     print("-------------------------")
@@ -0,0 +1,380 @@
+# benchmark.py
+# Mede como o núcleo da bilheteria e do roteiro escala com o número de
+# ingressos: tempo por operação e pico de memória (tracemalloc), com cargas
+# sorteadas a partir de uma semente fixa (mesma carga em todo commit).
+#
+# Uso:
+#   python benchmark.py                                  # 10^3 .. 10^6
+#   python benchmark.py --tamanhos 1000,10000 --saida atual.json
+#   python benchmark.py --saida novo.json --comparar anterior.json
+import argparse
+import io
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import comandos
+import escalonador
+import fila
+import ingressos
+import pilha
+import Roteiro
+
+TAMANHOS_PADRAO = (1_000, 10_000, 100_000, 1_000_000)
+
+# Acima desta razão de tempo (atual / anterior) a comparação acusa regressão
+LIMITE_REGRESSAO = 1.5
+
+NOMES = ("Ana", "Bruno", "Clara", "Davi", "Eva", "Felipe", "Gabi", "Hugo")
+LOCAIS = ("Palco", "IA/Visao", "IA/Robotica", "Games", "..", "/Palco/Backstage", ".", "/")
+
+
+class _Nulo(io.TextIOBase):
+    def write(self, texto):
+        return len(texto)
+
+
+def _cargas(n, semente):
+    """Estado com n ingressos pendentes (categorias sorteadas) e o gerador usado."""
+    sorteio = random.Random(semente * 1_000_003 + n)
+    categorias = list(escalonador.CATEGORIAS)
+    estado = fila.criar_estado()
+    for _ in range(n):
+        fila.comprar(estado, sorteio.choice(NOMES), sorteio.choice(categorias))
+    return estado, sorteio
+
+
+# --- Operações medidas ---
+# Cada função recebe (n, semente) e devolve (repeticoes, executar), onde
+# executar() faz as `repeticoes` operações sobre um estado já montado.
+
+def _op_comprar(n, semente):
+    estado, sorteio = _cargas(n, semente)
+    repeticoes = min(n, 10_000)
+    pedidos = [(sorteio.choice(NOMES), sorteio.choice(list(escalonador.CATEGORIAS))) for _ in range(repeticoes)]
+
+    def executar():
+        for nome, categoria in pedidos:
+            fila.comprar(estado, nome, categoria)
+    return repeticoes, executar
+
+
+def _op_entrar(modo):
+    def preparar(n, semente):
+        estado, _ = _cargas(n, semente)
+        fila.modo(estado, modo)
+        repeticoes = min(n, 10_000)
+
+        def executar():
+            for _ in range(repeticoes):
+                fila.entrar(estado)
+        return repeticoes, executar
+    return preparar
+
+
+def _op_cancelar(n, semente):
+    estado, sorteio = _cargas(n, semente)
+    repeticoes = min(n // 2, 10_000)
+    ids = [str(i) for i in sorteio.sample(range(1, n + 1), repeticoes)]
+
+    def executar():
+        for id_ in ids:
+            fila.cancelar(estado, id_)
+    return repeticoes, executar
+
+
+def _op_listar(n, semente):
+    estado, _ = _cargas(n, semente)
+    repeticoes = 3
+
+    def executar():
+        for _ in range(repeticoes):
+            fila.listar(estado)
+    return repeticoes, executar
+
+
+def _op_modo(n, semente):
+    estado, _ = _cargas(n, semente)
+    repeticoes = 4
+
+    def executar():
+        for i in range(repeticoes):
+            fila.modo(estado, "PRIORIDADE" if i % 2 == 0 else "PADRAO")
+    return repeticoes, executar
+
+
+def _op_estatisticas(n, semente):
+    estado, _ = _cargas(n, semente)
+    repeticoes = 10_000
+
+    def executar():
+        for _ in range(repeticoes):
+            ingressos.atualizar_estatisticas(estado)
+    return repeticoes, executar
+
+
+def _op_aplicar_comando(n, semente):
+    estado, sorteio = _cargas(n, semente)
+    repeticoes = min(n, 10_000)
+    categorias = [sorteio.choice(list(escalonador.CATEGORIAS)) for _ in range(repeticoes)]
+
+    def executar():
+        nonlocal estado
+        undo, redo = [], []
+        for categoria in categorias:
+            estado, undo, redo = pilha._aplicar_comando(estado, undo, redo, fila.comprar, "Ana", categoria)
+    return repeticoes, executar
+
+
+def _op_desfazer(n, semente):
+    estado, sorteio = _cargas(n, semente)
+    repeticoes = min(n, 10_000)
+    undo, redo = [], []
+    for _ in range(repeticoes):
+        funcao = fila.entrar if sorteio.random() < 0.5 else fila.comprar
+        args = () if funcao is fila.entrar else ("Ana", "VIP")
+        estado, undo, redo = pilha._aplicar_comando(estado, undo, redo, funcao, *args)
+
+    def executar():
+        nonlocal estado, undo, redo
+        for _ in range(repeticoes):
+            estado, undo, redo = pilha.desfazer(estado, undo, redo)
+    return repeticoes, executar
+
+
+def _op_ir_local(n, semente):
+    sorteio = random.Random(semente)
+    repeticoes = min(n, 100_000)
+    caminhos = [sorteio.choice(LOCAIS) for _ in range(repeticoes)]
+
+    def executar():
+        local, voltar, avancar = "/", [], []
+        for caminho in caminhos:
+            local, voltar, avancar = Roteiro.ir_local(caminho, local, voltar, avancar)
+    return repeticoes, executar
+
+
+def _op_misto(n, semente):
+    """Fluxo de comandos do terminal (via comandos.executar) sobre n ingressos."""
+    sorteio = random.Random(semente + n)
+    ctx = comandos.criar_contexto()
+    ctx["estado_fila"], _ = _cargas(n, semente)
+    repeticoes = min(n, 20_000)
+    linhas = []
+    for _ in range(repeticoes):
+        x = sorteio.random()
+        if x < 0.40:
+            linhas.append(f"COMPRAR {sorteio.choice(NOMES)} {sorteio.choice(list(escalonador.CATEGORIAS))}")
+        elif x < 0.70:
+            linhas.append("ENTRAR")
+        elif x < 0.78:
+            linhas.append(f"CANCELAR {sorteio.randint(1, n)}")
+        elif x < 0.83:
+            linhas.append("ESPIAR")
+        elif x < 0.86:
+            linhas.append("ESTATISTICAS")
+        elif x < 0.93:
+            linhas.append(sorteio.choice(("DESFAZER", "REFAZER")))
+        else:
+            linhas.append(f"IR {sorteio.choice(LOCAIS)}")
+
+    def executar():
+        for linha in linhas:
+            comandos.executar(ctx, linha)
+    return repeticoes, executar
+
+
+OPERACOES = {
+    "comprar": _op_comprar,
+    "entrar_padrao": _op_entrar("PADRAO"),
+    "entrar_prioridade": _op_entrar("PRIORIDADE"),
+    "cancelar": _op_cancelar,
+    "listar": _op_listar,
+    "modo": _op_modo,
+    "atualizar_estatisticas": _op_estatisticas,
+    "aplicar_comando": _op_aplicar_comando,
+    "desfazer": _op_desfazer,
+    "ir_local": _op_ir_local,
+    "misto": _op_misto,
+}
+
+
+def medir(operacao, n, semente):
+    """
+    Mede uma operação para n ingressos. O tempo vem de uma execução sem
+    tracemalloc; o pico de memória, de uma segunda execução (sobre outro
+    estado montado do zero) com tracemalloc ligado.
+    """
+    preparar = OPERACOES[operacao]
+    stdout_original = sys.stdout
+    sys.stdout = _Nulo()
+    try:
+        repeticoes, executar = preparar(n, semente)
+        inicio = time.perf_counter()
+        executar()
+        tempo = time.perf_counter() - inicio
+
+        _, executar = preparar(n, semente)
+        tracemalloc.start()
+        executar()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        sys.stdout = stdout_original
+
+    return {
+        "operacao": operacao,
+        "n": n,
+        "repeticoes": repeticoes,
+        "tempo_total_s": tempo,
+        "ns_por_op": tempo / repeticoes * 1e9,
+        "pico_memoria_bytes": pico,
+    }
+
+
+def medir_estado(n, semente):
+    """
+    Memória do estado inteiro (tabela de ingressos, filas, índices,
+    estatísticas e históricos) com n ingressos pendentes e, depois de atender
+    todos, com n atendidos: bytes no total e por ingresso.
+    """
+    stdout_original = sys.stdout
+    sys.stdout = _Nulo()
+    tracemalloc.start()
+    try:
+        estado, _ = _cargas(n, semente)
+        pendentes, pico = tracemalloc.get_traced_memory()
+        for _ in range(n):
+            fila.entrar(estado)
+        atendidos, pico_atendidos = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        sys.stdout = stdout_original
+    del estado
+    return {"n": n, "bytes": pendentes, "bytes_por_ingresso": pendentes / n, "pico_bytes": pico,
+            "bytes_atendidos": atendidos, "bytes_por_atendido": atendidos / n,
+            "pico_bytes_atendidos": pico_atendidos}
+
+
+def expoentes(resultados):
+    """
+    Expoente de crescimento do tempo por operação entre tamanhos vizinhos:
+    ~0 para O(1), ~1 para O(n) por operação (quadrático no total).
+    """
+    por_operacao = {}
+    for r in resultados:
+        por_operacao.setdefault(r["operacao"], []).append(r)
+    saida = {}
+    for operacao, lista in por_operacao.items():
+        lista.sort(key=lambda r: r["n"])
+        saida[operacao] = [
+            round(math.log(b["ns_por_op"] / a["ns_por_op"]) / math.log(b["n"] / a["n"]), 2)
+            for a, b in zip(lista, lista[1:])
+        ]
+    return saida
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def executar_suite(tamanhos=TAMANHOS_PADRAO, operacoes=None, semente=42, progresso=None):
+    """Roda as operações para cada tamanho e devolve o dicionário de resultados (JSON)."""
+    if operacoes is None:
+        operacoes = list(OPERACOES)
+    resultados = []
+    memoria = []
+    for n in tamanhos:
+        memoria.append(medir_estado(n, semente))
+        for operacao in operacoes:
+            resultado = medir(operacao, n, semente)
+            resultados.append(resultado)
+            if progresso is not None:
+                progresso(resultado)
+    return {
+        "meta": {
+            "commit": _commit_atual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "semente": semente,
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "memoria_estado": memoria,
+        "resultados": resultados,
+        "expoentes": expoentes(resultados),
+    }
+
+
+def comparar(atual, anterior, limite=LIMITE_REGRESSAO):
+    """
+    Compara dois resultados (mesma operação e n). Retorna a lista de
+    (operacao, n, razao) e imprime as regressões acima do limite.
+    """
+    antes = {(r["operacao"], r["n"]): r for r in anterior["resultados"]}
+    comparacoes = []
+    print(f"\n=== COMPARAÇÃO com {anterior['meta'].get('commit') or 'anterior'} ===")
+    for r in atual["resultados"]:
+        base = antes.get((r["operacao"], r["n"]))
+        if base is None:
+            continue
+        razao = r["ns_por_op"] / base["ns_por_op"]
+        comparacoes.append((r["operacao"], r["n"], razao))
+        marca = "  << REGRESSÃO" if razao > limite else ""
+        print(f"{r['operacao']:<24}{r['n']:>10}  {base['ns_por_op']:>12.0f} -> {r['ns_por_op']:>12.0f} ns  "
+              f"({razao:.2f}x){marca}")
+    return comparacoes
+
+
+def _exibir(resultado):
+    print(f"{resultado['operacao']:<24}{resultado['n']:>10}  {resultado['ns_por_op']:>12.0f} ns/op  "
+          f"pico {resultado['pico_memoria_bytes'] / 1024:>10.0f} KiB", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks da bilheteria e do roteiro")
+    parser.add_argument("--tamanhos", default=",".join(map(str, TAMANHOS_PADRAO)),
+                        help="quantidades de ingressos, separadas por vírgula")
+    parser.add_argument("--operacoes", default=",".join(OPERACOES),
+                        help="operações a medir, separadas por vírgula")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", metavar="ARQUIVO", help="grava os resultados em JSON")
+    parser.add_argument("--comparar", metavar="ARQUIVO", help="JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    tamanhos = [int(t) for t in args.tamanhos.split(",")]
+    operacoes = args.operacoes.split(",")
+    desconhecidas = [op for op in operacoes if op not in OPERACOES]
+    if desconhecidas:
+        parser.error(f"operações desconhecidas: {', '.join(desconhecidas)}")
+
+    resultado = executar_suite(tamanhos, operacoes, args.semente, progresso=_exibir)
+
+    print("\nMemória do estado:")
+    for m in resultado["memoria_estado"]:
+        print(f"  n={m['n']:>9}: {m['bytes'] / 2**20:8.1f} MiB pendentes ({m['bytes_por_ingresso']:.0f} B/ingresso), "
+              f"{m['bytes_atendidos'] / 2**20:8.1f} MiB atendidos ({m['bytes_por_atendido']:.0f} B/ingresso)")
+    print("\nExpoente de crescimento do tempo por operação (0 = constante, 1 = linear):")
+    for operacao, valores in resultado["expoentes"].items():
+        print(f"  {operacao:<24}{valores}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            comparar(resultado, json.load(arquivo))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
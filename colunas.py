@@ -0,0 +1,182 @@
+# colunas.py
+# Ingressos guardados em colunas, sem um objeto por ingresso.
+#
+# Tabela: um array por campo (nome, categoria, chegada, espera e situação),
+# indexado pelo id; a linha 0 não é usada, então len(tabela) == proximo_id.
+# Um ingresso custa ~26 bytes nas colunas (o nome é uma referência à string
+# internada), contra ~72 do objeto Ingresso mais o int do id e a entrada do
+# dicionário id -> ingresso que ele substitui. A situação de cada id
+# (pendente, atendido ou cancelado) faz o papel desse dicionário e da marca
+# de atendidos.
+#
+# FilaIds: a fila de ids de um deque, num array de inteiros de 8 bytes (o
+# deque de objetos gastava 8 bytes por ponteiro mais 32 do int do id).
+#
+# O Ingresso de ingressos.py continua como registro de valor: é o que as
+# compras recebem e o que Tabela.ingresso() monta para exibir um id.
+import sys
+from array import array
+from itertools import islice
+
+import ingressos
+
+# Situação de cada id na tabela (LIVRE: linha sem ingresso)
+LIVRE, PENDENTE, ATENDIDO, CANCELADO = range(4)
+
+
+class Tabela:
+    """Colunas dos ingressos, indexadas pelo id (ver o início do módulo)."""
+
+    __slots__ = ("nomes", "codigos", "chegadas", "esperas", "situacao")
+
+    def __init__(self):
+        self.nomes = [None]
+        self.codigos = bytearray(1)
+        self.chegadas = array('q', [0])
+        self.esperas = array('q', [0])
+        self.situacao = bytearray(1)
+
+    def __len__(self):
+        return len(self.situacao)
+
+    def acrescentar(self, ingresso):
+        """Grava o ingresso (id >= len(self)) como pendente."""
+        faltam = ingresso.id - len(self.situacao)
+        if faltam:
+            # Linhas vagas antes do id, com a mesma chegada (a coluna não diminui com o id)
+            self._vagas(faltam, ingresso.chegada_logica)
+        self.nomes.append(ingresso.nome)
+        self.codigos.append(ingresso.codigo)
+        self.chegadas.append(ingresso.chegada_logica)
+        self.esperas.append(0)
+        # Por último: quem lê sem trava (portaria) só vê a linha já completa
+        self.situacao.append(PENDENTE)
+
+    def acrescentar_lote(self, lote):
+        """Versão em lote de acrescentar() para ingressos de ids consecutivos (IMPORTAR)."""
+        faltam = lote[0].id - len(self.situacao)
+        if faltam:
+            self._vagas(faltam, lote[0].chegada_logica)
+        self.nomes.extend([ingresso.nome for ingresso in lote])
+        self.codigos.extend([ingresso.codigo for ingresso in lote])
+        self.chegadas.extend([ingresso.chegada_logica for ingresso in lote])
+        self.esperas.extend(array('q', bytes(8 * len(lote))))
+        self.situacao.extend(bytes([PENDENTE]) * len(lote))
+
+    def _vagas(self, quantidade, chegada):
+        self.nomes.extend([None] * quantidade)
+        self.codigos.extend(bytes(quantidade))
+        self.chegadas.extend(array('q', [chegada]) * quantidade)
+        self.esperas.extend(array('q', bytes(8 * quantidade)))
+        self.situacao.extend(bytes(quantidade))
+
+    def truncar(self, id_ingresso):
+        """Descarta as linhas a partir do id (DESFAZER de COMPRAR/IMPORTAR)."""
+        for coluna in (self.nomes, self.codigos, self.chegadas, self.esperas, self.situacao):
+            del coluna[id_ingresso:]
+
+    def categoria(self, id_ingresso):
+        return ingressos.nome_categoria(self.codigos[id_ingresso])
+
+    def ingresso(self, id_ingresso):
+        """Registro Ingresso com os dados do id (uma cópia: alterá-lo não muda a tabela)."""
+        return ingressos.Ingresso(id_ingresso, self.nomes[id_ingresso], self.categoria(id_ingresso),
+                                  self.chegadas[id_ingresso], self.esperas[id_ingresso])
+
+    def __getstate__(self):
+        # Pelos nomes das categorias: os códigos podem mudar entre processos
+        return (self.nomes, bytes(self.codigos), ingressos.nomes_categorias(), self.chegadas,
+                self.esperas, bytes(self.situacao))
+
+    def __setstate__(self, estado):
+        self.nomes, codigos, categorias, self.chegadas, self.esperas, situacao = estado
+        traducao = bytes(ingressos.codigo_categoria(categoria) for categoria in categorias)
+        self.codigos = bytearray(codigos.translate(traducao.ljust(256, b"\0")))
+        self.nomes = [None if nome is None else sys.intern(nome) for nome in self.nomes]
+        self.situacao = bytearray(situacao)
+
+
+# Posições livres deixadas no início do array quando ele é recriado por um
+# appendleft (DESFAZER de ENTRAR): os seguintes não deslocam o array todo
+COMPACTAR_INICIO = 32
+
+
+class FilaIds:
+    """
+    Fila de ids com a interface de deque usada pelas filas (append,
+    appendleft, popleft, pop, extend, clear, len, índice e iteração).
+    Os ids ficam em self.ids[self.inicio:]: o popleft só avança o início,
+    e as posições já retiradas são devolvidas quando passam da metade do
+    array (custo amortizado O(1)).
+    """
+
+    __slots__ = ("ids", "inicio")
+
+    def __init__(self, ids=()):
+        self.ids = array('q', ids)
+        self.inicio = 0
+
+    def __len__(self):
+        return len(self.ids) - self.inicio
+
+    def __bool__(self):
+        return len(self.ids) > self.inicio
+
+    def __getitem__(self, posicao):
+        if posicao < 0:
+            posicao += len(self.ids) - self.inicio
+            if posicao < 0:
+                raise IndexError("índice fora da fila")
+        return self.ids[self.inicio + posicao]
+
+    def __iter__(self):
+        return islice(self.ids, self.inicio, None)
+
+    def append(self, id_ingresso):
+        self.ids.append(id_ingresso)
+
+    def extend(self, ids):
+        self.ids.extend(ids)
+
+    def popleft(self):
+        ids = self.ids
+        if self.inicio >= len(ids):
+            raise IndexError("popleft de uma fila vazia")
+        id_ingresso = ids[self.inicio]
+        self.inicio += 1
+        if self.inicio > COMPACTAR_INICIO and 2 * self.inicio > len(ids):
+            # Quem lê sem trava (portaria) pode ver o array já deslocado com o
+            # início antigo; escalonador._primeiro_valido confere e recomeça
+            del ids[:self.inicio]
+            self.inicio = 0
+        return id_ingresso
+
+    def appendleft(self, id_ingresso):
+        if not self.inicio:
+            livres = max(COMPACTAR_INICIO, len(self.ids) // 4)
+            self.ids[:0] = array('q', bytes(8 * livres))
+            self.inicio = livres
+        self.inicio -= 1
+        self.ids[self.inicio] = id_ingresso
+
+    def pop(self):
+        if self.inicio >= len(self.ids):
+            raise IndexError("pop de uma fila vazia")
+        return self.ids.pop()
+
+    def clear(self):
+        self.ids = array('q')
+        self.inicio = 0
+
+    def __reduce__(self):
+        return FilaIds, (self.ids[self.inicio:],)
+
+    def __eq__(self, outra):
+        if isinstance(outra, FilaIds):
+            return self.ids[self.inicio:] == outra.ids[outra.inicio:]
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"FilaIds({list(self)!r})"
@@ -0,0 +1,410 @@
+# comandos.py
+# Registro de comandos do terminal: cada verbo aponta para o seu tratador,
+# a quantidade de argumentos e se entra no histórico de DESFAZER/REFAZER.
+# O terminal interativo, o modo em lote e outros front ends (servidor,
+# testes) usam o mesmo núcleo: analisar() + despachar().
+from collections import namedtuple
+
+import estandes
+import fila
+import metricas
+import ocupacao
+import pilha
+import Roteiro
+import sessoes
+
+# tipo:
+#   "desfazivel" - comando da fila executado via pilha._aplicar_comando
+#                  (funcao(estado_fila, *args)), entra no histórico
+#   "consulta"   - consulta à fila, funcao(estado_fila, *args), fora do histórico
+#   "contexto"   - tratador genérico, funcao(ctx, *args); retorna False para encerrar
+# n_args: quantos argumentos a função recebe; extras: se aceita (e ignora)
+# argumentos a mais, como o terminal sempre fez com COMPRAR e ENTRAR, ou
+# "repassar" para entregar todos à função (opções, como no LISTAR).
+# altera: se o comando muda o estado da sessão (vai para o diário, ver persistencia.py).
+Comando = namedtuple("Comando", ["verbo", "funcao", "n_args", "extras", "tipo", "altera"])
+
+# Linha já interpretada, pronta para ser despachada (pode ser reutilizada)
+ComandoAnalisado = namedtuple("ComandoAnalisado", ["verbo", "args", "comando"])
+
+REGISTRO = {}
+
+MENSAGEM_INVALIDO = "Comando inválido. Digite 'AJUDA' para ver a lista de comandos."
+
+
+def registrar(verbo, funcao, n_args=0, extras=False, tipo="contexto", altera=None):
+    """Adiciona (ou substitui) um comando no registro.
+    Por padrão só os comandos "desfazivel" contam como alteração de estado.
+    """
+    if altera is None:
+        altera = tipo == "desfazivel"
+    REGISTRO[verbo] = Comando(verbo, funcao, n_args, extras, tipo, altera)
+
+
+# Comandos que leem um arquivo: verbo -> (ler, aplicar). ler(ctx, caminho)
+# confere o arquivo sem alterar nada e retorna os dados (None, com os erros
+# já mostrados, se não deu para ler); aplicar faz o comando com os dados,
+# recebendo (caminho, dados) e chamada como o próprio comando. O diário
+# guarda os dados, não o caminho (ver persistencia.py).
+CARGAS = {}
+
+
+def registrar_carga(verbo, ler, aplicar):
+    """Declara como o comando `verbo` (já registrado) lê o seu arquivo e aplica os dados."""
+    CARGAS[verbo] = (ler, aplicar)
+
+
+def com_dados(verbo, caminho, dados):
+    """O comando de carga `verbo` analisado com os dados já lidos, pronto para despachar()."""
+    comando = REGISTRO[verbo]._replace(funcao=CARGAS[verbo][1], n_args=2, extras=False)
+    return ComandoAnalisado(verbo, [caminho, dados], comando)
+
+
+def criar_contexto():
+    """Cria o estado completo de uma sessão (fila, roteiro e históricos)."""
+    return {
+        "estado_fila": fila.criar_estado(),
+        "local_atual": "/",
+        "voltar_pilha": [],
+        "avancar_pilha": [],
+        "estado_pilha": {
+            "local_atual": "/",
+            "voltar_pilha": [],
+            "avancar_pilha": [],
+            "estado_geral_simulado": "Normal",
+        },
+        # Historicos separados para fila e para "estado_pilha", com orçamento
+        # de memória (ver pilha.Historico)
+        "historico_undo_fila": pilha.Historico(),
+        "historico_redo_fila": pilha.Historico(),
+        "historico_undo_pilha": pilha.Historico(),
+        "historico_redo_pilha": pilha.Historico(),
+        # Grafo dos estandes para o ROTA (ver estandes.py)
+        "mapa_estandes": estandes.MapaEstandes(),
+        # Navegação de cada visitante, pelo id do ingresso (ver sessoes.py)
+        "sessoes": sessoes.Sessoes(),
+        # Visitantes por local: o do terminal (na raiz) e os das sessões (ver ocupacao.py)
+        "ocupacao": ocupacao.Ocupacao([Roteiro.id_local("/")]),
+    }
+
+
+def analisar(linha):
+    """
+    Interpreta uma linha: separa o verbo (em maiúsculas) dos argumentos e
+    resolve a entrada do registro. Retorna None para linhas vazias.
+    `comando` fica None quando o verbo não existe ou a aridade não confere.
+    """
+    partes = linha.split()
+    if not partes:
+        return None
+    verbo = partes[0].upper()
+    args = partes[1:]
+    comando = REGISTRO.get(verbo)
+    if comando is not None:
+        quantidade = len(args)
+        if quantidade < comando.n_args or (quantidade > comando.n_args and not comando.extras):
+            comando = None
+    return ComandoAnalisado(verbo, args, comando)
+
+
+def despachar(ctx, analisado):
+    """
+    Executa um comando já analisado sobre o contexto.
+    Retorna False quando a sessão deve terminar (SAIR) e True nos demais casos.
+    Com a coleta de métricas ligada, mede a duração (ver metricas.py).
+    """
+    if metricas.coletor is not None:
+        return metricas.coletor.medir(_despachar, ctx, analisado)
+    return _despachar(ctx, analisado)
+
+
+def _despachar(ctx, analisado):
+    comando = analisado.comando
+    if comando is None:
+        print(MENSAGEM_INVALIDO)
+        return True
+
+    args = analisado.args[:comando.n_args] if comando.extras is True else analisado.args
+    tipo = comando.tipo
+    if tipo == "desfazivel":
+        ctx["estado_fila"], ctx["historico_undo_fila"], ctx["historico_redo_fila"] = pilha._aplicar_comando(
+            ctx["estado_fila"], ctx["historico_undo_fila"], ctx["historico_redo_fila"], comando.funcao, *args
+        )
+    elif tipo == "consulta":
+        ctx["estado_fila"] = comando.funcao(ctx["estado_fila"], *args)
+    elif comando.funcao(ctx, *args) is False:
+        return False
+    return True
+
+
+def executar(ctx, linha):
+    """Analisa e despacha uma linha. Retorna False quando a sessão deve terminar."""
+    analisado = analisar(linha)
+    if analisado is None:
+        return True
+    return despachar(ctx, analisado)
+
+
+# --- Tratadores que usam o contexto inteiro ---
+
+def ajuda():
+    return (
+        "\nComandos disponíveis:\n"
+        "-----------------------------------\n"
+        "COMPRAR <nome> <categoria>\n"
+        "IMPORTAR <arquivo.csv>    (compra em lote: colunas nome,categoria)\n"
+        "ENTRAR\n"
+        "ESPIAR\n"
+        "CANCELAR <id>\n"
+        "LISTAR [LIMITE=n] [INICIO=n] [CATEGORIA=c] [CURSOR=x]  (sem opções: lista tudo)\n"
+        "BUSCAR <prefixo>          (ingressos pelo início do nome)\n"
+        "POSICAO <id>              (lugar do ingresso na ordem de atendimento)\n"
+        "ESTATISTICAS [QUANTIS] [JANELA=n]  (percentis da espera; últimos n minutos)\n"
+        "REVER <t>                 (fila e estatísticas como estavam no minuto t)\n"
+        "MODO <PADRAO|PRIORIDADE>\n"
+        "POLITICA <ESTRITA|PONDERADA|ENVELHECIMENTO>  (como o MODO PRIORIDADE alterna as categorias)\n"
+        "IR <caminho>              (caminhos absolutos (/IA/Visao) ou relativos (Palco, Robótica)\n"
+        "VOLTAR\n"
+        "AVANCAR\n"
+        "ONDE\n"
+        "ROTA <destino>            (caminho mais curto a pé até o estande)\n"
+        "ESTANDES <arquivo>        (carrega o mapa: linhas 'origem destino metros')\n"
+        "TRECHO <origem> <destino> <metros|FECHADO>\n"
+        "SESSAO <id> <IR c|VOLTAR|AVANCAR|ONDE|MAPA|ROTA d>  (navegação do visitante do ingresso)\n"
+        "SESSOES                   (sessões de visitantes ativas e memória usada)\n"
+        "OCUPACAO [TOP=n | <caminho>]  (locais mais cheios, contando os sub-locais)\n"
+        "DESFAZER\n"
+        "REFAZER\n"
+        "HISTORICO                 (tamanho dos históricos de desfazer/refazer)\n"
+        "METRICAS [LIGAR|DESLIGAR|ZERAR]  (latência por comando e tamanhos)\n"
+        "SAIR\n"
+        "-----------------------------------"
+    )
+
+
+def _cmd_ajuda(ctx):
+    print(ajuda())
+
+
+def _cmd_sair(ctx):
+    print("Encerrando o sistema...")
+    return False
+
+
+def _ocupacao(ctx):
+    # Sessões gravadas antes da contagem existir: conta a partir dos locais atuais
+    contagem = ctx.get("ocupacao")
+    if contagem is None:
+        contagem = ctx["ocupacao"] = ocupacao.Ocupacao(
+            [Roteiro.id_local(ctx["local_atual"])] + _sessoes(ctx).locais())
+    return contagem
+
+
+def _navegar(ctx, funcao, *args):
+    """Aplica uma função de navegação do Roteiro ao visitante do terminal e conta o movimento."""
+    contagem = _ocupacao(ctx)
+    antes = ctx["local_atual"]
+    ctx["local_atual"], ctx["voltar_pilha"], ctx["avancar_pilha"] = funcao(
+        *args, antes, ctx["voltar_pilha"], ctx["avancar_pilha"]
+    )
+    if ctx["local_atual"] != antes:
+        contagem.mover(Roteiro.id_local(antes), Roteiro.id_local(ctx["local_atual"]))
+
+
+def _cmd_ir(ctx, caminho):
+    _navegar(ctx, Roteiro.ir_local, caminho)
+
+
+def _cmd_voltar(ctx):
+    _navegar(ctx, Roteiro.voltar_local)
+
+
+def _cmd_avancar(ctx):
+    _navegar(ctx, Roteiro.avancar_local)
+
+
+def _cmd_onde(ctx):
+    Roteiro.onde(ctx["local_atual"])
+
+
+def _mapa_estandes(ctx):
+    # Sessões gravadas antes do mapa existir não têm a chave
+    return ctx.setdefault("mapa_estandes", estandes.MapaEstandes())
+
+
+def _cmd_rota(ctx, destino):
+    estandes.rota(_mapa_estandes(ctx), ctx["local_atual"], destino)
+
+
+def _cmd_estandes(ctx, caminho):
+    estandes.carregar(_mapa_estandes(ctx), caminho)
+
+
+def _ler_estandes(ctx, caminho):
+    return estandes.ler_mapa(caminho)
+
+
+def _cmd_carregar_trechos(ctx, caminho, trechos):
+    estandes.carregar_trechos(_mapa_estandes(ctx), caminho, trechos)
+
+
+def _cmd_trecho(ctx, origem, destino, metros):
+    estandes.trecho(_mapa_estandes(ctx), origem, destino, metros)
+
+
+def _sessoes(ctx):
+    # Sessões gravadas antes das sessões por visitante não têm a chave
+    return ctx.setdefault("sessoes", sessoes.Sessoes())
+
+
+def _cmd_sessao(ctx, *args):
+    sessoes.comando(_sessoes(ctx), ctx["estado_fila"], _mapa_estandes(ctx), _ocupacao(ctx), *args)
+
+
+def _cmd_sessoes(ctx):
+    sessoes.resumo(_sessoes(ctx))
+
+
+def _cmd_ocupacao(ctx, *args):
+    ocupacao.exibir(_ocupacao(ctx), *args)
+
+
+def _ler_importacao(ctx, caminho):
+    return fila.ler_importacao(ctx["estado_fila"], caminho)
+
+
+def _cmd_desfazer(ctx):
+    # Primeiro tenta desfazer ações na FILA (se houver histórico)
+    if ctx["historico_undo_fila"]:
+        ctx["estado_fila"], ctx["historico_undo_fila"], ctx["historico_redo_fila"] = pilha.desfazer(
+            ctx["estado_fila"], ctx["historico_undo_fila"], ctx["historico_redo_fila"]
+        )
+        # mensagem genérica; fila restaurada
+        print("OK: desfaz ação na fila.")
+    # Senão tenta desfazer ações no estado_pilha (navegação)
+    elif ctx["historico_undo_pilha"]:
+        ctx["estado_pilha"], ctx["historico_undo_pilha"], ctx["historico_redo_pilha"] = pilha.desfazer(
+            ctx["estado_pilha"], ctx["historico_undo_pilha"], ctx["historico_redo_pilha"]
+        )
+        print("OK: desfaz ação de navegação.")
+    else:
+        print("ERRO DESFAZER: Nada a desfazer.")
+
+
+def _cmd_historico(ctx):
+    pilha.exibir_historicos([
+        ("DESFAZER (fila)", ctx["historico_undo_fila"]),
+        ("REFAZER (fila)", ctx["historico_redo_fila"]),
+        ("DESFAZER (navegação)", ctx["historico_undo_pilha"]),
+        ("REFAZER (navegação)", ctx["historico_redo_pilha"]),
+    ])
+
+
+def _cmd_refazer(ctx):
+    # tenta refazer na fila primeiro, depois no estado_pilha
+    if ctx["historico_redo_fila"]:
+        ctx["estado_fila"], ctx["historico_undo_fila"], ctx["historico_redo_fila"] = pilha.refazer(
+            ctx["estado_fila"], ctx["historico_undo_fila"], ctx["historico_redo_fila"]
+        )
+        print("OK: refaz ação na fila.")
+    elif ctx["historico_redo_pilha"]:
+        ctx["estado_pilha"], ctx["historico_undo_pilha"], ctx["historico_redo_pilha"] = pilha.refazer(
+            ctx["estado_pilha"], ctx["historico_undo_pilha"], ctx["historico_redo_pilha"]
+        )
+        print("OK: refaz ação de navegação.")
+    else:
+        print("ERRO REFAZER: Nada a refazer.")
+
+
+# --- Tabela de comandos ---
+
+registrar("AJUDA", _cmd_ajuda, extras=True)
+registrar("SAIR", _cmd_sair, extras=True)
+
+registrar("COMPRAR", fila.comprar, 2, extras=True, tipo="desfazivel")
+registrar("IMPORTAR", fila.importar, 1, tipo="desfazivel")
+registrar("ENTRAR", fila.entrar, extras=True, tipo="desfazivel")
+registrar("ESPIAR", fila.espiar, extras=True, tipo="consulta")
+registrar("CANCELAR", fila.cancelar, 1, tipo="desfazivel")
+registrar("LISTAR", fila.listar, extras="repassar", tipo="consulta")
+registrar("BUSCAR", fila.buscar, 1, tipo="consulta")
+registrar("POSICAO", fila.posicao, 1, tipo="consulta")
+registrar("ESTATISTICAS", fila.estatisticas, extras="repassar", tipo="consulta")
+registrar("REVER", fila.rever, 1, tipo="consulta")
+registrar("MODO", fila.modo, 1, tipo="desfazivel")
+registrar("POLITICA", fila.politica, 1, tipo="desfazivel")
+
+registrar("IR", _cmd_ir, 1, altera=True)
+registrar("VOLTAR", _cmd_voltar, extras=True, altera=True)
+registrar("AVANCAR", _cmd_avancar, extras=True, altera=True)
+registrar("ONDE", _cmd_onde, extras=True)
+registrar("ROTA", _cmd_rota, 1)
+registrar("ESTANDES", _cmd_estandes, 1, altera=True)
+registrar("TRECHO", _cmd_trecho, 3, altera=True)
+registrar("SESSAO", _cmd_sessao, 2, extras="repassar", altera=True)
+registrar("SESSOES", _cmd_sessoes, extras=True)
+registrar("OCUPACAO", _cmd_ocupacao, extras="repassar")
+
+registrar("DESFAZER", _cmd_desfazer, extras=True, altera=True)
+registrar("REFAZER", _cmd_refazer, extras=True, altera=True)
+registrar("HISTORICO", _cmd_historico, extras=True)
+registrar("METRICAS", metricas.comando, extras="repassar")
+
+registrar_carga("IMPORTAR", _ler_importacao, fila.importar_linhas)
+registrar_carga("ESTANDES", _ler_estandes, _cmd_carregar_trechos)
+
+
+# --- MICROBENCHMARK DO DESPACHO ---
+
+def medir_despacho(repeticoes=200_000):
+    """
+    Mede o custo por comando do caminho analisar() + despachar(), separado do
+    trabalho do comando em si (a saída vai para um destino nulo).
+    """
+    import io
+    import sys
+    import time
+
+    class _Nulo(io.TextIOBase):
+        def write(self, texto):
+            return len(texto)
+
+    def _cronometrar(funcao):
+        inicio = time.perf_counter()
+        funcao()
+        return (time.perf_counter() - inicio) / repeticoes * 1e9
+
+    ctx = criar_contexto()
+    linhas = ["ONDE", "COMPRAR Ana VIP", "ESPIAR", "CANCELAR 1", "XYZ"]
+    analisados = [analisar(linha) for linha in linhas]
+    quantidade = len(linhas)
+
+    def _so_analisar():
+        for i in range(repeticoes):
+            analisar(linhas[i % quantidade])
+
+    def _so_despachar_onde():
+        onde = analisados[0]
+        for _ in range(repeticoes):
+            despachar(ctx, onde)
+
+    def _linha_completa():
+        for i in range(repeticoes):
+            executar(ctx, linhas[i % quantidade])
+
+    stdout_original = sys.stdout
+    sys.stdout = _Nulo()
+    try:
+        resultados = {
+            "analisar (ns/cmd)": _cronometrar(_so_analisar),
+            "despachar ONDE (ns/cmd)": _cronometrar(_so_despachar_onde),
+            "executar linha mista (ns/cmd)": _cronometrar(_linha_completa),
+        }
+    finally:
+        sys.stdout = stdout_original
+    return resultados
+
+
+if __name__ == "__main__":
+    for nome, valor in medir_despacho().items():
+        print(f"{nome}: {valor:.0f}")
@@ -0,0 +1,221 @@
+# escalonador.py
+# Decide de qual categoria sai o próximo visitante no MODO PRIORIDADE.
+#
+# As categorias e seus parâmetros ficam em um único dicionário de
+# configuração; fila.py e ingressos.py leem dele, então adicionar uma
+# categoria ou ajustar pesos não exige mexer no código dos ingressos.
+import heapq
+
+# Ordem do dicionário = ordem de exibição e do rodízio.
+#   prioridade: menor atende antes (política ESTRITA)
+#   peso: quantos atendimentos seguidos por rodada (política PONDERADA)
+#   atraso: minutos somados à chegada (política ENVELHECIMENTO)
+CATEGORIAS = {
+    'VIP': {'prioridade': 0, 'peso': 3, 'atraso': 0},
+    'INTEIRA': {'prioridade': 1, 'peso': 2, 'atraso': 5},
+    'MEIA': {'prioridade': 2, 'peso': 1, 'atraso': 10},
+}
+
+# ESTRITA: sempre a categoria de maior prioridade com alguém na fila.
+# PONDERADA: rodízio ponderado (weighted round-robin) entre as categorias.
+# ENVELHECIMENTO: o mais antigo pela chegada + atraso da categoria; quem
+#   espera muito acaba passando à frente de categorias mais prioritárias.
+POLITICAS = ('ESTRITA', 'PONDERADA', 'ENVELHECIMENTO')
+
+
+# Nomes já calculados (nome_fila é chamada a cada escolha de fila)
+_NOMES_FILA = {}
+
+
+def nome_fila(categoria):
+    """Nome da fila (em estado['filas']) de uma categoria no MODO PRIORIDADE."""
+    nome = _NOMES_FILA.get(categoria)
+    if nome is None:
+        nome = _NOMES_FILA[categoria] = 'fila_' + categoria.lower()
+    return nome
+
+
+def criar(categorias=None, politica='ESTRITA'):
+    """Cria o estado do escalonador (guardado em estado['escalonador'])."""
+    if categorias is None:
+        categorias = CATEGORIAS
+    if not categorias:
+        raise ValueError("É preciso configurar ao menos uma categoria.")
+    if politica not in POLITICAS:
+        raise ValueError(f"Política '{politica}' inválida. Use {', '.join(POLITICAS)}.")
+
+    ordem = list(categorias)
+    return {
+        'politica': politica,
+        'categorias': {cat: dict(params) for cat, params in categorias.items()},
+        'ordem': ordem,
+        # Heap (chave, categoria) das políticas ESTRITA/ENVELHECIMENTO.
+        # Entradas antigas são descartadas de forma preguiçosa: a válida
+        # de cada categoria é a que está em 'chave_heap'.
+        'heap': [],
+        'chave_heap': dict.fromkeys(ordem),
+        # Rodízio da política PONDERADA
+        'cursor': 0,
+        'credito': categorias[ordem[0]]['peso'],
+    }
+
+
+def _primeiro_valido(estado, fila):
+    """Id do primeiro ingresso da fila que não foi cancelado.
+    Percorre por índice (e não com um iterador) porque, na portaria
+    concorrente, outro thread pode acrescentar ao fim da fila ou retirar
+    do início enquanto isso (e até deslocar o array, ver colunas.FilaIds);
+    se o início mudou durante a busca, recomeça.
+    """
+    cancelados = estado['cancelados']
+    while True:
+        try:
+            inicio = fila[0]
+        except IndexError:
+            return None
+        encontrado = None
+        posicao = 0
+        try:
+            while posicao < len(fila):
+                item = fila[posicao]
+                if item not in cancelados:
+                    encontrado = item
+                    break
+                posicao += 1
+            if fila[0] == inicio:
+                return encontrado
+        except IndexError:
+            pass
+
+
+def _chave(estado, esc, categoria):
+    """Chave atual da categoria na heap (None se a fila estiver vazia)."""
+    nome = nome_fila(categoria)
+    if not estado['pendentes'][nome]:
+        return None
+    params = esc['categorias'][categoria]
+    if esc['politica'] == 'ESTRITA':
+        return (params['prioridade'],)
+    cabeca = _primeiro_valido(estado, estado['filas'][nome])
+    if cabeca is None:
+        return None
+    return (estado['ingressos'].chegadas[cabeca] + params['atraso'], params['prioridade'], cabeca)
+
+
+def notificar(estado, categoria):
+    """
+    Avisa que a cabeça da fila da categoria pode ter ficado "menor"
+    (a fila deixou de estar vazia ou alguém voltou ao início, num DESFAZER).
+    Aumentos não precisam de aviso: escolher() corrige a heap ao consultá-la.
+    """
+    esc = estado['escalonador']
+    if estado['modo_atendimento'] != 'PRIORIDADE' or esc['politica'] == 'PONDERADA':
+        return
+    chave = _chave(estado, esc, categoria)
+    atual = esc['chave_heap'][categoria]
+    if chave is not None and (atual is None or chave < atual):
+        esc['chave_heap'][categoria] = chave
+        heapq.heappush(esc['heap'], (chave, categoria))
+        if len(esc['heap']) > 4 * len(esc['ordem']) + 16:
+            _compactar_heap(esc)
+
+
+def _compactar_heap(esc):
+    """Remove da heap as entradas que não são mais as válidas de cada categoria."""
+    esc['heap'] = [(chave, cat) for cat, chave in esc['chave_heap'].items() if chave is not None]
+    heapq.heapify(esc['heap'])
+
+
+def reconstruir(estado):
+    """Recalcula a heap do zero (após MODO, POLITICA ou carga de estado). O(k log k)."""
+    esc = estado['escalonador']
+    for categoria in esc['ordem']:
+        esc['chave_heap'][categoria] = None
+    esc['heap'] = []
+    if estado['modo_atendimento'] != 'PRIORIDADE' or esc['politica'] == 'PONDERADA':
+        return
+    for categoria in esc['ordem']:
+        esc['chave_heap'][categoria] = _chave(estado, esc, categoria)
+    _compactar_heap(esc)
+
+
+def escolher(estado):
+    """
+    Retorna a categoria do próximo visitante (ou None se todas vazias).
+    ESTRITA/ENVELHECIMENTO: O(log k) amortizado sobre a heap de categorias.
+    PONDERADA: O(1) enquanto a categoria da vez tem crédito; pula as vazias.
+    Não altera o rodízio; quem atende chama consumir().
+    """
+    esc = estado['escalonador']
+    if esc['politica'] == 'PONDERADA':
+        return _escolher_rodizio(estado, esc)
+
+    heap = esc['heap']
+    chave_heap = esc['chave_heap']
+    while heap:
+        chave, categoria = heap[0]
+        if chave != chave_heap[categoria]:
+            heapq.heappop(heap)  # entrada antiga
+            continue
+        real = _chave(estado, esc, categoria)
+        if real == chave:
+            return categoria
+        # A cabeça mudou (atendimento/cancelamento): recoloca com a chave nova
+        heapq.heappop(heap)
+        chave_heap[categoria] = real
+        if real is not None:
+            heapq.heappush(heap, (real, categoria))
+    return None
+
+
+def _escolher_rodizio(estado, esc):
+    ordem = esc['ordem']
+    pendentes = estado['pendentes']
+    atual = ordem[esc['cursor']]
+    if esc['credito'] > 0 and pendentes[nome_fila(atual)]:
+        return atual
+    for passo in range(1, len(ordem) + 1):
+        categoria = ordem[(esc['cursor'] + passo) % len(ordem)]
+        if pendentes[nome_fila(categoria)]:
+            return categoria
+    return None
+
+
+def consumir(estado, categoria):
+    """
+    Registra que um visitante da categoria foi atendido (avança o rodízio).
+    Retorna o marcador a ser passado para restaurar() no DESFAZER.
+    """
+    esc = estado['escalonador']
+    marcador = (esc['cursor'], esc['credito'])
+    if esc['politica'] == 'PONDERADA':
+        if esc['ordem'][esc['cursor']] != categoria or esc['credito'] <= 0:
+            # Começa a vez da categoria com o crédito cheio
+            esc['cursor'] = esc['ordem'].index(categoria)
+            esc['credito'] = esc['categorias'][categoria]['peso']
+        esc['credito'] -= 1
+    return marcador
+
+
+def restaurar(estado, marcador):
+    """Inversa de consumir()."""
+    esc = estado['escalonador']
+    esc['cursor'], esc['credito'] = marcador
+
+
+def definir_politica(estado, politica):
+    """Troca a política e reinicia o rodízio. Retorna o marcador para o DESFAZER."""
+    esc = estado['escalonador']
+    anterior = (esc['politica'], esc['cursor'], esc['credito'])
+    esc['politica'] = politica
+    esc['cursor'] = 0
+    esc['credito'] = esc['categorias'][esc['ordem'][0]]['peso']
+    reconstruir(estado)
+    return anterior
+
+
+def restaurar_politica(estado, anterior):
+    """Inversa de definir_politica()."""
+    esc = estado['escalonador']
+    esc['politica'], esc['cursor'], esc['credito'] = anterior
+    reconstruir(estado)
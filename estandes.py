@@ -0,0 +1,281 @@
+# estandes.py
+# Mapa físico dos estandes: grafo com a distância a pé (metros) de cada
+# trecho, para o ROTA <destino> achar o caminho mais curto a partir do
+# local atual.
+#
+# Os estandes são os mesmos caminhos do Roteiro (/Palco, /IA/Visao), pelos
+# ids internados de Roteiro.id_local. Os trechos valem nos dois sentidos.
+#
+# Cada origem consultada ganha uma árvore de caminhos mínimos (Dijkstra com
+# heap), guardada num cache LRU de até MAX_ARVORES origens: uma rota de uma
+# origem já vista só sobe a árvore do destino até a origem, sem rodar o
+# Dijkstra de novo. Ao mudar um trecho (TRECHO), só caem as árvores que ele
+# afeta: as que usam o trecho, ou em que o novo valor encurta (ou empata)
+# o caminho até uma das pontas. As demais continuam iguais às que o
+# Dijkstra calcularia do zero. Recarregar o mapa (ESTANDES) limpa o cache.
+import math
+from collections import OrderedDict
+from heapq import heappop, heappush
+
+import Roteiro
+
+MAX_ARVORES = 1024
+
+# Quantas linhas inválidas o ESTANDES mostra
+MAX_ERROS = 5
+
+
+def _estande(nome):
+    """Id do estande (caminho absoluto a partir da raiz, como no IR), ou None
+    se a tabela de locais estiver cheia (ver Roteiro.admitir)."""
+    return Roteiro.admitir(Roteiro.resolver_caminho("/", nome))
+
+
+def _distancia(texto):
+    """Distância em metros (número positivo) ou None."""
+    try:
+        valor = float(texto.replace(",", "."))
+    except ValueError:
+        return None
+    return valor if 0 < valor < math.inf else None
+
+
+class MapaEstandes:
+    """Vizinhos de cada estande {id: {id_vizinho: metros}} e o cache de árvores por origem."""
+
+    __slots__ = ("vizinhos", "trechos", "arvores")
+
+    def __init__(self):
+        self.vizinhos = {}
+        self.trechos = 0
+        # origem -> (distâncias, pais), das menos para as mais usadas
+        self.arvores = OrderedDict()
+
+    # O cache não vai para os snapshots do diário
+    def __getstate__(self):
+        return self.vizinhos, self.trechos
+
+    def __setstate__(self, estado):
+        self.vizinhos, self.trechos = estado
+        self.arvores = OrderedDict()
+
+    def ligar(self, a, b, metros):
+        """Cria ou altera o trecho a-b."""
+        vizinhos = self.vizinhos
+        if b not in vizinhos.setdefault(a, {}):
+            self.trechos += 1
+        vizinhos[a][b] = metros
+        vizinhos.setdefault(b, {})[a] = metros
+        self._invalidar(a, b, metros)
+
+    def fechar(self, a, b):
+        """Remove o trecho a-b. Retorna False se ele não existia."""
+        if b not in self.vizinhos.get(a, ()):
+            return False
+        del self.vizinhos[a][b]
+        del self.vizinhos[b][a]
+        self.trechos -= 1
+        self._invalidar(a, b, None)
+        return True
+
+    def _invalidar(self, a, b, metros):
+        """Descarta as árvores que mudariam com o trecho a-b passando a `metros` (None = fechado)."""
+        infinito = math.inf
+        afetadas = []
+        for origem, (distancias, pais) in self.arvores.items():
+            if pais.get(b) == a or pais.get(a) == b:
+                afetadas.append(origem)
+            elif metros is not None:
+                da = distancias.get(a, infinito)
+                db = distancias.get(b, infinito)
+                if da + metros <= db or db + metros <= da:
+                    # (o empate também: o Dijkstra do zero poderia escolher o trecho)
+                    if da < infinito or db < infinito:
+                        afetadas.append(origem)
+        for origem in afetadas:
+            del self.arvores[origem]
+
+    def _arvore(self, origem):
+        arvore = self.arvores.get(origem)
+        if arvore is not None:
+            self.arvores.move_to_end(origem)
+            return arvore
+        arvore = self.arvores[origem] = _dijkstra(self.vizinhos, origem)
+        if len(self.arvores) > MAX_ARVORES:
+            self.arvores.popitem(last=False)
+        return arvore
+
+    def rota(self, origem, destino):
+        """(metros, [ids de origem a destino]) do caminho mais curto, ou None se não houver."""
+        distancias, pais = self._arvore(origem)
+        metros = distancias.get(destino)
+        if metros is None:
+            return None
+        caminho = [destino]
+        while destino != origem:
+            destino = pais[destino]
+            caminho.append(destino)
+        caminho.reverse()
+        return metros, caminho
+
+
+def _dijkstra(vizinhos, origem):
+    """
+    Distâncias e pais da árvore de caminhos mínimos a partir de `origem`.
+    Os nós saem da heap em ordem de (distância, id) e o pai só muda com um
+    caminho estritamente menor, então a árvore depende só do grafo.
+    """
+    distancias = {origem: 0}
+    pais = {origem: None}
+    heap = [(0, origem)]
+    while heap:
+        distancia, no = heappop(heap)
+        if distancia > distancias[no]:
+            continue
+        for vizinho, metros in vizinhos[no].items():
+            nova = distancia + metros
+            if nova < distancias.get(vizinho, math.inf):
+                distancias[vizinho] = nova
+                pais[vizinho] = no
+                heappush(heap, (nova, vizinho))
+    return distancias, pais
+
+
+def _ler_mapa(arquivo):
+    """
+    Lê linhas "origem destino metros" (# inicia um comentário).
+    Retorna (trechos [(origem, destino, metros)] com os caminhos absolutos,
+    total de linhas inválidas, primeiros erros).
+    """
+    trechos = []
+    invalidas = 0
+    erros = []
+    for numero, linha in enumerate(arquivo, 1):
+        partes = linha.split("#", 1)[0].split()
+        if not partes:
+            continue
+        erro = None
+        if len(partes) != 3:
+            erro = "esperado origem, destino e distância"
+        else:
+            metros = _distancia(partes[2])
+            if metros is None:
+                erro = f"distância '{partes[2]}' inválida"
+            else:
+                a = Roteiro.resolver_caminho("/", partes[0])
+                b = Roteiro.resolver_caminho("/", partes[1])
+                if a == b:
+                    erro = "origem e destino iguais"
+        if erro is not None:
+            invalidas += 1
+            if len(erros) < MAX_ERROS:
+                erros.append(f"linha {numero}: {erro}")
+            continue
+        trechos.append((a, b, metros))
+    return trechos, invalidas, erros
+
+
+def ler_mapa(caminho):
+    """
+    Lê e confere o arquivo do ESTANDES, sem alterar o mapa. Retorna os
+    trechos [(origem, destino, metros)] ou None (erros já mostrados).
+    """
+    try:
+        with open(caminho, encoding="utf-8-sig") as arquivo:
+            trechos, invalidas, erros = _ler_mapa(arquivo)
+    except (OSError, UnicodeDecodeError) as erro:
+        print(f"ERRO ESTANDES: Não foi possível ler '{caminho}': {erro}")
+        return None
+    if invalidas:
+        print(f"ERRO ESTANDES: {invalidas} linha(s) inválida(s) em '{caminho}'; o mapa não foi alterado.")
+        for erro in erros:
+            print(f"  {erro}")
+        if invalidas > len(erros):
+            print(f"  ... e mais {invalidas - len(erros)}.")
+        return None
+    return trechos
+
+
+def carregar_trechos(mapa, caminho, trechos):
+    """
+    Substitui o mapa pelos trechos já conferidos por ler_mapa (None: a
+    leitura falhou e o mapa fica como está). É o que o diário guarda e
+    reexecuta (ver persistencia.py).
+    """
+    if trechos is None:
+        return
+    for origem, destino, _ in trechos:
+        if Roteiro.admitir(origem) is None or Roteiro.admitir(destino) is None:
+            print(f"ERRO ESTANDES: Limite de {Roteiro.MAX_LOCAIS} locais atingido; o mapa não foi alterado.")
+            return
+    mapa.vizinhos = {}
+    mapa.trechos = 0
+    mapa.arvores.clear()
+    vizinhos = mapa.vizinhos
+    for origem, destino, metros in trechos:
+        a, b = Roteiro.id_local(origem), Roteiro.id_local(destino)
+        if b not in vizinhos.setdefault(a, {}):
+            mapa.trechos += 1
+        vizinhos[a][b] = metros
+        vizinhos.setdefault(b, {})[a] = metros
+    print(f"ESTANDES: {len(vizinhos)} estandes e {mapa.trechos} trechos carregados de '{caminho}'.")
+
+
+def carregar(mapa, caminho):
+    """
+    ESTANDES <arquivo>
+    Substitui o mapa pelo do arquivo. Com alguma linha inválida, mantém o anterior.
+    """
+    carregar_trechos(mapa, caminho, ler_mapa(caminho))
+
+
+def trecho(mapa, origem, destino, metros):
+    """
+    TRECHO <origem> <destino> <metros|FECHADO>
+    Cria, altera ou fecha um trecho do mapa.
+    """
+    a, b = _estande(origem), _estande(destino)
+    if a is None or b is None:
+        print(f"ERRO TRECHO: Limite de {Roteiro.MAX_LOCAIS} locais atingido.")
+        return
+    nome_a, nome_b = Roteiro.nome_local(a), Roteiro.nome_local(b)
+    if a == b:
+        print("ERRO TRECHO: Origem e destino são o mesmo estande.")
+        return
+    if metros.upper() == "FECHADO":
+        if not mapa.fechar(a, b):
+            print(f"ERRO TRECHO: Não há trecho entre '{nome_a}' e '{nome_b}'.")
+            return
+        print(f"OK: Trecho '{nome_a}' - '{nome_b}' fechado.")
+        return
+    distancia = _distancia(metros)
+    if distancia is None:
+        print(f"ERRO TRECHO: Distância '{metros}' inválida. Use um número positivo de metros ou FECHADO.")
+        return
+    mapa.ligar(a, b, distancia)
+    print(f"OK: Trecho '{nome_a}' - '{nome_b}' com {distancia:g} m.")
+
+
+def rota(mapa, local_atual, destino):
+    """
+    ROTA <destino>
+    Mostra o caminho mais curto (a pé) do local atual até o destino
+    (absoluto ou relativo, como no IR).
+    """
+    alvo = Roteiro.resolver_caminho(local_atual, destino)
+    # Só consulta: um destino que nunca foi visto não entra na tabela de locais
+    origem, fim = Roteiro.buscar_id(local_atual), Roteiro.buscar_id(alvo)
+    if alvo == local_atual:
+        print(f"INFO: Já está em '{local_atual}'.")
+        return
+    for id_, nome in ((origem, local_atual), (fim, alvo)):
+        if id_ not in mapa.vizinhos:
+            print(f"ERRO ROTA: '{nome}' não está no mapa dos estandes (carregue com ESTANDES <arquivo>).")
+            return
+    resultado = mapa.rota(origem, fim)
+    if resultado is None:
+        print(f"ERRO ROTA: Não há caminho de '{local_atual}' até '{alvo}'.")
+        return
+    metros, caminho = resultado
+    print(f"ROTA: {' -> '.join(Roteiro.nome_local(id_) for id_ in caminho)} "
+          f"({metros:g} m, {len(caminho) - 1} trecho(s)).")
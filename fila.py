@@ -1,20 +1,441 @@
-from collections import deque
+import base64
+import csv
+from array import array
+from bisect import bisect_right
+from heapq import merge
+from itertools import islice
+
+import colunas
+import escalonador
+import indice_nomes
 import ingressos
+import linha_tempo
+import pilha
+import posicoes
 # O estado do sistema é encapsulado em um único dicionário, que é
 # passado e retornado por todas as funções.
 ESTADO_INICIAL = {
-    'fila_padrao': deque(),
-    'fila_vip': deque(),
-    'fila_inteira': deque(),
-    'fila_meia': deque(),
+    # 'fila_padrao' (MODO PADRAO) e uma fila por categoria (MODO PRIORIDADE),
+    # nomeadas por escalonador.nome_fila: 'fila_vip', 'fila_inteira', ...
+    # Cada fila guarda só os ids (colunas.FilaIds)
+    'filas': {},
     'modo_atendimento': 'PADRAO',  # PADRAO ou PRIORIDADE
     'proximo_id': 1,
     'contador_atendido': 0,
-    'atendidos': [],
+    # Ids atendidos, na ordem de atendimento (a espera fica na tabela)
+    'atendidos': array('q'),
     'relogio_logico': 0,  # Simula o tempo em "minutos"
     'tempo_total_espera': 0,
+    # Os ingressos em colunas, indexadas pelo id (ver colunas.py). A situação
+    # de cada id diz se ele está pendente (CANCELAR em O(1)) ou já foi
+    # atendido, sem depender de 'cancelados', que a compactação e o MODO esvaziam
+    'ingressos': None,
+    # Nomes dos ingressos pendentes e atendidos, para o BUSCAR (ver indice_nomes.py)
+    'indice_nomes': None,
+    # Pendentes por categoria e id, para o POSICAO (ver posicoes.py)
+    'posicoes': None,
+    # Ids cancelados que ainda ocupam posição em algum deque ("lápides")
+    'cancelados': set(),
+    # Quantidade de ingressos válidos (sem lápides) em cada fila
+    'pendentes': {},
+    # Categorias configuradas e política do MODO PRIORIDADE (ver escalonador.py)
+    'escalonador': None,
+    # Acumulador de estatísticas mantido a cada evento (ver ingressos.py)
+    'estatisticas': None,
+    # Lista onde o comando em execução registra suas operações inversas
+    # (preenchida por pilha._aplicar_comando; None fora do histórico)
+    'registro_alteracoes': None,
+    # Checkpoints + alterações aplicadas, para o REVER (ver linha_tempo.py)
+    'linha_tempo': None,
 }
 
+def criar_estado(categorias=None, politica='ESTRITA'):
+    """Cria um estado novo e independente (sem compartilhar deques/índices).
+    `categorias` e `politica` configuram o MODO PRIORIDADE (padrão:
+    escalonador.CATEGORIAS com prioridade estrita).
+    """
+    estado = ESTADO_INICIAL.copy()
+    estado['escalonador'] = escalonador.criar(categorias, politica)
+    estado['filas'] = {nome_fila: colunas.FilaIds() for nome_fila in _nomes_filas(estado)}
+    estado['atendidos'] = array('q')
+    estado['ingressos'] = colunas.Tabela()
+    estado['indice_nomes'] = indice_nomes.IndiceNomes(estado['ingressos'])
+    estado['posicoes'] = posicoes.OrdemAtendimento(estado['escalonador']['ordem'], estado['ingressos'])
+    estado['cancelados'] = set()
+    estado['pendentes'] = dict.fromkeys(estado['filas'], 0)
+    estado['estatisticas'] = ingressos.inicializar_estatisticas(estado['escalonador']['ordem'])
+    estado['linha_tempo'] = linha_tempo.LinhaTempo(estado)
+    return estado
+
+
+def _nomes_filas(estado):
+    """Todas as filas do estado: a padrão e uma por categoria."""
+    return ['fila_padrao'] + [escalonador.nome_fila(cat) for cat in estado['escalonador']['ordem']]
+
+
+def _nome_fila(estado, categoria):
+    """Retorna o nome da fila onde um ingresso da categoria fica no modo atual."""
+    if estado['modo_atendimento'] == 'PADRAO':
+        return 'fila_padrao'
+    return escalonador.nome_fila(categoria)
+
+
+def _descartar_lapides(estado, fila):
+    """Remove do início do deque os ingressos já cancelados (compactação preguiçosa).
+    Retorna os ids descartados, para que a operação possa ser desfeita.
+    """
+    cancelados = estado['cancelados']
+    descartados = []
+    while fila and fila[0] in cancelados:
+        id_ingresso = fila.popleft()
+        cancelados.discard(id_ingresso)
+        descartados.append(id_ingresso)
+    return descartados
+
+
+def _compactar_fila(estado, nome_fila):
+    """Reconstrói o deque sem as lápides. Chamado só quando elas passam da metade.
+    Retorna as lápides removidas como pares (posição, id).
+    """
+    cancelados = estado['cancelados']
+    vivos = colunas.FilaIds()
+    removidos = []
+    for posicao, id_ingresso in enumerate(estado['filas'][nome_fila]):
+        if id_ingresso in cancelados:
+            cancelados.discard(id_ingresso)
+            removidos.append((posicao, id_ingresso))
+        else:
+            vivos.append(id_ingresso)
+    estado['filas'][nome_fila] = vivos
+    return removidos
+
+
+def pendente(estado, id_ingresso):
+    """Se o id é de um ingresso pendente (comprado e ainda não atendido nem cancelado)."""
+    situacao = estado['ingressos'].situacao
+    return 0 < id_ingresso < len(situacao) and situacao[id_ingresso] == colunas.PENDENTE
+
+
+def foi_atendido(estado, id_ingresso):
+    situacao = estado['ingressos'].situacao
+    return 0 < id_ingresso < len(situacao) and situacao[id_ingresso] == colunas.ATENDIDO
+
+
+def ids_pendentes(estado):
+    """Ids de todos os ingressos pendentes, em ordem de id. O(n): para conferências."""
+    return [id_ingresso for id_ingresso, situacao in enumerate(estado['ingressos'].situacao)
+            if situacao == colunas.PENDENTE]
+
+
+def _iterar_fila(estado, fila):
+    """Percorre os ids de uma fila ignorando os ingressos cancelados."""
+    cancelados = estado['cancelados']
+    for id_ingresso in fila:
+        if id_ingresso not in cancelados:
+            yield id_ingresso
+
+
+# --- Operações elementares (usadas pelos comandos e pelo DESFAZER/REFAZER) ---
+# Cada comando registra via pilha.registrar a inversa e a repetição do que
+# executou, em vez de o histórico copiar o estado inteiro.
+
+def _enfileirar(estado, ingresso):
+    """Grava o ingresso na tabela, coloca o id no fim da sua fila e atualiza índices/contadores."""
+    categoria = ingresso.categoria
+    nome_fila = _nome_fila(estado, categoria)
+    estado['ingressos'].acrescentar(ingresso)
+    estado['filas'][nome_fila].append(ingresso.id)
+    estado['pendentes'][nome_fila] += 1
+    estado['indice_nomes'].adicionar(ingresso.id)
+    estado['posicoes'].incluir(ingresso.id, categoria)
+    estado['proximo_id'] = ingresso.id + 1
+    ingressos.contar_pendente(estado['estatisticas'], categoria)
+    if estado['pendentes'][nome_fila] == 1:
+        escalonador.notificar(estado, categoria)
+
+
+def _desenfileirar_ultimo(estado, ingresso):
+    """Inversa de _enfileirar: retira o ingresso do fim da sua fila e da tabela."""
+    categoria = ingresso.categoria
+    nome_fila = _nome_fila(estado, categoria)
+    estado['filas'][nome_fila].pop()
+    estado['pendentes'][nome_fila] -= 1
+    estado['indice_nomes'].remover(ingresso.id)
+    estado['posicoes'].excluir(ingresso.id, categoria)
+    estado['ingressos'].truncar(ingresso.id)
+    estado['proximo_id'] = ingresso.id
+    ingressos.contar_pendente(estado['estatisticas'], categoria, -1)
+
+
+def _agrupar_por_categoria(lote):
+    """Ids de um lote por categoria, mantendo a ordem (agrupa pelo código, sem passar pelo nome)."""
+    grupos = {}
+    for ingresso in lote:
+        grupo = grupos.get(ingresso.codigo)
+        if grupo is None:
+            grupo = grupos[ingresso.codigo] = []
+        grupo.append(ingresso.id)
+    return {ingressos.nome_categoria(codigo): grupo for codigo, grupo in grupos.items()}
+
+
+def _agrupar_por_fila(estado, grupos, lote):
+    """Os ids do lote em cada fila onde eles ficam no modo atual (mantém a ordem)."""
+    if estado['modo_atendimento'] == 'PADRAO':
+        return {'fila_padrao': range(lote[0].id, lote[-1].id + 1)}
+    return {escalonador.nome_fila(categoria): ids for categoria, ids in grupos.items()}
+
+
+def _enfileirar_lote(estado, lote):
+    """Versão em lote de _enfileirar (IMPORTAR): estende cada deque de uma vez.
+    Os ingressos vêm com ids consecutivos a partir de proximo_id.
+    """
+    grupos = _agrupar_por_categoria(lote)
+    estado['ingressos'].acrescentar_lote(lote)
+    for nome_fila, ids in _agrupar_por_fila(estado, grupos, lote).items():
+        estado['filas'][nome_fila].extend(ids)
+        estado['pendentes'][nome_fila] += len(ids)
+    estado['indice_nomes'].adicionar_lote(range(lote[0].id, lote[-1].id + 1))
+    estado['posicoes'].incluir_lote(grupos)
+    estado['proximo_id'] = lote[-1].id + 1
+    for categoria, ids in grupos.items():
+        ingressos.contar_pendente(estado['estatisticas'], categoria, len(ids))
+        escalonador.notificar(estado, categoria)
+
+
+def _desenfileirar_lote(estado, lote):
+    """Inversa de _enfileirar_lote: retira o lote do fim dos deques e da tabela."""
+    grupos = _agrupar_por_categoria(lote)
+    for nome_fila, ids in _agrupar_por_fila(estado, grupos, lote).items():
+        fila = estado['filas'][nome_fila]
+        if len(ids) == len(fila):
+            fila.clear()
+        else:
+            for _ in range(len(ids)):
+                fila.pop()
+        estado['pendentes'][nome_fila] -= len(ids)
+    estado['indice_nomes'].remover_lote(range(lote[0].id, lote[-1].id + 1))
+    estado['posicoes'].excluir_lote(grupos)
+    estado['ingressos'].truncar(lote[0].id)
+    estado['proximo_id'] = lote[0].id
+    for categoria, ids in grupos.items():
+        ingressos.contar_pendente(estado['estatisticas'], categoria, -len(ids))
+
+
+def _atender(estado):
+    """Retira o próximo visitante e contabiliza o atendimento (sem exibir nada).
+    Retorna (id atendido, lápides descartadas do início da fila, marcador do
+    escalonador) ou (None, [], None).
+    """
+    fila_a_atender = _proximo_a_entrar(estado)
+    if fila_a_atender is None:
+        return None, [], None
+
+    tabela = estado['ingressos']
+    descartados = _descartar_lapides(estado, fila_a_atender)
+    id_atendido = fila_a_atender.popleft()
+    categoria = tabela.categoria(id_atendido)
+    marcador = escalonador.consumir(estado, categoria)
+    estado['pendentes'][_nome_fila(estado, categoria)] -= 1
+    estado['posicoes'].excluir(id_atendido, categoria)
+
+    # O relógio avança 1 minuto a cada atendimento
+    estado['relogio_logico'] += 1
+
+    tempo_espera = estado['relogio_logico'] - tabela.chegadas[id_atendido]
+    estado['tempo_total_espera'] += tempo_espera
+    estado['contador_atendido'] += 1
+
+    # Adiciona dados de atendimento para ESTATISTICAS
+    tabela.esperas[id_atendido] = tempo_espera
+    tabela.situacao[id_atendido] = colunas.ATENDIDO
+    estado['atendidos'].append(id_atendido)
+    ingressos.contar_atendido(estado['estatisticas'], categoria, tempo_espera,
+                              minuto=estado['relogio_logico'])
+    return id_atendido, descartados, marcador
+
+
+def _desatender(estado, descartados, marcador):
+    """Inversa de _atender: devolve o último atendido (e as lápides) ao início da fila."""
+    tabela = estado['ingressos']
+    id_ingresso = estado['atendidos'].pop()
+    categoria = tabela.categoria(id_ingresso)
+    tempo_espera = tabela.esperas[id_ingresso]
+    tabela.esperas[id_ingresso] = 0
+    tabela.situacao[id_ingresso] = colunas.PENDENTE
+    ingressos.contar_atendido(estado['estatisticas'], categoria, tempo_espera, -1,
+                              minuto=estado['relogio_logico'])
+    estado['relogio_logico'] -= 1
+    estado['tempo_total_espera'] -= tempo_espera
+    estado['contador_atendido'] -= 1
+
+    nome_fila = _nome_fila(estado, categoria)
+    fila = estado['filas'][nome_fila]
+    fila.appendleft(id_ingresso)
+    estado['pendentes'][nome_fila] += 1
+    estado['posicoes'].incluir(id_ingresso, categoria)
+
+    for item in reversed(descartados):
+        fila.appendleft(item)
+        estado['cancelados'].add(item)
+
+    escalonador.restaurar(estado, marcador)
+    escalonador.notificar(estado, categoria)
+
+
+def _remover_por_id(estado, id_cancelar):
+    """Função auxiliar para remover um ingresso pendente por ID.
+    Consulta a situação do id na tabela e marca o ingresso como lápide em
+    O(1); o id só sai fisicamente do deque quando chegar ao início ou numa
+    compactação.
+    Retorna (id, lápides compactadas) ou (None, []).
+    """
+    if not pendente(estado, id_cancelar):
+        return None, []
+
+    tabela = estado['ingressos']
+    categoria = tabela.categoria(id_cancelar)
+    nome_fila = _nome_fila(estado, categoria)
+    tabela.situacao[id_cancelar] = colunas.CANCELADO
+    estado['indice_nomes'].remover(id_cancelar)
+    estado['posicoes'].excluir(id_cancelar, categoria)
+    estado['cancelados'].add(id_cancelar)
+    estado['pendentes'][nome_fila] -= 1
+    ingressos.contar_pendente(estado['estatisticas'], categoria, -1)
+
+    # Compacta quando as lápides passam a ser maioria no deque (custo amortizado O(1))
+    compactados = []
+    if len(estado['filas'][nome_fila]) > 2 * estado['pendentes'][nome_fila] + 32:
+        compactados = _compactar_fila(estado, nome_fila)
+    return id_cancelar, compactados
+
+
+def _restaurar_cancelado(estado, id_ingresso, compactados):
+    """Inversa de _remover_por_id: reinsere as lápides compactadas e reativa o ingresso."""
+    tabela = estado['ingressos']
+    categoria = tabela.categoria(id_ingresso)
+    nome_fila = _nome_fila(estado, categoria)
+    if compactados:
+        fila = estado['filas'][nome_fila]
+        reconstruida = colunas.FilaIds()
+        for posicao, item in compactados:
+            while len(reconstruida) < posicao:
+                reconstruida.append(fila.popleft())
+            reconstruida.append(item)
+            estado['cancelados'].add(item)
+        reconstruida.extend(fila)
+        estado['filas'][nome_fila] = reconstruida
+
+    tabela.situacao[id_ingresso] = colunas.PENDENTE
+    estado['cancelados'].discard(id_ingresso)
+    estado['pendentes'][nome_fila] += 1
+    estado['indice_nomes'].adicionar(id_ingresso)
+    estado['posicoes'].incluir(id_ingresso, categoria)
+    ingressos.contar_pendente(estado['estatisticas'], categoria)
+    escalonador.notificar(estado, categoria)
+
+
+def _transicao_modo(estado, novo_modo):
+    """Move os ingressos para as filas do novo modo (sem exibir nada).
+    Retorna o que o DESFAZER precisa para voltar (ver _restaurar_modo): o
+    modo, o limite do PADRAO e as lápides de cada deque com a posição. Os
+    ingressos vivos não são guardados: a ordem deles no modo anterior sai
+    das filas novas, então o registro do MODO (no histórico e na linha do
+    tempo) não cresce com a fila.
+    """
+    filas = estado['filas']
+    cancelados = estado['cancelados']
+    lapides = {}
+    if cancelados:
+        for nome_fila, fila in filas.items():
+            removidas = [(posicao, item) for posicao, item in enumerate(fila) if item in cancelados]
+            if removidas:
+                lapides[nome_fila] = removidas
+    anterior = (estado['modo_atendimento'], estado['posicoes'].limite, lapides)
+    ordem = estado['escalonador']['ordem']
+    novas = {nome_fila: colunas.FilaIds() for nome_fila in filas}
+
+    # Lógica de Transição (movimentação dos ingressos)
+    # As lápides ficam para trás: a transição já é O(n) e compacta tudo.
+    if novo_modo == 'PADRAO':
+        # Transfere tudo para a fila_padrao, mantendo a ordem das categorias (VIP > INTEIRA > MEIA > PADRAO)
+        # Se for PADRAO -> PRIORIDADE, a fila_padrao já estará vazia, mas por segurança.
+        ingressos_a_mover = novas['fila_padrao']
+        for categoria in ordem:
+            ingressos_a_mover.extend(_iterar_fila(estado, filas[escalonador.nome_fila(categoria)]))
+        ingressos_a_mover.extend(_iterar_fila(estado, filas['fila_padrao'])) # Pega o que estava lá
+
+    elif novo_modo == 'PRIORIDADE':
+        # Transfere da fila_padrao para as filas de prioridade
+        destinos = _filas_por_codigo(estado, novas)
+        codigos = estado['ingressos'].codigos
+        for id_ingresso in _iterar_fila(estado, filas['fila_padrao']):
+            destinos[codigos[id_ingresso]].append(id_ingresso)
+
+    if novo_modo == 'PADRAO' and estado['modo_atendimento'] != 'PADRAO':
+        # Os que já existem ficaram agrupados por categoria (ver posicoes.py)
+        estado['posicoes'].limite = estado['proximo_id']
+    estado['filas'] = novas
+    estado['modo_atendimento'] = novo_modo
+    estado['cancelados'] = set()
+    estado['pendentes'] = {nome_fila: len(fila) for nome_fila, fila in novas.items()}
+    escalonador.reconstruir(estado)
+    return anterior
+
+
+def _filas_por_codigo(estado, filas):
+    """Código da categoria -> fila dela (do MODO PRIORIDADE) em `filas`."""
+    return {ingressos.codigo_categoria(categoria): filas[escalonador.nome_fila(categoria)]
+            for categoria in estado['escalonador']['ordem']}
+
+
+def _restaurar_modo(estado, anterior):
+    """Inversa de _transicao_modo: remonta os deques do modo anterior a
+    partir das filas atuais (iguais às deixadas pela transição) e recoloca
+    as lápides nas posições que tinham.
+    """
+    modo_anterior, limite, lapides = anterior
+    filas = estado['filas']
+    ordem = estado['escalonador']['ordem']
+    antigas = {nome_fila: colunas.FilaIds() for nome_fila in filas}
+    if modo_anterior == 'PADRAO':
+        # Os ids < limite vinham agrupados pela ordem das categorias e os
+        # demais por id; cada fila de categoria está em ordem de id
+        depois = []
+        for categoria in ordem:
+            fila = filas[escalonador.nome_fila(categoria)]
+            quantos = bisect_right(fila, limite - 1)
+            antigas['fila_padrao'].extend(islice(fila, quantos))
+            depois.append(islice(fila, quantos, None))
+        antigas['fila_padrao'].extend(merge(*depois))
+    else:
+        destinos = _filas_por_codigo(estado, antigas)
+        codigos = estado['ingressos'].codigos
+        for id_ingresso in filas['fila_padrao']:
+            destinos[codigos[id_ingresso]].append(id_ingresso)
+
+    cancelados = set()
+    for nome_fila, removidas in lapides.items():
+        fila = antigas[nome_fila]
+        reconstruida = colunas.FilaIds()
+        for posicao, item in removidas:
+            while len(reconstruida) < posicao:
+                reconstruida.append(fila.popleft())
+            reconstruida.append(item)
+            cancelados.add(item)
+        reconstruida.extend(fila)
+        antigas[nome_fila] = reconstruida
+
+    estado['filas'] = antigas
+    estado['modo_atendimento'] = modo_anterior
+    estado['cancelados'] = cancelados
+    estado['pendentes'] = {nome_fila: len(fila) - len(lapides.get(nome_fila, ()))
+                           for nome_fila, fila in antigas.items()}
+    estado['posicoes'].limite = limite
+    escalonador.reconstruir(estado)
+
+
+# --- Comandos ---
+
 def comprar(estado, nome, categoria):
     """
     COMPRAR <nome> <categoria>
@@ -24,72 +445,184 @@ def comprar(estado, nome, categoria):
     categoria = categoria.upper()
 
     # ✅ Verificação antes de criar o ingresso
-    if categoria not in ['INTEIRA', 'MEIA', 'VIP']:
-        print(f"ERRO: Categoria '{categoria}' inválida. Use INTEIRA, MEIA ou VIP.")
+    categorias = estado['escalonador']['categorias']
+    if categoria not in categorias:
+        validas = sorted(categorias)
+        opcoes = ", ".join(validas[:-1]) + " ou " + validas[-1] if len(validas) > 1 else validas[0]
+        print(f"ERRO: Categoria '{categoria}' inválida. Use {opcoes}.")
         return estado
 
-    novo_ingresso = {
-        'id': estado['proximo_id'],
-        'nome': nome,
-        'categoria': categoria,
-        'chegada_logica': estado['relogio_logico']  # Tempo de chegada simulado
-    }
+    novo_ingresso = ingressos.Ingresso(
+        estado['proximo_id'],
+        nome,
+        categoria,
+        estado['relogio_logico'],  # Tempo de chegada simulado
+    )
 
     # Enfileirar de acordo com o modo
-    if estado['modo_atendimento'] == 'PADRAO':
-        estado['fila_padrao'].append(novo_ingresso)
-    elif estado['modo_atendimento'] == 'PRIORIDADE':
-        if categoria == 'VIP':
-            estado['fila_vip'].append(novo_ingresso)
-        elif categoria == 'INTEIRA':
-            estado['fila_inteira'].append(novo_ingresso)
-        elif categoria == 'MEIA':
-            estado['fila_meia'].append(novo_ingresso)
-
-    print(f"Ingresso '{novo_ingresso['id']}' ({nome} - {categoria}) comprado e adicionado à fila.")
-    estado['proximo_id'] += 1
+    _enfileirar(estado, novo_ingresso)
+    pilha.registrar(estado, _desenfileirar_ultimo, (novo_ingresso,), _enfileirar, (novo_ingresso,))
+
+    print(f"Ingresso '{novo_ingresso.id}' ({nome} - {categoria}) comprado e adicionado à fila.")
     return estado
+
+
+# Quantas linhas inválidas o IMPORTAR mostra
+MAX_ERROS_IMPORTAR = 5
+
+
+def _ler_csv(estado, arquivo):
+    """
+    Lê o CSV linha a linha. Colunas: nome e categoria (pelo cabeçalho, se
+    houver; senão as duas primeiras). Retorna (linhas válidas [(nome,
+    categoria)], total de linhas inválidas, primeiros erros).
+    """
+    categorias = estado['escalonador']['categorias']
+    # Categoria como escrita no arquivo -> nome válido (ou None): cada grafia
+    # diferente é conferida uma vez só, não uma vez por linha
+    validas = {}
+    linhas = []
+    invalidas = 0
+    erros = []
+
+    # Separador: o que mais aparece na primeira linha (planilhas em português
+    # costumam exportar com ';')
+    primeira_linha = arquivo.readline()
+    arquivo.seek(0)
+    separador = max(",;\t", key=primeira_linha.count)
+    leitor = csv.reader(arquivo, delimiter=separador if separador in primeira_linha else ",")
+    coluna_nome, coluna_categoria = 0, 1
+    primeira = True
+    for linha in leitor:
+        if not linha or (len(linha) == 1 and not linha[0].strip()):
+            continue
+        if primeira:
+            primeira = False
+            titulos = [campo.strip().lower() for campo in linha]
+            if 'nome' in titulos and 'categoria' in titulos:
+                coluna_nome, coluna_categoria = titulos.index('nome'), titulos.index('categoria')
+                continue
+        erro = None
+        if len(linha) <= max(coluna_nome, coluna_categoria):
+            erro = "esperado nome e categoria"
+        else:
+            nome = linha[coluna_nome].strip()
+            escrita = linha[coluna_categoria]
+            categoria = validas.get(escrita, False)
+            if categoria is False:
+                categoria = validas[escrita] = escrita.strip().upper()
+                if categoria not in categorias:
+                    categoria = validas[escrita] = None
+            if not nome:
+                erro = "nome vazio"
+            elif categoria is None:
+                erro = f"categoria '{escrita.strip()}' inválida"
+        if erro is not None:
+            invalidas += 1
+            if len(erros) < MAX_ERROS_IMPORTAR:
+                erros.append(f"linha {leitor.line_num}: {erro}")
+            continue
+        linhas.append((nome, categoria))
+    return linhas, invalidas, erros
+
+
+def ler_importacao(estado, caminho):
+    """
+    Lê e confere o CSV do IMPORTAR, sem alterar nada. Retorna as linhas
+    [(nome, categoria)] ou None (erros já mostrados) se o arquivo não pôde
+    ser lido ou tem alguma linha inválida.
+    """
+    try:
+        with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+            linhas, invalidas, erros = _ler_csv(estado, arquivo)
+    except (OSError, UnicodeDecodeError, csv.Error) as erro:
+        print(f"ERRO IMPORTAR: Não foi possível ler '{caminho}': {erro}")
+        return None
+
+    if invalidas:
+        print(f"ERRO IMPORTAR: {invalidas} linha(s) inválida(s) em '{caminho}'; nada foi importado.")
+        for erro in erros:
+            print(f"  {erro}")
+        if invalidas > len(erros):
+            print(f"  ... e mais {invalidas - len(erros)}.")
+        return None
+    return linhas
+
+
+def importar_linhas(estado, caminho, linhas):
+    """
+    Compra em lote as linhas [(nome, categoria)] já conferidas por
+    ler_importacao (None: a leitura falhou e não há o que fazer). Os ids
+    seguem a partir de proximo_id. É o que o diário guarda e reexecuta (ver
+    persistencia.py), para a recuperação não depender do arquivo.
+    """
+    if linhas is None:
+        return estado
+    if not linhas:
+        print(f"Nenhum ingresso em '{caminho}'.")
+        return estado
+
+    proximo_id = estado['proximo_id']
+    chegada = estado['relogio_logico']
+    Ingresso = ingressos.Ingresso
+    lote = [Ingresso(proximo_id + posicao, nome, categoria, chegada)
+            for posicao, (nome, categoria) in enumerate(linhas)]
+    _enfileirar_lote(estado, lote)
+    pilha.registrar(estado, _desenfileirar_lote, (lote,), _enfileirar_lote, (lote,))
+
+    resumo = ", ".join(f"{categoria}: {len(itens)}" for categoria, itens in _agrupar_por_categoria(lote).items())
+    print(f"IMPORTADOS: {len(lote)} ingresso(s) de '{caminho}' (IDs {lote[0].id} a {lote[-1].id}; {resumo}).")
+    return estado
+
+
+def importar(estado, caminho):
+    """
+    IMPORTAR <arquivo>
+    Compra em lote os ingressos de um CSV (nome,categoria). O arquivo inteiro
+    é conferido antes: com alguma linha inválida nada é importado. A
+    importação toda é uma alteração só no DESFAZER.
+    """
+    return importar_linhas(estado, caminho, ler_importacao(estado, caminho))
+
+
+def _nome_proxima_fila(estado):
+    """Nome da fila de onde sai o próximo visitante (ou None se todas vazias).
+    Usa a contagem de pendentes, então filas só com lápides contam como vazias.
+    """
+    if estado['modo_atendimento'] == 'PADRAO':
+        return 'fila_padrao' if estado['pendentes']['fila_padrao'] else None
+
+    # MODO PRIORIDADE: a política configurada escolhe a categoria
+    categoria = escalonador.escolher(estado)
+    if categoria is None:
+        return None
+    return escalonador.nome_fila(categoria)
+
 def _proximo_a_entrar(estado):
     """Função auxiliar para determinar quem deve sair da fila."""
-    if estado['modo_atendimento'] == 'PADRAO':
-        return estado['fila_padrao'] if estado['fila_padrao'] else None
-
-    # MODO PRIORIDADE
-    if estado['fila_vip']:
-        return estado['fila_vip']
-    elif estado['fila_inteira']:
-        return estado['fila_inteira']
-    elif estado['fila_meia']:
-        return estado['fila_meia']
-    return None
+    nome_fila = _nome_proxima_fila(estado)
+    if nome_fila is None:
+        return None
+    return estado['filas'][nome_fila]
 
 def entrar(estado):
     """
     ENTRAR
     Atende o próximo visitante (retira da fila, atualiza tempo e exibe dados).
     """
-    fila_a_atender = _proximo_a_entrar(estado)
+    id_atendido, descartados, marcador = _atender(estado)
+
+    if id_atendido is not None:
+        pilha.registrar(estado, _desatender, (descartados, marcador), _atender, ())
+
+        ingresso_atendido = estado['ingressos'].ingresso(id_atendido)
+        tempo_espera = ingresso_atendido.tempo_espera
+        print(f"--- ATENDIDO: Ingresso {ingresso_atendido.id} ---")
+        print(f"Nome: {ingresso_atendido.nome}")
+        print(f"Categoria: {ingresso_atendido.categoria}")
+        print(f"Tempo de Espera: {tempo_espera} min. (Chegada: {ingresso_atendido.chegada_logica} | Atendimento: {estado['relogio_logico']})")
+        return estado
 
-    if fila_a_atender:
-        ingresso_atendido = fila_a_atender.popleft()
-        
-        # O relógio avança 1 minuto a cada atendimento
-        estado['relogio_logico'] += 1
-        
-        tempo_espera = estado['relogio_logico'] - ingresso_atendido['chegada_logica']
-        estado['tempo_total_espera'] += tempo_espera
-        estado['contador_atendido'] += 1
-        
-        # Adiciona dados de atendimento para ESTATISTICAS
-        ingresso_atendido['tempo_espera'] = tempo_espera
-        estado['atendidos'].append(ingresso_atendido)
-
-        print(f"--- ATENDIDO: Ingresso {ingresso_atendido['id']} ---")
-        print(f"Nome: {ingresso_atendido['nome']}")
-        print(f"Categoria: {ingresso_atendido['categoria']}")
-        print(f"Tempo de Espera: {tempo_espera} min. (Chegada: {ingresso_atendido['chegada_logica']} | Atendimento: {estado['relogio_logico']})")
-        return estado
-    
     print("Fila vazia. Nenhum visitante para atender.")
     return estado
 
@@ -99,31 +632,15 @@ def espiar(estado):
     Mostra quem é o próximo sem retirar da fila.
     """
     fila_a_espiar = _proximo_a_entrar(estado)
-    
+
     if fila_a_espiar:
-        proximo = fila_a_espiar[0]
-        print(f"PRÓXIMO: Ingresso {proximo['id']} ({proximo['nome']} - {proximo['categoria']})")
+        # Só pula as lápides: ESPIAR não entra no histórico, então não mexe no deque
+        proximo = estado['ingressos'].ingresso(next(_iterar_fila(estado, fila_a_espiar)))
+        print(f"PRÓXIMO: Ingresso {proximo.id} ({proximo.nome} - {proximo.categoria})")
     else:
         print("Fila vazia.")
-        
-    return estado
 
-def _remover_por_id(fila, id_cancelar):
-    """Função auxiliar para remover um ingresso por ID de um deque."""
-    lista_temporaria = []
-    encontrado = None
-    
-    # Move os itens para uma lista temporária, procurando o ID
-    while fila:
-        item = fila.popleft()
-        if item['id'] == id_cancelar:
-            encontrado = item
-        else:
-            lista_temporaria.append(item)
-            
-    # Devolve os itens não cancelados para o deque
-    fila.extend(lista_temporaria)
-    return encontrado
+    return estado
 
 def cancelar(estado, id_cancelar):
     """
@@ -137,51 +654,348 @@ def cancelar(estado, id_cancelar):
         print(f"ERRO: ID '{id_cancelar}' inválido. Use um número inteiro (ex: CANCELAR 3).")
         return estado
 
-    if estado['modo_atendimento'] == 'PADRAO':
-        cancelado = _remover_por_id(estado['fila_padrao'], id_cancelar)
-    else:
-        # Tenta em todas as filas de prioridade
-        cancelado = _remover_por_id(estado['fila_vip'], id_cancelar)
-        if not cancelado:
-            cancelado = _remover_por_id(estado['fila_inteira'], id_cancelar)
-        if not cancelado:
-            cancelado = _remover_por_id(estado['fila_meia'], id_cancelar)
-
-    if cancelado:
-        print(f"CANCELADO: Ingresso {id_cancelar} ({cancelado['nome']} - {cancelado['categoria']}) removido da fila.")
+    cancelado, compactados = _remover_por_id(estado, id_cancelar)
+
+    if cancelado is not None:
+        pilha.registrar(estado, _restaurar_cancelado, (cancelado, compactados), _remover_por_id, (id_cancelar,))
+        cancelado = estado['ingressos'].ingresso(cancelado)
+        print(f"CANCELADO: Ingresso {id_cancelar} ({cancelado.nome} - {cancelado.categoria}) removido da fila.")
     else:
         print(f"ERRO: Ingresso {id_cancelar} não encontrado ou já foi atendido.")
 
     return estado
 
-def listar(estado):
+# --- LISTAR paginado ---
+
+LIMITE_PAGINA = 20
+
+
+def _filas_listagem(estado, categoria=None):
+    """Filas percorridas pelo LISTAR, na ordem de exibição do modo atual."""
+    if estado['modo_atendimento'] == 'PADRAO':
+        return ['fila_padrao']
+    ordem = estado['escalonador']['ordem'] if categoria is None else [categoria]
+    return [escalonador.nome_fila(cat) for cat in ordem]
+
+
+def paginar(estado, categoria=None, retomada=None):
     """
-    LISTAR
+    Gera (nome_fila, posição no deque, id) dos pendentes na ordem do
+    LISTAR, começando em `retomada` = (nome_fila, posição) se informada.
+    Preguiçoso: quem consome só uma página só percorre uma página (mais o
+    salto até a posição, feito em C pelo islice).
+    """
+    nomes = _filas_listagem(estado, categoria)
+    primeira, posicao_inicial = 0, 0
+    if retomada is not None:
+        primeira, posicao_inicial = nomes.index(retomada[0]), retomada[1]
+    cancelados = estado['cancelados']
+    codigos = estado['ingressos'].codigos
+    # No MODO PADRAO as categorias dividem a mesma fila: filtra item a item
+    filtrar = categoria is not None and estado['modo_atendimento'] == 'PADRAO'
+    codigo = ingressos.codigo_categoria(categoria) if filtrar else None
+    for nome_fila in nomes[primeira:]:
+        fila = estado['filas'][nome_fila]
+        for posicao, item in enumerate(islice(fila, posicao_inicial, None), posicao_inicial):
+            if item in cancelados or (filtrar and codigos[item] != codigo):
+                continue
+            yield nome_fila, posicao, item
+        posicao_inicial = 0
+
+
+def _pular(estado, categoria, inicio):
+    """
+    Posição (nome_fila, posição no deque) do item número `inicio` (a partir
+    de 0) da listagem. Filas inteiras são puladas pela contagem de pendentes;
+    dentro de uma fila sem lápides o salto é direto.
+    """
+    filtrar = categoria is not None and estado['modo_atendimento'] == 'PADRAO'
+    for nome_fila in _filas_listagem(estado, categoria):
+        fila = estado['filas'][nome_fila]
+        pendentes = estado['pendentes'][nome_fila]
+        if not filtrar:
+            if inicio >= pendentes:
+                inicio -= pendentes
+                continue
+            if len(fila) == pendentes:
+                return nome_fila, inicio
+        for _, posicao, _ in paginar(estado, categoria, (nome_fila, 0)):
+            if inicio == 0:
+                return nome_fila, posicao
+            inicio -= 1
+        if filtrar:
+            return None
+    return None
+
+
+def _codificar_cursor(estado, categoria, limite, nome_fila, posicao, ingresso, numero):
+    texto = "|".join((estado['modo_atendimento'], categoria or "*", str(limite), nome_fila,
+                      str(posicao), str(ingresso.id), ingresso.categoria, str(numero)))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip("=")
+
+
+def _decodificar_cursor(cursor):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        modo, categoria, limite, nome_fila, posicao, id_ancora, categoria_ancora, numero = texto.split("|")
+        return (modo, None if categoria == "*" else categoria, int(limite), nome_fila,
+                int(posicao), int(id_ancora), categoria_ancora, int(numero))
+    except ValueError:
+        return None
+
+
+def _chave_listagem(estado, id_ingresso, categoria):
+    """
+    Ordem dos ingressos dentro de um deque: por id, exceto no MODO PADRAO,
+    em que os que já existiam na última troca de modo (id < limite) vêm
+    antes, agrupados pela ordem das categorias (ver posicoes.py).
+    """
+    ordem = estado['escalonador']['ordem']
+    if estado['modo_atendimento'] == 'PADRAO' and id_ingresso < estado['posicoes'].limite:
+        return ordem.index(categoria), id_ingresso
+    return len(ordem), id_ingresso
+
+
+def _retomar(estado, nome_fila, posicao, id_ancora, categoria_ancora):
+    """
+    Posição logo após o último item mostrado (a âncora do cursor). Se a
+    âncora não está mais na posição guardada (a fila andou, ou ela foi
+    atendida, ou cancelada e já retirada do deque), a listagem segue do
+    primeiro item que vem depois dela na ordem do deque, achado por busca
+    binária.
+    """
+    fila = estado['filas'][nome_fila]
+    if posicao < len(fila) and fila[posicao] == id_ancora:
+        return posicao + 1
+    tabela = estado['ingressos']
+    return bisect_right(fila, _chave_listagem(estado, id_ancora, categoria_ancora),
+                        key=lambda item: _chave_listagem(estado, item, tabela.categoria(item)))
+
+
+def _opcoes_listar(estado, opcoes):
+    """Interpreta LIMITE=, INICIO=, CATEGORIA= e CURSOR=. Retorna dict ou None (erro já exibido)."""
+    valores = {}
+    for opcao in opcoes:
+        chave, separador, valor = opcao.partition("=")
+        chave = chave.upper()
+        if not separador or chave not in ("LIMITE", "INICIO", "CATEGORIA", "CURSOR") or not valor:
+            print(f"ERRO LISTAR: Opção '{opcao}' inválida. Use LIMITE=n, INICIO=n, CATEGORIA=c ou CURSOR=x.")
+            return None
+        valores[chave] = valor
+
+    resultado = {'limite': LIMITE_PAGINA, 'inicio': 0, 'categoria': None, 'cursor': None}
+    for chave in ("LIMITE", "INICIO"):
+        if chave in valores:
+            try:
+                numero = int(valores[chave])
+            except ValueError:
+                numero = -1
+            if numero < (1 if chave == "LIMITE" else 0):
+                print(f"ERRO LISTAR: {chave} deve ser um número inteiro "
+                      f"{'positivo' if chave == 'LIMITE' else 'não negativo'}.")
+                return None
+            resultado[chave.lower()] = numero
+    if "CATEGORIA" in valores:
+        categoria = valores["CATEGORIA"].upper()
+        if categoria not in estado['escalonador']['categorias']:
+            print(f"ERRO LISTAR: Categoria '{categoria}' inválida.")
+            return None
+        resultado['categoria'] = categoria
+    if "CURSOR" in valores:
+        cursor = _decodificar_cursor(valores["CURSOR"])
+        if (cursor is None or cursor[3] not in estado['filas']
+                or cursor[6] not in estado['escalonador']['categorias']):
+            print("ERRO LISTAR: Cursor inválido.")
+            return None
+        if cursor[0] != estado['modo_atendimento']:
+            print("ERRO LISTAR: Cursor expirado (o modo de atendimento mudou).")
+            return None
+        if "INICIO" in valores or "CATEGORIA" in valores:
+            print("ERRO LISTAR: CURSOR não pode ser combinado com INICIO ou CATEGORIA.")
+            return None
+        resultado['cursor'] = cursor
+        if "LIMITE" not in valores:
+            resultado['limite'] = cursor[2]
+    return resultado
+
+
+def listar(estado, *opcoes):
+    """
+    LISTAR [LIMITE=n] [INICIO=n] [CATEGORIA=c] [CURSOR=x]
     Lista os pendentes na ordem de atendimento.
+    Sem opções lista tudo; com opções mostra uma página de até LIMITE
+    ingressos (padrão 20) e o CURSOR da página seguinte.
     """
+    if opcoes:
+        return _listar_pagina(estado, opcoes)
+
     print(f"\n--- FILA DE ATENDIMENTO ({estado['modo_atendimento']}) ---")
-    
-    def _mostrar_fila(nome_fila, fila):
-        if fila:
-            print(f"  > {nome_fila} ({len(fila)} pendentes):")
-            for i, ing in enumerate(fila, 1):
-                print(f"    {i}. ID {ing['id']} ({ing['nome']} - {ing['categoria']})")
+
+    tabela = estado['ingressos']
+
+    def _mostrar_fila(nome_fila, chave):
+        quantidade = estado['pendentes'][chave]
+        if quantidade:
+            print(f"  > {nome_fila} ({quantidade} pendentes):")
+            for i, id_ingresso in enumerate(_iterar_fila(estado, estado['filas'][chave]), 1):
+                print(f"    {i}. ID {id_ingresso} ({tabela.nomes[id_ingresso]} - {tabela.categoria(id_ingresso)})")
         else:
             print(f"  > {nome_fila}: Vazia.")
 
     if estado['modo_atendimento'] == 'PADRAO':
-        _mostrar_fila("FILA PADRÃO", estado['fila_padrao'])
+        _mostrar_fila("FILA PADRÃO", 'fila_padrao')
+    else:
+        for categoria in estado['escalonador']['ordem']:
+            _mostrar_fila(categoria, escalonador.nome_fila(categoria))
+
+    print("-------------------------------------------------")
+    return estado
+
+
+def _listar_pagina(estado, opcoes):
+    parametros = _opcoes_listar(estado, opcoes)
+    if parametros is None:
+        return estado
+    limite, categoria = parametros['limite'], parametros['categoria']
+
+    if parametros['cursor'] is not None:
+        _, categoria, _, nome_fila, posicao, id_ancora, categoria_ancora, numero = parametros['cursor']
+        retomada = (nome_fila, _retomar(estado, nome_fila, posicao, id_ancora, categoria_ancora))
     else:
-        _mostrar_fila("VIP", estado['fila_vip'])
-        _mostrar_fila("INTEIRA", estado['fila_inteira'])
-        _mostrar_fila("MEIA", estado['fila_meia'])
+        numero = parametros['inicio']
+        retomada = _pular(estado, categoria, numero)
 
+    filtro = f", {categoria}" if categoria else ""
+    print(f"\n--- FILA DE ATENDIMENTO ({estado['modo_atendimento']}{filtro}) ---")
+    ultimo = None
+    fila_atual = None
+    if retomada is not None:
+        for nome_fila, posicao, id_ingresso in islice(paginar(estado, categoria, retomada), limite):
+            ingresso = estado['ingressos'].ingresso(id_ingresso)
+            if nome_fila != fila_atual:
+                fila_atual = nome_fila
+                titulo = "FILA PADRÃO" if nome_fila == 'fila_padrao' else ingresso.categoria
+                print(f"  > {titulo}:")
+            numero += 1
+            print(f"    {numero}. ID {ingresso.id} ({ingresso.nome} - {ingresso.categoria})")
+            ultimo = (nome_fila, posicao, ingresso)
+
+    if ultimo is None:
+        print("  (nenhum ingresso nesta página)")
     print("-------------------------------------------------")
+    if ultimo is not None:
+        # Só oferece a próxima página se ainda houver alguém depois do último
+        seguinte = next(paginar(estado, categoria, (ultimo[0], ultimo[1] + 1)), None)
+        if seguinte is not None:
+            cursor = _codificar_cursor(estado, categoria, limite, *ultimo, numero)
+            print(f"Próxima página: LISTAR CURSOR={cursor}")
+        else:
+            print("Fim da fila.")
     return estado
 
-def estatisticas(estado):
+def buscar(estado, prefixo):
+    """
+    BUSCAR <prefixo>
+    Lista os ingressos (pendentes e atendidos) cujo nome começa com o prefixo,
+    sem diferenciar maiúsculas e minúsculas. Mostra até LIMITE_PAGINA.
+    """
+    indice = estado['indice_nomes']
+    total = indice.contar(prefixo)
+    if not total:
+        print(f"Nenhum ingresso com nome começando por '{prefixo}'.")
+        return estado
+
+    print(f"\n--- BUSCA '{prefixo}' ({total} encontrado(s)) ---")
+    for id_ingresso in islice(indice.buscar(prefixo), LIMITE_PAGINA):
+        ingresso = estado['ingressos'].ingresso(id_ingresso)
+        if pendente(estado, id_ingresso):
+            situacao = "pendente"
+        else:
+            situacao = f"atendido (espera {ingresso.tempo_espera} min)"
+        print(f"  ID {ingresso.id} ({ingresso.nome} - {ingresso.categoria}) {situacao}")
+    if total > LIMITE_PAGINA:
+        print(f"  ... e mais {total - LIMITE_PAGINA}; use um prefixo mais longo.")
+    print("-------------------------------------------------")
+    return estado
+
+def posicao(estado, id_ingresso):
+    """
+    POSICAO <id>
+    Mostra em que lugar da ordem de atendimento atual está um ingresso
+    pendente (em O(log n), ver posicoes.py).
+    """
+    try:
+        id_ingresso = int(id_ingresso)
+    except ValueError:
+        print(f"ERRO POSICAO: ID '{id_ingresso}' inválido. Use um número inteiro (ex: POSICAO 3).")
+        return estado
+
+    if not pendente(estado, id_ingresso):
+        print(f"ERRO POSICAO: Ingresso {id_ingresso} não está na fila (atendido, cancelado ou inexistente).")
+        return estado
+
+    ingresso = estado['ingressos'].ingresso(id_ingresso)
+    lugar = estado['posicoes'].posicao(estado, id_ingresso)
+    print(f"POSICAO: Ingresso {ingresso.id} ({ingresso.nome} - {ingresso.categoria}) é o {lugar}º "
+          f"da fila ({lugar - 1} na frente).")
+    return estado
+
+def estatisticas(estado, *opcoes):
+    """
+    ESTATISTICAS [QUANTIS] [JANELA=n]
+    QUANTIS acrescenta p50/p95/p99 da espera por categoria; JANELA=n, os
+    atendimentos dos últimos n minutos do relógio lógico.
+    """
+    quantis_pedidos = False
+    janela = None
+    for opcao in opcoes:
+        chave, separador, valor = opcao.partition("=")
+        chave = chave.upper()
+        if chave == "QUANTIS" and not separador:
+            quantis_pedidos = True
+        elif chave == "JANELA" and separador and valor.isdigit() and int(valor) > 0:
+            janela = int(valor)
+        else:
+            print(f"ERRO ESTATISTICAS: Opção '{opcao}' inválida. Use QUANTIS ou JANELA=n (minutos).")
+            return estado
+
     estat = ingressos.atualizar_estatisticas(estado)
     ingressos.exibir_estatisticas(estat, estado["relogio_logico"])
+    if quantis_pedidos:
+        ingressos.exibir_quantis(estat)
+    if janela is not None:
+        ingressos.exibir_janela(estat, estado["relogio_logico"], janela)
+    return estado
+
+def rever(estado, minuto):
+    """
+    REVER <t>
+    Mostra a fila e as estatísticas como estavam no minuto t do relógio
+    lógico (a última vez que ele marcou t), sem alterar o estado atual.
+    """
+    try:
+        minuto = int(minuto)
+    except ValueError:
+        print(f"ERRO REVER: Minuto '{minuto}' inválido. Use um número inteiro (ex: REVER 3).")
+        return estado
+    if not 0 <= minuto <= estado['relogio_logico']:
+        print(f"ERRO REVER: O relógio está no minuto {estado['relogio_logico']}; "
+              f"use um minuto entre 0 e ele.")
+        return estado
+
+    linha = estado['linha_tempo']
+    reconstruido = linha.reconstruir(minuto) if linha is not None else None
+    if reconstruido is None:
+        mais_antigo = linha.relogio_mais_antigo() if linha is not None else None
+        if mais_antigo is not None and minuto < mais_antigo:
+            print(f"ERRO REVER: Minuto {minuto} já saiu da linha do tempo (mais antigo: {mais_antigo}).")
+        else:
+            print(f"ERRO REVER: O relógio não passou pelo minuto {minuto} nesta linha do tempo.")
+        return estado
+
+    print(f"\n=== FILA NO MINUTO {minuto} ===")
+    listar(reconstruido)
+    estatisticas(reconstruido)
     return estado
 
 def modo(estado, novo_modo):
@@ -190,42 +1004,36 @@ def modo(estado, novo_modo):
     Alterna o tipo de atendimento.
     """
     novo_modo = novo_modo.upper()
-    
+
     if novo_modo not in ['PADRAO', 'PRIORIDADE']:
         print(f"ERRO: Modo '{novo_modo}' inválido. Use PADRAO ou PRIORIDADE.")
         return estado
-        
+
     if novo_modo == estado['modo_atendimento']:
         print(f"O modo de atendimento já é '{novo_modo}'.")
         return estado
 
-    # Lógica de Transição (movimentação dos ingressos)
-    if novo_modo == 'PADRAO':
-        # Transfere tudo para a fila_padrao, mantendo a ordem (VIP > INTEIRA > MEIA > PADRAO)
-        # Se for PADRAO -> PRIORIDADE, a fila_padrao já estará vazia, mas por segurança.
-        ingressos_a_mover = []
-        ingressos_a_mover.extend(list(estado['fila_vip']))
-        ingressos_a_mover.extend(list(estado['fila_inteira']))
-        ingressos_a_mover.extend(list(estado['fila_meia']))
-        ingressos_a_mover.extend(list(estado['fila_padrao'])) # Pega o que estava lá
-
-        estado['fila_padrao'] = deque(ingressos_a_mover)
-        estado['fila_vip'].clear()
-        estado['fila_inteira'].clear()
-        estado['fila_meia'].clear()
-        
-    elif novo_modo == 'PRIORIDADE':
-        # Transfere da fila_padrao para as filas de prioridade
-        while estado['fila_padrao']:
-            ingresso = estado['fila_padrao'].popleft()
-            cat = ingresso['categoria']
-            if cat == 'VIP':
-                estado['fila_vip'].append(ingresso)
-            elif cat == 'INTEIRA':
-                estado['fila_inteira'].append(ingresso)
-            elif cat == 'MEIA':
-                estado['fila_meia'].append(ingresso)
-
-    estado['modo_atendimento'] = novo_modo
+    anterior = _transicao_modo(estado, novo_modo)
+    pilha.registrar(estado, _restaurar_modo, (anterior,), _transicao_modo, (novo_modo,))
     print(f"Modo de atendimento alterado para: {novo_modo}")
-    return estado
\ No newline at end of file
+    return estado
+
+def politica(estado, nova_politica):
+    """
+    POLITICA ESTRITA|PONDERADA|ENVELHECIMENTO
+    Escolhe como o MODO PRIORIDADE alterna entre as categorias.
+    """
+    nova_politica = nova_politica.upper()
+
+    if nova_politica not in escalonador.POLITICAS:
+        print(f"ERRO: Política '{nova_politica}' inválida. Use {', '.join(escalonador.POLITICAS)}.")
+        return estado
+
+    if nova_politica == estado['escalonador']['politica']:
+        print(f"A política de prioridade já é '{nova_politica}'.")
+        return estado
+
+    anterior = escalonador.definir_politica(estado, nova_politica)
+    pilha.registrar(estado, escalonador.restaurar_politica, (anterior,), escalonador.definir_politica, (nova_politica,))
+    print(f"Política de prioridade alterada para: {nova_politica}")
+    return estado
@@ -0,0 +1,446 @@
+# fragmentos.py
+# Bilheteria dividida em fragmentos (shards), cada um em um processo
+# (multiprocessing), para espalhar o trabalho da fila por vários núcleos.
+#
+# Cada fragmento é uma bilheteria completa e independente: tem o seu próprio
+# estado de fila.criar_estado() (tabela de ingressos, filas fila_*, lápides,
+# atendidos, estatísticas e relógio) e numera as próprias compras a partir de
+# 1 (id local, sem buracos na tabela dele). O id que o coordenador devolve é
+# (local - 1) * quantidade + fragmento + 1, então o fragmento dono de um id é
+# (id - 1) % quantidade e o local, (id - 1) // quantidade + 1.
+# COMPRAR, ENTRAR, CANCELAR, MODO e POLITICA são resolvidos inteiros dentro
+# do fragmento, pela política de fila.py. O coordenador (no processo principal) não guarda nada por
+# ingresso: só escolhe o fragmento de cada operação e a junta no lote dele,
+# enviado sem esperar resposta. O trabalho dele por operação é pequeno e
+# O(quantidade de fragmentos), então a vazão total cresce com os núcleos.
+#
+# A ordem de atendimento é a de fila.py dentro de cada fragmento, não entre
+# eles (como filas separadas na entrada do festival), e cada fragmento
+# conta a espera no seu próprio relógio. Uma catraca (ENTRAR com catraca)
+# atende sempre o mesmo fragmento; sem catraca, o ENTRAR vai para o
+# fragmento com mais pendentes e a compra para o com menos, para as filas
+# andarem juntas. Os pendentes de cada fragmento são estimados pelo
+# coordenador e corrigidos a cada INTERVALO_RESUMO operações, quando ele pede
+# a todos um resumo (pendentes e estatísticas) e soma as estatísticas. Entre
+# dois resumos a estimativa não desconta os cancelamentos, então um ENTRAR
+# pode cair num fragmento que já esvaziou.
+#
+# As operações dos fragmentos não entram no histórico de DESFAZER.
+#
+# Uso:
+#   python fragmentos.py [--fragmentos 1,2,4] [--operacoes 300000]
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+import escalonador
+import fila
+import ingressos
+
+TAMANHO_LOTE = 512
+INTERVALO_RESUMO = 50_000
+
+# Operações enviadas em lote (sem resposta)
+_COMPRAR = 0
+_ENTRAR = 1
+_CANCELAR = 2
+_MODO = 3
+_POLITICA = 4
+
+
+# --- LADO DO FRAGMENTO (processo trabalhador) ---
+
+def _criar_fragmento(categorias=None, politica='ESTRITA'):
+    """Estado de fila.py de um fragmento (com ids locais, a partir de 1)."""
+    estado = fila.criar_estado(categorias, politica)
+    estado['linha_tempo'] = None
+    return estado
+
+
+def _id_global(fragmento, id_local, quantidade):
+    return (id_local - 1) * quantidade + fragmento + 1
+
+
+def _aplicar(estado, operacao):
+    verbo = operacao[0]
+    if verbo == _COMPRAR:
+        _, nome, categoria = operacao
+        fila._enfileirar(estado, ingressos.Ingresso(
+            estado['proximo_id'], nome, categoria, estado['relogio_logico']))
+    elif verbo == _ENTRAR:
+        fila._atender(estado)
+    elif verbo == _CANCELAR:
+        fila._remover_por_id(estado, operacao[1])
+    elif verbo == _MODO:
+        fila._transicao_modo(estado, operacao[1])
+    else:
+        escalonador.definir_politica(estado, operacao[1])
+
+
+def _responder(estado, pedido):
+    tipo = pedido[0]
+    if tipo == 'resumo':
+        return sum(estado['pendentes'].values()), ingressos.atualizar_estatisticas(estado)
+    if tipo == 'estado':
+        return estado
+    if tipo == 'sincronizar':
+        return None
+    raise ValueError(f"Pedido desconhecido: {tipo}")
+
+
+def _trabalhador(conexao, categorias, politica):
+    """
+    Laço do fragmento. Cada mensagem é (operações, pedido): aplica as
+    operações em ordem e, se houver pedido, responde a ele. None encerra.
+    """
+    estado = _criar_fragmento(categorias, politica)
+    while True:
+        mensagem = conexao.recv()
+        if mensagem is None:
+            break
+        operacoes, pedido = mensagem
+        for operacao in operacoes:
+            _aplicar(estado, operacao)
+        if pedido is not None:
+            conexao.send(_responder(estado, pedido))
+    conexao.close()
+
+
+# --- COORDENADOR ---
+
+class Coordenador:
+    """
+    Bilheteria com `quantidade` fragmentos. Mesmos comandos da fila, mas
+    sem exibir nada e sem esperar os fragmentos: os métodos retornam só o
+    que o coordenador sabe na hora.
+    Com `diario` (uma lista), cada operação enviada é anotada nele como
+    (fragmento, operação), para conferência.
+    Use como gerenciador de contexto (ou chame fechar()) para encerrar os processos.
+    """
+
+    def __init__(self, quantidade=None, categorias=None, politica='ESTRITA', diario=None):
+        if quantidade is None:
+            quantidade = os.cpu_count() or 1
+        if quantidade < 1:
+            raise ValueError("É preciso ao menos um fragmento.")
+        if categorias is None:
+            categorias = escalonador.CATEGORIAS
+        self.quantidade = quantidade
+        self.categorias = {categoria.upper() for categoria in categorias}
+        self.modo_atendimento = 'PADRAO'
+        self.politica_atual = politica
+        self.diario = diario
+        # Próximo id local de cada fragmento (o fragmento numera igual)
+        self.proximos = [1] * quantidade
+        # Pendentes estimados de cada fragmento (exatos logo após um resumo)
+        self.pendentes = [0] * quantidade
+        self.desde_resumo = 0
+        self.lotes = [[] for _ in range(quantidade)]
+
+        contexto = multiprocessing.get_context()
+        self.conexoes = []
+        self.processos = []
+        for fragmento in range(quantidade):
+            nossa, deles = contexto.Pipe()
+            processo = contexto.Process(target=_trabalhador, daemon=True,
+                                        args=(deles, categorias, politica))
+            processo.start()
+            deles.close()
+            self.conexoes.append(nossa)
+            self.processos.append(processo)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        for conexao in self.conexoes:
+            try:
+                conexao.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for processo in self.processos:
+            processo.join()
+        for conexao in self.conexoes:
+            conexao.close()
+        self.conexoes = []
+
+    # --- comunicação com os fragmentos ---
+
+    def _enviar(self, fragmento, operacao):
+        if self.diario is not None:
+            self.diario.append((fragmento, operacao))
+        lote = self.lotes[fragmento]
+        lote.append(operacao)
+        if len(lote) >= TAMANHO_LOTE:
+            self.conexoes[fragmento].send((lote, None))
+            self.lotes[fragmento] = []
+        self.desde_resumo += 1
+        if self.desde_resumo >= INTERVALO_RESUMO:
+            self.resumir()
+
+    def _pedir_todos(self, pedido):
+        """
+        Envia o pedido a todos os fragmentos (junto com o lote pendente de
+        cada um) e espera as respostas, na ordem dos fragmentos. Os
+        fragmentos trabalham em paralelo.
+        """
+        for fragmento, conexao in enumerate(self.conexoes):
+            conexao.send((self.lotes[fragmento], pedido))
+            self.lotes[fragmento] = []
+        return [conexao.recv() for conexao in self.conexoes]
+
+    # --- comandos ---
+
+    def comprar(self, nome, categoria, bilheteria=None):
+        """
+        COMPRAR na bilheteria dada (a do fragmento bilheteria % quantidade)
+        ou no fragmento com menos pendentes. Retorna o id do ingresso, ou
+        None se a categoria não existir.
+        """
+        categoria = categoria.upper()
+        if categoria not in self.categorias:
+            return None
+        if bilheteria is None:
+            fragmento = self.pendentes.index(min(self.pendentes))
+        else:
+            fragmento = bilheteria % self.quantidade
+        id_local = self.proximos[fragmento]
+        self.proximos[fragmento] += 1
+        self.pendentes[fragmento] += 1
+        self._enviar(fragmento, (_COMPRAR, nome, categoria))
+        return _id_global(fragmento, id_local, self.quantidade)
+
+    def entrar(self, catraca=None):
+        """
+        ENTRAR na catraca dada (a do fragmento catraca % quantidade) ou no
+        fragmento com mais pendentes. Retorna o fragmento, ou None se pela
+        estimativa não há ninguém para atender.
+        """
+        if catraca is None:
+            maior = max(self.pendentes)
+            if not maior:
+                return None
+            fragmento = self.pendentes.index(maior)
+        else:
+            fragmento = catraca % self.quantidade
+        if self.pendentes[fragmento]:
+            self.pendentes[fragmento] -= 1
+        self._enviar(fragmento, (_ENTRAR,))
+        return fragmento
+
+    def cancelar(self, id_cancelar):
+        """CANCELAR no fragmento dono do id. Retorna o fragmento, ou None se o id não foi vendido."""
+        if id_cancelar < 1:
+            return None
+        fragmento = (id_cancelar - 1) % self.quantidade
+        id_local = (id_cancelar - 1) // self.quantidade + 1
+        if id_local >= self.proximos[fragmento]:
+            return None
+        self._enviar(fragmento, (_CANCELAR, id_local))
+        return fragmento
+
+    def modo(self, novo_modo):
+        """MODO em todos os fragmentos. Retorna False se o modo for inválido ou já for o atual."""
+        novo_modo = novo_modo.upper()
+        if novo_modo not in ('PADRAO', 'PRIORIDADE') or novo_modo == self.modo_atendimento:
+            return False
+        self.modo_atendimento = novo_modo
+        for fragmento in range(self.quantidade):
+            self._enviar(fragmento, (_MODO, novo_modo))
+        return True
+
+    def politica(self, nova_politica):
+        """POLITICA em todos os fragmentos. Retorna False se a política for inválida ou já for a atual."""
+        nova_politica = nova_politica.upper()
+        if nova_politica not in escalonador.POLITICAS or nova_politica == self.politica_atual:
+            return False
+        self.politica_atual = nova_politica
+        for fragmento in range(self.quantidade):
+            self._enviar(fragmento, (_POLITICA, nova_politica))
+        return True
+
+    def resumir(self):
+        """
+        Pede o resumo de todos os fragmentos, corrige os pendentes estimados
+        e retorna as estatísticas somadas (ingressos.combinar_estatisticas).
+        """
+        self.desde_resumo = 0
+        resumos = self._pedir_todos(('resumo',))
+        self.pendentes = [pendentes for pendentes, _ in resumos]
+        return ingressos.combinar_estatisticas([estat for _, estat in resumos])
+
+    def estatisticas(self):
+        """Estatísticas somadas de todos os fragmentos (ingressos.atualizar_estatisticas)."""
+        return self.resumir()
+
+    def estados(self):
+        """Cópia do estado de cada fragmento (para conferência)."""
+        return self._pedir_todos(('estado',))
+
+    def sincronizar(self):
+        """Espera os fragmentos aplicarem tudo o que já foi enviado."""
+        self._pedir_todos(('sincronizar',))
+
+
+# --- CONFERÊNCIA E TESTE DE VAZÃO ---
+
+def _operacoes(quantidade, semente, com_modos=False):
+    sorteio = random.Random(semente)
+    categorias = list(escalonador.CATEGORIAS)
+    comprados = 0
+    operacoes = []
+    for i in range(quantidade):
+        x = sorteio.random()
+        if x < 0.55:
+            comprados += 1
+            operacoes.append(('COMPRAR', f"Visitante{i}", sorteio.choice(categorias)))
+        elif x < 0.92:
+            operacoes.append(('ENTRAR',))
+        elif x < 0.99 or not com_modos:
+            operacoes.append(('CANCELAR', sorteio.randint(1, comprados + 1)))
+        elif x < 0.995:
+            operacoes.append(('MODO', sorteio.choice(('PADRAO', 'PRIORIDADE'))))
+        else:
+            operacoes.append(('POLITICA', sorteio.choice(escalonador.POLITICAS)))
+    return operacoes
+
+
+def _executar_unico(estado, operacoes):
+    """Referência: as mesmas operações sobre um estado único de fila.py."""
+    for operacao in operacoes:
+        verbo = operacao[0]
+        if verbo == 'COMPRAR':
+            fila._enfileirar(estado, ingressos.Ingresso(
+                estado['proximo_id'], operacao[1], operacao[2], estado['relogio_logico']))
+        elif verbo == 'ENTRAR':
+            fila._atender(estado)
+        elif verbo == 'CANCELAR':
+            fila._remover_por_id(estado, operacao[1])
+        elif verbo == 'MODO':
+            if operacao[1] != estado['modo_atendimento']:
+                fila._transicao_modo(estado, operacao[1])
+        elif operacao[1] != estado['escalonador']['politica']:
+            escalonador.definir_politica(estado, operacao[1])
+
+
+def _executar_fragmentado(coordenador, operacoes):
+    for operacao in operacoes:
+        verbo = operacao[0]
+        if verbo == 'COMPRAR':
+            coordenador.comprar(operacao[1], operacao[2])
+        elif verbo == 'ENTRAR':
+            coordenador.entrar()
+        elif verbo == 'CANCELAR':
+            coordenador.cancelar(operacao[1])
+        elif verbo == 'MODO':
+            coordenador.modo(operacao[1])
+        else:
+            coordenador.politica(operacao[1])
+
+
+def _foto_fragmento(estado):
+    """Ordem de atendimento (id local, espera), pendentes e próximo id de um fragmento."""
+    esperas = estado['ingressos'].esperas
+    atendidos = [(id_ingresso, esperas[id_ingresso]) for id_ingresso in estado['atendidos']]
+    return atendidos, fila.ids_pendentes(estado), estado['proximo_id']
+
+
+def conferir(quantidade=3, operacoes=20_000, semente=1):
+    """
+    Roda operações (com trocas de MODO e POLITICA) nos fragmentos e confere
+    cada um com um estado de fila.py que recebe as mesmas operações, que
+    cada id foi vendido, atendido e cancelado no máximo uma vez, e a soma
+    das estatísticas. Retorna a lista de divergências.
+    """
+    sequencia = _operacoes(operacoes, semente, com_modos=True)
+    diario = []
+    with Coordenador(quantidade, diario=diario) as coordenador:
+        _executar_fragmentado(coordenador, sequencia)
+        estat = coordenador.estatisticas()
+        estados = coordenador.estados()
+
+    problemas = []
+    referencias = [_criar_fragmento() for _ in range(quantidade)]
+    for fragmento, operacao in diario:
+        _aplicar(referencias[fragmento], operacao)
+    vistos = set()
+    for fragmento, (estado, referencia) in enumerate(zip(estados, referencias)):
+        if _foto_fragmento(estado) != _foto_fragmento(referencia):
+            problemas.append(f"fragmento {fragmento} diferente do estado único com as mesmas operações")
+        locais = list(estado['atendidos']) + fila.ids_pendentes(estado)
+        if any(not 0 < id_local < estado['proximo_id'] for id_local in locais):
+            problemas.append(f"fragmento {fragmento} com ingresso que ele não vendeu")
+        ids = [_id_global(fragmento, id_local, quantidade) for id_local in locais]
+        if vistos.intersection(ids) or len(set(ids)) != len(ids):
+            problemas.append(f"fragmento {fragmento} com ingresso repetido")
+        vistos.update(ids)
+
+    parciais = [ingressos.recalcular_estatisticas(estado) for estado in estados]
+    estat_referencia = ingressos.combinar_estatisticas(parciais)
+    for chave in ("total_pendente", "total_atendido", "tempo_total_espera",
+                  "pendente_por_categoria", "atendido_por_categoria"):
+        if estat[chave] != estat_referencia[chave]:
+            problemas.append(f"estatística '{chave}' divergente")
+    return problemas
+
+
+def medir_vazao(fragmentos=(1, 2, 4), operacoes=300_000, semente=1):
+    """
+    Operações/s do estado único e de cada quantidade de fragmentos (MODO
+    PRIORIDADE, política ENVELHECIMENTO). Para os fragmentos mede também o
+    tempo de CPU do coordenador por operação, que limita a vazão quando há
+    um núcleo por fragmento. Retorna [(nome, segundos, op/s, µs de CPU do
+    coordenador por operação ou None)].
+    """
+    sequencia = _operacoes(operacoes, semente)
+    resultados = []
+
+    estado = fila.criar_estado(politica='ENVELHECIMENTO')
+    estado['linha_tempo'] = None
+    fila._transicao_modo(estado, 'PRIORIDADE')
+    inicio = time.perf_counter()
+    _executar_unico(estado, sequencia)
+    tempo = time.perf_counter() - inicio
+    resultados.append(("estado único", tempo, operacoes / tempo, None))
+
+    for quantidade in fragmentos:
+        with Coordenador(quantidade, politica='ENVELHECIMENTO') as coordenador:
+            coordenador.modo('PRIORIDADE')
+            inicio = time.perf_counter()
+            inicio_cpu = time.process_time()
+            _executar_fragmentado(coordenador, sequencia)
+            cpu = time.process_time() - inicio_cpu
+            coordenador.sincronizar()
+            tempo = time.perf_counter() - inicio
+        resultados.append((f"{quantidade} fragmento(s)", tempo, operacoes / tempo, cpu / operacoes * 1e6))
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bilheteria em fragmentos (multiprocessing)")
+    parser.add_argument("--fragmentos", default="1,2,4",
+                        help="quantidades de fragmentos a medir, separadas por vírgula")
+    parser.add_argument("--operacoes", type=int, default=300_000)
+    args = parser.parse_args(argv)
+    fragmentos = [int(valor) for valor in args.fragmentos.split(",")]
+
+    problemas = conferir()
+    print("Conferência dos fragmentos:", "OK" if not problemas else "; ".join(problemas))
+
+    print(f"\n=== VAZÃO ({args.operacoes} operações, {os.cpu_count()} núcleo(s)) ===")
+    base = None
+    for nome, tempo, vazao, coordenador in medir_vazao(fragmentos, args.operacoes):
+        base = base or vazao
+        linha = f"{nome:>16}: {tempo:.2f} s -> {vazao:,.0f} op/s ({vazao / base:.2f}x)"
+        if coordenador is not None:
+            linha += f"  coordenador: {coordenador:.2f} µs/op (teto {1e6 / coordenador:,.0f} op/s)"
+        print(linha)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# indice_nomes.py
+# Índice dos ingressos por nome (sem diferenciar maiúsculas/minúsculas),
+# para o BUSCAR <prefixo> achar visitantes sem percorrer as filas.
+#
+# Os ids ficam ordenados pela chave (nome normalizado, id) em blocos de até
+# 2 * TAMANHO_BLOCO itens, com a chave do maior de cada bloco numa lista à
+# parte. Uma lista ordenada única teria inserção O(n) (o insort desloca o
+# resto da lista); com os blocos, inserir e remover custam O(log n +
+# TAMANHO_BLOCO) e a busca por prefixo é O(log n + k) para k resultados.
+#
+# Cada bloco é um array de ids (8 bytes por ingresso): a chave não é
+# guardada, e sim calculada na comparação a partir da coluna de nomes da
+# tabela (colunas.Tabela). Guardar os nomes normalizados pouparia essas
+# chamadas, mas custaria uma string a mais por nome com maiúsculas. Um id
+# tem de sair do índice antes de a linha dele sair da tabela.
+from array import array
+from bisect import bisect_left, bisect_right
+
+TAMANHO_BLOCO = 512
+
+
+def normalizar(nome):
+    return nome.casefold()
+
+
+class IndiceNomes:
+    """Ids ordenados por (nome normalizado, id) em blocos; os nomes vêm da tabela."""
+
+    __slots__ = ("tabela", "blocos", "maximos", "tamanho")
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+        self.blocos = []
+        self.maximos = []
+        self.tamanho = 0
+
+    def __len__(self):
+        return self.tamanho
+
+    def _chave(self, id_ingresso):
+        # (o mesmo que normalizar(), sem a chamada a mais: é o laço quente dos bisects)
+        return self.tabela.nomes[id_ingresso].casefold(), id_ingresso
+
+    def _bloco(self, chave):
+        """Posição do primeiro bloco cujo maior item é >= chave (ou o último)."""
+        posicao = bisect_left(self.maximos, chave)
+        return posicao if posicao < len(self.maximos) else len(self.maximos) - 1
+
+    def adicionar(self, id_ingresso):
+        chave = self._chave(id_ingresso)
+        self.tamanho += 1
+        if not self.blocos:
+            self.blocos.append(array('q', [id_ingresso]))
+            self.maximos.append(chave)
+            return
+        posicao = self._bloco(chave)
+        bloco = self.blocos[posicao]
+        indice = bisect_left(bloco, chave, key=self._chave)
+        bloco.insert(indice, id_ingresso)
+        if indice == len(bloco) - 1:
+            self.maximos[posicao] = chave
+        if len(bloco) > 2 * TAMANHO_BLOCO:
+            self.blocos[posicao:posicao + 1] = [bloco[:TAMANHO_BLOCO], bloco[TAMANHO_BLOCO:]]
+            self.maximos[posicao:posicao + 1] = [self._chave(bloco[TAMANHO_BLOCO - 1]), self.maximos[posicao]]
+
+    def remover(self, id_ingresso):
+        """Retira o id do índice (ele precisa estar lá, e a linha dele na tabela)."""
+        chave = self._chave(id_ingresso)
+        posicao = self._bloco(chave)
+        bloco = self.blocos[posicao]
+        indice = bisect_left(bloco, chave, key=self._chave)
+        del bloco[indice]
+        self.tamanho -= 1
+        if not bloco:
+            del self.blocos[posicao]
+            del self.maximos[posicao]
+        elif indice == len(bloco):
+            self.maximos[posicao] = self._chave(bloco[-1])
+
+    def adicionar_lote(self, ids):
+        """Adiciona vários ids; lotes grandes reconstroem os blocos num sort só."""
+        if len(ids) < max(TAMANHO_BLOCO, self.tamanho // 8):
+            for id_ingresso in ids:
+                self.adicionar(id_ingresso)
+            return
+        todos = self._ids()
+        todos.extend(ids)
+        # A parte antiga já vem ordenada: o Timsort aproveita essa sequência
+        todos.sort(key=self._chave)
+        self._reconstruir(todos)
+
+    def remover_lote(self, ids):
+        """Retira vários ids (todos precisam estar no índice)."""
+        if len(ids) < max(TAMANHO_BLOCO, self.tamanho // 8):
+            for id_ingresso in ids:
+                self.remover(id_ingresso)
+            return
+        fora = set(ids)
+        self._reconstruir([id_ingresso for id_ingresso in self._ids() if id_ingresso not in fora])
+
+    def _ids(self):
+        return [id_ingresso for bloco in self.blocos for id_ingresso in bloco]
+
+    def _reconstruir(self, ids):
+        """Refaz os blocos (de TAMANHO_BLOCO itens) a partir dos ids já ordenados."""
+        self.blocos = []
+        self.maximos = []
+        for inicio in range(0, len(ids), TAMANHO_BLOCO):
+            bloco = array('q', ids[inicio:inicio + TAMANHO_BLOCO])
+            self.blocos.append(bloco)
+            self.maximos.append(self._chave(bloco[-1]))
+        self.tamanho = len(ids)
+
+    def buscar(self, prefixo):
+        """Gera, em ordem de nome e id, os ids cujo nome começa com `prefixo`."""
+        prefixo = normalizar(prefixo)
+        if not self.blocos:
+            return
+        nomes = self.tabela.nomes
+        # (prefixo,) vem antes de toda chave (nome, id) com nome >= prefixo
+        posicao = self._bloco((prefixo,))
+        indice = bisect_left(self.blocos[posicao], (prefixo,), key=self._chave)
+        # Percorre por posição: fatiar os blocos copiaria além dos k resultados
+        while posicao < len(self.blocos):
+            bloco = self.blocos[posicao]
+            while indice < len(bloco):
+                id_ingresso = bloco[indice]
+                if not normalizar(nomes[id_ingresso]).startswith(prefixo):
+                    return
+                yield id_ingresso
+                indice += 1
+            posicao += 1
+            indice = 0
+
+    def contar(self, prefixo):
+        """Quantos nomes começam com `prefixo`, sem percorrê-los um a um."""
+        prefixo = normalizar(prefixo)
+        if not self.blocos:
+            return 0
+        # Toda chave com o prefixo fica entre o prefixo e prefixo + maior caractere
+        inicio, fim = (prefixo,), (prefixo + "\U0010ffff",)
+        primeiro = self._bloco(inicio)
+        ultimo = self._bloco(fim)
+        chave = self._chave
+        if primeiro == ultimo:
+            bloco = self.blocos[primeiro]
+            return bisect_right(bloco, fim, key=chave) - bisect_left(bloco, inicio, key=chave)
+        total = len(self.blocos[primeiro]) - bisect_left(self.blocos[primeiro], inicio, key=chave)
+        total += sum(len(bloco) for bloco in self.blocos[primeiro + 1:ultimo])
+        return total + bisect_right(self.blocos[ultimo], fim, key=chave)
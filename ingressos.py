@@ -1,66 +1,234 @@
 # ingressos.py
+import sys
 from collections import deque
 
+import escalonador
+import quantis
+
 
 # MODELO E CRIAÇÃO DE INGRESSOS
 
+# Categorias viram códigos inteiros (um por nome, atribuídos na primeira vez
+# que aparecem); o ingresso (e a coluna de categorias de colunas.Tabela)
+# guarda só o código.
+_CODIGO_CATEGORIA = {}
+_NOME_CATEGORIA = []
+
+CAMPOS = ("id", "nome", "categoria", "chegada_logica", "tempo_espera")
+
+
+def codigo_categoria(categoria):
+    """Código inteiro da categoria (cria um novo se ainda não existir)."""
+    codigo = _CODIGO_CATEGORIA.get(categoria)
+    if codigo is None:
+        codigo = _CODIGO_CATEGORIA[categoria] = len(_NOME_CATEGORIA)
+        _NOME_CATEGORIA.append(sys.intern(categoria))
+    return codigo
+
+
+def nome_categoria(codigo):
+    return _NOME_CATEGORIA[codigo]
+
+
+def nomes_categorias():
+    """Nomes de todas as categorias, na ordem dos códigos."""
+    return list(_NOME_CATEGORIA)
+
+
+class Ingresso:
+    """
+    Registro de um ingresso: atributos em __slots__ (sem dicionário por
+    instância), categoria como código inteiro e nome internado (nomes
+    repetidos compartilham a mesma string). O estado da fila não guarda
+    Ingressos: os dados ficam nas colunas de colunas.Tabela, e o registro é
+    o que uma compra recebe e o que a tabela monta para exibir um id.
+    Continua aceitando o acesso de dicionário usado pelo resto do sistema:
+    ingresso["id"], ingresso["categoria"] = ..., ingresso.get("tempo_espera", 0).
+    """
+
+    __slots__ = ("id", "nome", "codigo", "chegada_logica", "tempo_espera")
+
+    def __init__(self, id, nome, categoria, chegada_logica, tempo_espera=0):
+        self.id = id
+        self.nome = sys.intern(nome)
+        self.codigo = codigo_categoria(categoria)
+        self.chegada_logica = chegada_logica
+        self.tempo_espera = tempo_espera
+
+    @property
+    def categoria(self):
+        return _NOME_CATEGORIA[self.codigo]
+
+    @categoria.setter
+    def categoria(self, categoria):
+        self.codigo = codigo_categoria(categoria)
+
+    def __getitem__(self, campo):
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        return getattr(self, campo)
+
+    def __setitem__(self, campo, valor):
+        if campo not in CAMPOS:
+            raise KeyError(campo)
+        setattr(self, campo, valor)
 
-def criar_ingresso(proximo_id, nome, categoria, tempo_chegada):
+    def __contains__(self, campo):
+        return campo in CAMPOS
+
+    def get(self, campo, padrao=None):
+        if campo not in CAMPOS:
+            return padrao
+        return getattr(self, campo)
+
+    def copy(self):
+        return Ingresso(self.id, self.nome, self.categoria, self.chegada_logica, self.tempo_espera)
+
+    def como_dict(self):
+        return {campo: getattr(self, campo) for campo in CAMPOS}
+
+    def __eq__(self, outro):
+        if isinstance(outro, Ingresso):
+            outro = outro.como_dict()
+        return self.como_dict() == outro
+
+    __hash__ = None  # mutável, como o dicionário que substitui
+
+    def __reduce__(self):
+        # Pelo nome da categoria: os códigos podem mudar entre processos
+        return Ingresso, (self.id, self.nome, self.categoria, self.chegada_logica, self.tempo_espera)
+
+    def __repr__(self):
+        return f"Ingresso({self.como_dict()!r})"
+
+
+def criar_ingresso(proximo_id, nome, categoria, tempo_chegada, categorias=None):
     """
-    Cria um dicionário representando um ingresso.
+    Cria um Ingresso.
+    As categorias válidas vêm da configuração (padrão: escalonador.CATEGORIAS).
     """
+    if categorias is None:
+        categorias = escalonador.CATEGORIAS
     categoria = categoria.upper()
-    if categoria not in ["VIP", "INTEIRA", "MEIA"]:
-        return None, f"ERRO: Categoria '{categoria}' inválida. Use VIP, INTEIRA ou MEIA."
-
-    ingresso = {
-        "id": proximo_id,
-        "nome": nome,
-        "categoria": categoria,
-        "chegada_logica": tempo_chegada,
-        "tempo_espera": 0
-    }
-    return ingresso, None
+    if categoria not in categorias:
+        nomes = list(categorias)
+        opcoes = ", ".join(nomes[:-1]) + " ou " + nomes[-1] if len(nomes) > 1 else nomes[0]
+        return None, f"ERRO: Categoria '{categoria}' inválida. Use {opcoes}."
+
+    return Ingresso(proximo_id, nome, categoria, tempo_chegada), None
 
 
 
 # FUNÇÕES DE ESTATÍSTICAS
 
 
-def inicializar_estatisticas():
+def inicializar_estatisticas(categorias=None):
     """
     Cria o dicionário inicial de estatísticas.
     """
+    if categorias is None:
+        categorias = escalonador.CATEGORIAS
     return {
         "total_pendente": 0,
         "total_atendido": 0,
         "tempo_total_espera": 0,
         "tempo_medio": 0,
-        "pendente_por_categoria": {"VIP": 0, "INTEIRA": 0, "MEIA": 0},
-        "atendido_por_categoria": {"VIP": 0, "INTEIRA": 0, "MEIA": 0}
+        "pendente_por_categoria": dict.fromkeys(categorias, 0),
+        "atendido_por_categoria": dict.fromkeys(categorias, 0),
+        # Percentis e janela dos tempos de espera (ver quantis.py)
+        "esboco_por_categoria": {cat: quantis.EsbocoQuantis() for cat in categorias},
+        "janela": quantis.Janela(),
     }
 
 
+def contar_pendente(estat, categoria, sinal=1):
+    """
+    Soma (sinal=1) ou retira (sinal=-1) um ingresso pendente das estatísticas.
+    Chamada por COMPRAR, CANCELAR e pelas respectivas inversas, em O(1).
+    """
+    estat["total_pendente"] += sinal
+    estat["pendente_por_categoria"][categoria] += sinal
+
+
+def contar_atendido(estat, categoria, tempo_espera, sinal=1, minuto=None):
+    """
+    Registra (sinal=1) ou desfaz (sinal=-1) um atendimento: o ingresso sai dos
+    pendentes e entra nos atendidos com o seu tempo de espera. O(1).
+    `minuto` é o relógio lógico do atendimento, para a janela de tempo.
+    """
+    contar_pendente(estat, categoria, -sinal)
+    estat["total_atendido"] += sinal
+    estat["atendido_por_categoria"][categoria] += sinal
+    estat["tempo_total_espera"] += sinal * tempo_espera
+    estat["esboco_por_categoria"][categoria].adicionar(tempo_espera, sinal)
+    if minuto is not None:
+        estat["janela"].registrar(minuto, categoria, tempo_espera, sinal)
+
+
 def atualizar_estatisticas(estado):
     """
-    Atualiza o dicionário de estatísticas com base no estado atual das filas e atendimentos.
+    Retorna as estatísticas do estado.
+    Se o estado mantém o acumulador (chave "estatisticas"), a leitura é O(1):
+    só o tempo médio é calculado. Senão, recalcula tudo a partir das filas.
     """
-    estat = inicializar_estatisticas()
+    estat = estado.get("estatisticas")
+    if estat is None:
+        return recalcular_estatisticas(estado)
 
-    # --- Contar pendentes ---
-    if estado["modo_atendimento"] == "PADRAO":
-        _contar_fila(estat, estado["fila_padrao"])
+    if estat["total_atendido"] > 0:
+        estat["tempo_medio"] = estat["tempo_total_espera"] / estat["total_atendido"]
+    else:
+        estat["tempo_medio"] = 0
+    return estat
+
+
+def combinar_estatisticas(parciais, categorias=None):
+    """
+    Soma as estatísticas de vários estados (ex.: os fragmentos de
+    fragmentos.py) em um único dicionário, com o tempo médio recalculado.
+    """
+    total = inicializar_estatisticas(categorias)
+    for estat in parciais:
+        for chave in ("total_pendente", "total_atendido", "tempo_total_espera"):
+            total[chave] += estat[chave]
+        for chave in ("pendente_por_categoria", "atendido_por_categoria"):
+            for cat, qtd in estat[chave].items():
+                total[chave][cat] = total[chave].get(cat, 0) + qtd
+        for cat, esboco in estat["esboco_por_categoria"].items():
+            total["esboco_por_categoria"].setdefault(cat, quantis.EsbocoQuantis()).combinar(esboco)
+        total["janela"].combinar(estat["janela"])
+    if total["total_atendido"] > 0:
+        total["tempo_medio"] = total["tempo_total_espera"] / total["total_atendido"]
+    return total
+
+
+def recalcular_estatisticas(estado):
+    """
+    Monta o dicionário de estatísticas percorrendo as filas e os atendimentos
+    (ids nas colunas de estado["ingressos"]).
+    Custo O(n); serve para estados sem acumulador e para conferência.
+    """
+    if estado.get("escalonador"):
+        estat = inicializar_estatisticas(estado["escalonador"]["ordem"])
     else:
-        _contar_fila(estat, estado["fila_vip"])
-        _contar_fila(estat, estado["fila_inteira"])
-        _contar_fila(estat, estado["fila_meia"])
+        estat = inicializar_estatisticas()
+    tabela = estado["ingressos"]
+
+    # --- Contar pendentes ---
+    # As filas que não pertencem ao modo atual estão vazias.
+    cancelados = estado.get("cancelados", ())
+    for fila in estado["filas"].values():
+        _contar_fila(estat, tabela, fila, cancelados)
 
     # --- Contar atendidos ---
-    for ingresso in estado["atendidos"]:
-        cat = ingresso["categoria"]
+    for id_ingresso in estado["atendidos"]:
+        cat = tabela.categoria(id_ingresso)
+        espera = tabela.esperas[id_ingresso]
         estat["atendido_por_categoria"][cat] += 1
         estat["total_atendido"] += 1
-        estat["tempo_total_espera"] += ingresso.get("tempo_espera", 0)
+        estat["tempo_total_espera"] += espera
+        estat["esboco_por_categoria"][cat].adicionar(espera)
+        estat["janela"].registrar(tabela.chegadas[id_ingresso] + espera, cat, espera)
 
     if estat["total_atendido"] > 0:
         estat["tempo_medio"] = estat["tempo_total_espera"] / estat["total_atendido"]
@@ -68,13 +236,16 @@ def atualizar_estatisticas(estado):
     return estat
 
 
-def _contar_fila(estat, fila):
+def _contar_fila(estat, tabela, fila, cancelados=()):
     """
-    Função auxiliar que soma os ingressos de uma fila às estatísticas.
+    Função auxiliar que soma os ingressos (ids) de uma fila às estatísticas.
+    Ingressos cancelados que ainda ocupam o deque (lápides) são ignorados.
     """
-    for ing in fila:
+    for id_ingresso in fila:
+        if id_ingresso in cancelados:
+            continue
         estat["total_pendente"] += 1
-        estat["pendente_por_categoria"][ing["categoria"]] += 1
+        estat["pendente_por_categoria"][tabela.categoria(id_ingresso)] += 1
 
 
 def exibir_estatisticas(estat, relogio_logico):
@@ -96,28 +267,107 @@ def exibir_estatisticas(estat, relogio_logico):
         print(f"  - {cat}: {qtd}")
     print("--------------------")
 
+
+PERCENTIS = (0.50, 0.95, 0.99)
+
+
+def _formatar_percentis(esboco):
+    valores = esboco.quantis(PERCENTIS)
+    if valores[0] is None:
+        return "sem atendimentos"
+    return " | ".join(f"p{round(p * 100)} {round(valor, 1)} min" for p, valor in zip(PERCENTIS, valores))
+
+
+def exibir_quantis(estat):
+    """Exibe p50/p95/p99 do tempo de espera, no total e por categoria."""
+    print("\n--- PERCENTIS DO TEMPO DE ESPERA ---")
+    total = quantis.EsbocoQuantis()
+    for esboco in estat["esboco_por_categoria"].values():
+        total.combinar(esboco)
+    print(f"Total: {_formatar_percentis(total)}")
+    for cat, esboco in estat["esboco_por_categoria"].items():
+        print(f"  - {cat}: {_formatar_percentis(esboco)}")
+    print("--------------------")
+
+
+def exibir_janela(estat, relogio_logico, minutos):
+    """Exibe os atendimentos dos últimos `minutos` do relógio lógico."""
+    minutos = min(minutos, estat["janela"].minutos)
+    por_categoria, soma, esboco = estat["janela"].resumo(relogio_logico, minutos)
+    atendidos = esboco.total
+    print(f"\n--- ÚLTIMOS {minutos} MINUTOS (relógio {max(0, relogio_logico - minutos)} a {relogio_logico}) ---")
+    print(f"Atendidos: {atendidos}")
+    if atendidos:
+        print(f"Tempo Médio de Espera: {soma / atendidos:.2f} minutos")
+    print(f"Percentis: {_formatar_percentis(esboco)}")
+    for cat in estat["atendido_por_categoria"]:
+        print(f"  - {cat}: {por_categoria.get(cat, 0)}")
+    print("--------------------")
+
 # TESTE INDEPENDENTE 
 
+def medir_memoria(quantidade=100_000):
+    """
+    Compara os bytes por ingresso (tracemalloc) entre o dicionário antigo e
+    Ingresso, com nomes lidos de comandos (strings novas a cada linha, vários
+    visitantes com o mesmo nome) e o id compartilhado com o índice.
+    """
+    import tracemalloc
+
+    linhas = [f"COMPRAR Visitante{i % 2000} VIP" for i in range(quantidade)]
+
+    def _medir(criar):
+        tracemalloc.start()
+        lista = [criar(i, linha.split()[1]) for i, linha in enumerate(linhas)]
+        total = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del lista
+        return total / quantidade
+
+    def _dicionario(i, nome):
+        return {"id": i, "nome": nome, "categoria": "VIP", "chegada_logica": 0, "tempo_espera": 0}
+
+    def _compacto(i, nome):
+        return Ingresso(i, nome, "VIP", 0)
+
+    return _medir(_dicionario), _medir(_compacto)
+
+
 def main():
     """
     Teste isolado do módulo de ingressos.
     """
-    from collections import deque
+    import colunas
+    import ingressos
 
-    # Estado simulado
+    # Estado simulado (com o Ingresso do módulo importado, o mesmo que a
+    # tabela usa para os códigos das categorias, e não o de __main__)
+    tabela = colunas.Tabela()
+    for ingresso in (ingressos.Ingresso(1, "Ana", "VIP", 0), ingressos.Ingresso(2, "Bruno", "INTEIRA", 1),
+                     ingressos.Ingresso(3, "Clara", "MEIA", 2)):
+        tabela.acrescentar(ingresso)
+    tabela.situacao[3] = colunas.ATENDIDO
+    tabela.esperas[3] = 3
     estado = {
         "modo_atendimento": "PRIORIDADE",
-        "fila_vip": deque([{"id": 1, "nome": "Ana", "categoria": "VIP"}]),
-        "fila_inteira": deque([{"id": 2, "nome": "Bruno", "categoria": "INTEIRA"}]),
-        "fila_meia": deque(),
-        "fila_padrao": deque(),
-        "atendidos": [{"id": 3, "nome": "Clara", "categoria": "MEIA", "tempo_espera": 3}],
+        "ingressos": tabela,
+        "filas": {
+            "fila_padrao": colunas.FilaIds(),
+            "fila_vip": colunas.FilaIds([1]),
+            "fila_inteira": colunas.FilaIds([2]),
+            "fila_meia": colunas.FilaIds(),
+        },
+        "atendidos": [3],
         "relogio_logico": 5
     }
 
     estat = atualizar_estatisticas(estado)
     exibir_estatisticas(estat, estado["relogio_logico"])
 
+    dicionario, compacto = medir_memoria()
+    print(f"\nMemória por ingresso: dicionário {dicionario:.0f} B, "
+          f"Ingresso {compacto:.0f} B ({dicionario / compacto:.1f}x menor)")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,110 @@
+# linha_tempo.py
+# Linha do tempo da fila: checkpoints periódicos do estado + registro das
+# alterações aplicadas depois de cada um, para o REVER <t> reconstruir a
+# fila como ela estava no minuto t do relógio lógico.
+#
+# Cada alteração (um comando, um DESFAZER ou um REFAZER) é guardada como os
+# passos que a aplicam para frente: as operações elementares registradas
+# por pilha.registrar (a "refazer" de um comando, a "desfazer" de um
+# DESFAZER). Os passos são guardados por referência: anotar uma alteração
+# não serializa nada (só o checkpoint periódico usa pickle).
+#
+# Os objetos citados pelos passos não mudam depois: os ingressos dos
+# argumentos são registros de valor (a espera de um atendido fica na coluna
+# de esperas da tabela), então o REVER aplica os próprios passos ao estado
+# carregado do checkpoint.
+#
+# Para reconstruir o minuto t: acha a última alteração após a qual o relógio
+# marcava t, carrega o checkpoint do segmento dela e reaplica só as
+# alterações desse segmento até ela. Um checkpoint novo é gravado quando o
+# segmento atual tem mais alterações que max(INTERVALO_MINIMO,
+# INTERVALO_POR_INGRESSO * tamanho do estado), então o custo do REVER é
+# limitado pelo intervalo (e pela carga do checkpoint), não pelo tamanho da
+# história, e gravar checkpoints custa O(1) amortizado por alteração. Acima
+# de MAX_BYTES os segmentos mais antigos são descartados.
+import pickle
+import sys
+import zlib
+
+INTERVALO_MINIMO = 1_000
+# Alterações entre checkpoints por ingresso do estado: reaplicar uma
+# alteração custa bem menos que congelar um ingresso
+INTERVALO_POR_INGRESSO = 4
+MAX_BYTES = 32 << 20
+# Estimativa de cada passo guardado: a tupla (funcao, args); os argumentos em
+# geral também estão no estado ou no histórico do DESFAZER
+BYTES_POR_PASSO = 64
+
+# Chaves do estado que não entram no checkpoint
+_FORA_DO_CHECKPOINT = ('linha_tempo', 'registro_alteracoes')
+
+
+def _congelar(estado):
+    copia = dict(estado)
+    for chave in _FORA_DO_CHECKPOINT:
+        copia[chave] = None
+    return zlib.compress(pickle.dumps(copia, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+
+class LinhaTempo:
+    """
+    Segmentos [checkpoint comprimido, alterações, bytes], do mais antigo ao
+    atual; os bytes das alterações são estimados (ver BYTES_POR_PASSO).
+    """
+
+    __slots__ = ("segmentos", "primeiro", "ultimo", "desde_checkpoint", "bytes")
+
+    def __init__(self, estado):
+        self.segmentos = []
+        self.primeiro = 0  # número do segmento mais antigo ainda guardado
+        # relógio -> (segmento, quantidade de alterações aplicadas) da
+        # última vez que o relógio marcou esse valor
+        self.ultimo = {}
+        self.desde_checkpoint = 0
+        self.bytes = 0
+        self._checkpoint(estado)
+
+    def _checkpoint(self, estado):
+        congelado = _congelar(estado)
+        self.segmentos.append([congelado, [], len(congelado)])
+        self.bytes += len(congelado)
+        self.ultimo[estado['relogio_logico']] = (self.primeiro + len(self.segmentos) - 1, 0)
+        self.desde_checkpoint = 0
+        if self.bytes > MAX_BYTES and len(self.segmentos) > 1:
+            while self.bytes > MAX_BYTES and len(self.segmentos) > 1:
+                self.bytes -= self.segmentos.pop(0)[2]
+                self.primeiro += 1
+            self.ultimo = {relogio: posicao for relogio, posicao in self.ultimo.items()
+                           if posicao[0] >= self.primeiro}
+
+    def registrar(self, estado, passos):
+        """Anota uma alteração já aplicada: passos = [(funcao, args), ...]."""
+        atual = self.segmentos[-1]
+        atual[1].append(passos)
+        guardados = sys.getsizeof(passos) + BYTES_POR_PASSO * len(passos)
+        atual[2] += guardados
+        self.bytes += guardados
+        self.ultimo[estado['relogio_logico']] = (self.primeiro + len(self.segmentos) - 1, len(atual[1]))
+        self.desde_checkpoint += 1
+        tamanho = len(estado['ingressos'])
+        if self.desde_checkpoint >= max(INTERVALO_MINIMO, INTERVALO_POR_INGRESSO * tamanho):
+            self._checkpoint(estado)
+
+    def reconstruir(self, relogio):
+        """
+        Estado da fila na última vez que o relógio marcou `relogio`, ou None
+        se esse minuto não aconteceu ou já saiu da linha do tempo guardada.
+        """
+        posicao = self.ultimo.get(relogio)
+        if posicao is None:
+            return None
+        congelado, alteracoes, _ = self.segmentos[posicao[0] - self.primeiro]
+        estado = pickle.loads(zlib.decompress(congelado))
+        for passos in alteracoes[:posicao[1]]:
+            for funcao, args in passos:
+                funcao(estado, *args)
+        return estado
+
+    def relogio_mais_antigo(self):
+        """Menor minuto que ainda pode ser reconstruído."""
+        return min(self.ultimo, default=None)
@@ -0,0 +1,296 @@
+# metricas.py
+# Instrumentação dos comandos: contagem de chamadas e histograma de latência
+# por verbo, medidos em comandos.despachar(), mais medidores lidos do
+# contexto na hora da consulta (tamanho das filas, dos históricos de
+# desfazer/refazer e da linha do tempo). O comando METRICAS mostra tudo e,
+# com um arquivo configurado, o mesmo conteúdo é gravado periodicamente no
+# formato texto do Prometheus para o coletor local. O arquivo só vem da
+# opção --metricas da linha de comando: nenhum comando grava num caminho
+# escolhido por quem digita.
+#
+# A coleta é do processo (não do contexto): assim não vai para os snapshots
+# do diário e vale para qualquer front end. Desligada, `coletor` é None e o
+# custo no despacho é um único teste. Ligada, cada comando paga duas
+# leituras de perf_counter_ns e um bisect nos limites dos baldes; os
+# medidores não custam nada por comando, porque só são lidos na consulta.
+import os
+import time
+from bisect import bisect_left
+
+import pilha
+
+# Limites superiores dos baldes de latência, em segundos (1-2,5-5 por década)
+LIMITES = (
+    1e-6, 2.5e-6, 5e-6,
+    1e-5, 2.5e-5, 5e-5,
+    1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3,
+    1e-2, 2.5e-2, 5e-2,
+    1e-1, 2.5e-1, 5e-1,
+    1.0, 2.5, 5.0, 10.0,
+)
+_LIMITES_NS = tuple(round(limite * 1e9) for limite in LIMITES)
+
+INTERVALO_PADRAO = 15.0  # segundos entre gravações do arquivo
+
+# Verbos inexistentes contam todos juntos (não criam uma série cada)
+VERBO_INVALIDO = "INVALIDO"
+
+# Históricos do contexto e o nome de cada um nas métricas
+HISTORICOS = (
+    ("historico_undo_fila", "desfazer_fila"),
+    ("historico_redo_fila", "refazer_fila"),
+    ("historico_undo_pilha", "desfazer_navegacao"),
+    ("historico_redo_pilha", "refazer_navegacao"),
+)
+
+# Coletor ativo do processo (None = instrumentação desligada)
+coletor = None
+
+# Arquivo e intervalo configurados na linha de comando (ver configurar): o
+# METRICAS LIGAR/ZERAR volta a usá-los, então desligar e ligar de novo não
+# interrompe a gravação do arquivo
+arquivo_configurado = None
+intervalo_configurado = INTERVALO_PADRAO
+
+
+class Latencias:
+    """Histograma de um verbo: contagem por balde (não acumulada), soma e máximo em ns."""
+
+    __slots__ = ("baldes", "chamadas", "soma", "maximo")
+
+    def __init__(self):
+        self.baldes = [0] * (len(_LIMITES_NS) + 1)  # o último é o +Inf
+        self.chamadas = 0
+        self.soma = 0
+        self.maximo = 0
+
+    def observar(self, duracao):
+        self.baldes[bisect_left(_LIMITES_NS, duracao)] += 1
+        self.chamadas += 1
+        self.soma += duracao
+        if duracao > self.maximo:
+            self.maximo = duracao
+
+    def percentil(self, p):
+        """Limite superior (em s) do balde onde cai o percentil p; o máximo no +Inf."""
+        alvo = p / 100 * self.chamadas
+        acumulado = 0
+        for indice, quantidade in enumerate(self.baldes):
+            acumulado += quantidade
+            if quantidade and acumulado >= alvo:
+                if indice < len(LIMITES):
+                    return min(LIMITES[indice], self.maximo / 1e9)
+                break
+        return self.maximo / 1e9
+
+
+class Coletor:
+    """Latências por verbo e, opcionalmente, o arquivo Prometheus gravado a cada `intervalo` s."""
+
+    __slots__ = ("latencias", "inicio", "arquivo", "intervalo", "proxima_gravacao")
+
+    def __init__(self, arquivo=None, intervalo=INTERVALO_PADRAO):
+        self.latencias = {}
+        self.inicio = time.time()
+        self.arquivo = arquivo
+        self.intervalo = intervalo
+        self.proxima_gravacao = time.perf_counter_ns() + round(intervalo * 1e9)
+
+    def medir(self, despachar, ctx, analisado):
+        """Executa despachar(ctx, analisado) medindo a duração."""
+        inicio = time.perf_counter_ns()
+        try:
+            return despachar(ctx, analisado)
+        finally:
+            fim = time.perf_counter_ns()
+            verbo = analisado.verbo if analisado.comando is not None else VERBO_INVALIDO
+            latencias = self.latencias.get(verbo)
+            if latencias is None:
+                latencias = self.latencias[verbo] = Latencias()
+            latencias.observar(fim - inicio)
+            # A gravação periódica vai de carona nos comandos (sem thread):
+            # parado, o processo não tem nada de novo para mostrar
+            if self.arquivo is not None and fim >= self.proxima_gravacao:
+                self.proxima_gravacao = fim + round(self.intervalo * 1e9)
+                gravar(ctx, self.arquivo)
+
+
+def configurar(arquivo, intervalo=INTERVALO_PADRAO):
+    """Guarda o arquivo e o intervalo da linha de comando e liga a coleta."""
+    global arquivo_configurado, intervalo_configurado
+    arquivo_configurado, intervalo_configurado = arquivo, intervalo
+    return ligar()
+
+
+def ligar():
+    """Liga a coleta (recomeçando do zero), com o arquivo configurado. Retorna o coletor."""
+    global coletor
+    coletor = Coletor(arquivo_configurado, intervalo_configurado)
+    return coletor
+
+
+def desligar():
+    global coletor
+    coletor = None
+
+
+# --- MEDIDORES (lidos do contexto na hora) ---
+
+def medidores(ctx):
+    """
+    Lista de (nome, rótulos, valor, ajuda) com o tamanho das filas, dos
+    históricos e da linha do tempo. `rótulos` é uma tupla de pares.
+    """
+    estado = ctx["estado_fila"]
+    valores = []
+    # (cada métrica com todos os seus rótulos em sequência, como o formato pede)
+    for nome_fila in estado["filas"]:
+        valores.append(("festival_fila_pendentes", (("fila", nome_fila),),
+                        estado["pendentes"].get(nome_fila, 0), "Ingressos pendentes por fila"))
+    for nome_fila, itens in estado["filas"].items():
+        valores.append(("festival_fila_itens", (("fila", nome_fila),), len(itens),
+                        "Itens no deque da fila (inclui cancelados ainda não removidos)"))
+    valores.append(("festival_atendidos", (), len(estado["atendidos"]), "Ingressos atendidos"))
+    valores.append(("festival_relogio_logico", (), estado["relogio_logico"], "Minuto do relógio lógico"))
+
+    historicos = [(nome, ctx[chave]) for chave, nome in HISTORICOS]
+    for nome, historico in historicos:
+        valores.append(("festival_historico_entradas", (("historico", nome),), len(historico),
+                        "Entradas no histórico de desfazer/refazer"))
+    resumos = [(nome, historico.resumo()) for nome, historico in historicos
+               if isinstance(historico, pilha.Historico)]
+    for camada, chave in (("quente", "bytes_quentes"), ("fria", "bytes_frios")):
+        for nome, r in resumos:
+            valores.append(("festival_historico_bytes", (("historico", nome), ("camada", camada)),
+                            r[chave], "Bytes do histórico (quente: estimativa; fria: comprimida)"))
+    for nome, r in resumos:
+        valores.append(("festival_historico_descartadas", (("historico", nome),), r["descartadas"],
+                        "Entradas descartadas por falta de orçamento"))
+
+    sessoes = ctx.get("sessoes")
+    if sessoes is not None:
+        valores.append(("festival_sessoes_ativas", (), len(sessoes), "Sessões de navegação de visitantes ativas"))
+        valores.append(("festival_sessoes_descartadas", (), sessoes.descartadas,
+                        "Sessões descartadas por desuso (LRU)"))
+
+    linha = estado.get("linha_tempo")
+    if linha is not None:
+        valores.append(("festival_linha_tempo_bytes", (), linha.bytes,
+                        "Bytes guardados pela linha do tempo do REVER"))
+    return valores
+
+
+# --- FORMATO TEXTO DO PROMETHEUS ---
+
+def _rotulos(pares):
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{chave}="{valor}"' for chave, valor in pares) + "}"
+
+
+def _limite(segundos):
+    return f"{segundos:g}"
+
+
+def prometheus(ctx):
+    """As métricas no formato texto de exposição do Prometheus."""
+    linhas = []
+    atual = coletor
+    if atual is not None and atual.latencias:
+        linhas.append("# HELP festival_comandos_total Comandos executados por verbo")
+        linhas.append("# TYPE festival_comandos_total counter")
+        for verbo in sorted(atual.latencias):
+            linhas.append(f'festival_comandos_total{{verbo="{verbo}"}} {atual.latencias[verbo].chamadas}')
+        linhas.append("# HELP festival_comando_segundos Latência dos comandos por verbo")
+        linhas.append("# TYPE festival_comando_segundos histogram")
+        for verbo in sorted(atual.latencias):
+            latencias = atual.latencias[verbo]
+            acumulado = 0
+            for limite, quantidade in zip(LIMITES, latencias.baldes):
+                acumulado += quantidade
+                linhas.append(f'festival_comando_segundos_bucket{{verbo="{verbo}",le="{_limite(limite)}"}} {acumulado}')
+            linhas.append(f'festival_comando_segundos_bucket{{verbo="{verbo}",le="+Inf"}} {latencias.chamadas}')
+            linhas.append(f'festival_comando_segundos_sum{{verbo="{verbo}"}} {latencias.soma / 1e9:.9f}')
+            linhas.append(f'festival_comando_segundos_count{{verbo="{verbo}"}} {latencias.chamadas}')
+
+    anterior = None
+    for nome, rotulos, valor, ajuda in medidores(ctx):
+        if nome != anterior:
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} gauge")
+            anterior = nome
+        linhas.append(f"{nome}{_rotulos(rotulos)} {valor}")
+    return "\n".join(linhas) + "\n"
+
+
+def gravar(ctx, arquivo):
+    """Grava as métricas em `arquivo` de forma atômica (arquivo temporário + rename)."""
+    temporario = f"{arquivo}.tmp"
+    with open(temporario, "w", encoding="utf-8") as saida:
+        saida.write(prometheus(ctx))
+    os.replace(temporario, arquivo)
+
+
+def gravar_agora(ctx):
+    """Grava o arquivo configurado no coletor, se houver (fim da sessão)."""
+    if coletor is not None and coletor.arquivo is not None:
+        gravar(ctx, coletor.arquivo)
+
+
+# --- COMANDO METRICAS ---
+
+def exibir(ctx):
+    """Tabela de latências por verbo (se a coleta estiver ligada) e os medidores."""
+    print("\n--- MÉTRICAS ---")
+    atual = coletor
+    if atual is None:
+        print("Coleta de latências desligada (METRICAS LIGAR para ligar).")
+    elif not atual.latencias:
+        print("Nenhum comando medido ainda.")
+    else:
+        print(f"Coletando há {time.time() - atual.inicio:.0f} s"
+              + (f"; gravando em '{atual.arquivo}' a cada {atual.intervalo:g} s" if atual.arquivo else ""))
+        print(f"{'VERBO':<14}{'CHAMADAS':>10}{'MÉDIA':>12}{'P50 ≤':>12}{'P99 ≤':>12}{'MÁXIMO':>12}")
+        for verbo in sorted(atual.latencias, key=lambda v: -atual.latencias[v].soma):
+            latencias = atual.latencias[verbo]
+            print(f"{verbo:<14}{latencias.chamadas:>10}"
+                  f"{_duracao(latencias.soma / latencias.chamadas / 1e9):>12}"
+                  f"{_duracao(latencias.percentil(50)):>12}{_duracao(latencias.percentil(99)):>12}"
+                  f"{_duracao(latencias.maximo / 1e9):>12}")
+    for nome, rotulos, valor, _ in medidores(ctx):
+        print(f"{nome}{_rotulos(rotulos)} = {valor}")
+    print("----------------")
+
+
+def _duracao(segundos):
+    if segundos < 1e-3:
+        return f"{segundos * 1e6:.1f} µs"
+    if segundos < 1:
+        return f"{segundos * 1e3:.2f} ms"
+    return f"{segundos:.2f} s"
+
+
+def comando(ctx, *args):
+    """METRICAS [LIGAR|DESLIGAR|ZERAR] - mostra ou controla a coleta."""
+    if not args:
+        exibir(ctx)
+        return
+    acao = args[0].upper()
+    if len(args) > 1 or acao not in ("LIGAR", "DESLIGAR", "ZERAR"):
+        print(f"ERRO METRICAS: Opção '{' '.join(args)}' inválida. "
+              "Use METRICAS [LIGAR|DESLIGAR|ZERAR].")
+    elif acao == "LIGAR":
+        if coletor is not None:
+            print("INFO: Coleta de métricas já está ligada.")
+            return
+        ligar()
+        print("OK: Coleta de métricas ligada.")
+    elif acao == "DESLIGAR":
+        desligar()
+        print("OK: Coleta de métricas desligada.")
+    elif coletor is None:
+        print("ERRO METRICAS: A coleta está desligada.")
+    else:
+        ligar()
+        print("OK: Métricas zeradas.")
@@ -0,0 +1,199 @@
+# ocupacao.py
+# Quantos visitantes estão em cada local, atualizado a cada movimento
+# (IR/VOLTAR/AVANCAR do terminal e das sessões), para o OCUPACAO mostrar os
+# locais mais cheios. A navegação não entra no DESFAZER/REFAZER (só a fila
+# entra), então não há movimento desfeito a descontar.
+#
+# Cada local tem a contagem própria e o total com os sub-locais (/IA inclui
+# /IA/Visao). Um movimento de A para B só mexe nos totais dos ancestrais
+# que não são comuns aos dois: entre estandes vizinhos (/IA/Visao ->
+# /IA/Robotica) são dois totais, não importa a profundidade, e nunca a
+# raiz, cujo total é sempre a quantidade de visitantes.
+#
+# Os totais (menos o da raiz) ficam numa heap de máximo indexada (posição
+# de cada local guardada), então um total que muda sobe ou desce na heap em
+# O(log n) e os k maiores saem em O(k log k) sem percorrer todos os locais.
+# Empates saem pelo id do local (o visto primeiro antes).
+from functools import lru_cache
+from heapq import heappop, heappush
+
+import Roteiro
+
+TOP_PADRAO = 10
+
+
+@lru_cache(maxsize=4096)
+def _cadeia(id_local):
+    """Ids do local e dos seus ancestrais, do próprio até o de primeiro nível (sem a raiz)."""
+    partes = [parte for parte in Roteiro.nome_local(id_local).split("/") if parte]
+    return tuple(Roteiro.id_local("/" + "/".join(partes[:tamanho]))
+                 for tamanho in range(len(partes), 0, -1))
+
+
+class Ocupacao:
+    """Contagens próprias e totais por local, com a heap indexada dos totais."""
+
+    __slots__ = ("proprio", "total", "heap", "posicoes", "visitantes")
+
+    def __init__(self, locais=()):
+        self.proprio = {}
+        self.total = {}
+        self.heap = []       # ids de local, o de maior total na posição 0
+        self.posicoes = {}   # id -> posição na heap
+        self.visitantes = 0
+        for id_local in locais:
+            self.chegar(id_local)
+
+    def chegar(self, id_local):
+        """Um visitante novo aparece em `id_local`."""
+        self.proprio[id_local] = self.proprio.get(id_local, 0) + 1
+        self.visitantes += 1
+        for id_area in _cadeia(id_local):
+            self._somar(id_area, 1)
+
+    def sair(self, id_local):
+        """Um visitante em `id_local` deixa de ser contado (sessão descartada)."""
+        self.proprio[id_local] -= 1
+        self.visitantes -= 1
+        for id_area in _cadeia(id_local):
+            self._somar(id_area, -1)
+
+    def mover(self, de, para):
+        """Um visitante passou de `de` para `para` (ids de local)."""
+        if de == para:
+            return
+        self.proprio[de] -= 1
+        self.proprio[para] = self.proprio.get(para, 0) + 1
+        cadeia_de, cadeia_para = _cadeia(de), _cadeia(para)
+        # Os ancestrais comuns ficam no fim das duas cadeias e não mudam
+        fim_de, fim_para = len(cadeia_de), len(cadeia_para)
+        while fim_de and fim_para and cadeia_de[fim_de - 1] == cadeia_para[fim_para - 1]:
+            fim_de -= 1
+            fim_para -= 1
+        for id_area in cadeia_de[:fim_de]:
+            self._somar(id_area, -1)
+        for id_area in cadeia_para[:fim_para]:
+            self._somar(id_area, 1)
+
+    def no_local(self, id_local):
+        """(total com os sub-locais, visitantes no próprio local)."""
+        proprio = self.proprio.get(id_local, 0)
+        if id_local == 0:
+            return self.visitantes, proprio
+        return self.total.get(id_local, 0), proprio
+
+    def maiores(self, k):
+        """Os k locais de maior total (sem a raiz): [(id, total)], do maior para o menor."""
+        heap, total = self.heap, self.total
+        resultado = []
+        if not heap:
+            return resultado
+        # Explora a heap a partir do topo: só os filhos dos já escolhidos
+        # podem ser o próximo maior
+        candidatos = [(-total[heap[0]], heap[0], 0)]
+        while candidatos and len(resultado) < k:
+            negativo, id_local, posicao = heappop(candidatos)
+            resultado.append((id_local, -negativo))
+            for filho in (2 * posicao + 1, 2 * posicao + 2):
+                if filho < len(heap):
+                    heappush(candidatos, (-total[heap[filho]], heap[filho], filho))
+        return resultado
+
+    # --- heap de máximo indexada por id ---
+
+    def _antes(self, a, b):
+        """O local `a` vem antes de `b` na heap (maior total; no empate, menor id)."""
+        total_a, total_b = self.total[a], self.total[b]
+        return total_a > total_b or (total_a == total_b and a < b)
+
+    def _somar(self, id_local, delta):
+        total = self.total[id_local] = self.total.get(id_local, 0) + delta
+        posicao = self.posicoes.get(id_local)
+        if posicao is None:
+            self.heap.append(id_local)
+            self.posicoes[id_local] = len(self.heap) - 1
+            self._subir(len(self.heap) - 1)
+        elif total == 0:
+            self._retirar(posicao)
+            del self.total[id_local]
+        elif delta > 0:
+            self._subir(posicao)
+        else:
+            self._descer(posicao)
+
+    def _retirar(self, posicao):
+        heap = self.heap
+        id_local = heap[posicao]
+        ultimo = heap.pop()
+        del self.posicoes[id_local]
+        if posicao < len(heap):
+            heap[posicao] = ultimo
+            self.posicoes[ultimo] = posicao
+            self._subir(posicao)
+            self._descer(self.posicoes[ultimo])
+
+    def _subir(self, posicao):
+        heap, posicoes = self.heap, self.posicoes
+        id_local = heap[posicao]
+        while posicao:
+            pai = (posicao - 1) >> 1
+            if not self._antes(id_local, heap[pai]):
+                break
+            heap[posicao] = heap[pai]
+            posicoes[heap[posicao]] = posicao
+            posicao = pai
+        heap[posicao] = id_local
+        posicoes[id_local] = posicao
+
+    def _descer(self, posicao):
+        heap, posicoes = self.heap, self.posicoes
+        id_local = heap[posicao]
+        tamanho = len(heap)
+        while True:
+            filho = 2 * posicao + 1
+            if filho >= tamanho:
+                break
+            if filho + 1 < tamanho and self._antes(heap[filho + 1], heap[filho]):
+                filho += 1
+            if not self._antes(heap[filho], id_local):
+                break
+            heap[posicao] = heap[filho]
+            posicoes[heap[posicao]] = posicao
+            posicao = filho
+        heap[posicao] = id_local
+        posicoes[id_local] = posicao
+
+
+def exibir(ocupacao, *args):
+    """
+    OCUPACAO [TOP=n | <caminho>]
+    Sem argumentos ou com TOP=n: os n locais mais cheios (contando os
+    sub-locais). Com um caminho (a partir da raiz): a ocupação dele.
+    """
+    if len(args) > 1:
+        print("ERRO OCUPACAO: Use OCUPACAO [TOP=n] ou OCUPACAO <caminho>.")
+        return
+    k = TOP_PADRAO
+    if args and args[0].upper().startswith("TOP="):
+        texto = args[0][4:]
+        if not texto.isdigit() or int(texto) < 1:
+            print(f"ERRO OCUPACAO: TOP '{texto}' inválido. Use um número inteiro positivo.")
+            return
+        k = int(texto)
+    elif args:
+        local = Roteiro.resolver_caminho("/", args[0])
+        id_local = Roteiro.buscar_id(local)
+        total, proprio = ocupacao.no_local(id_local) if id_local is not None else (0, 0)
+        print(f"OCUPACAO: '{local}' tem {total} visitante(s) "
+              f"({proprio} no próprio local, {total - proprio} nos sub-locais).")
+        return
+
+    print(f"\n--- OCUPAÇÃO DOS LOCAIS ({ocupacao.visitantes} visitante(s); "
+          f"{ocupacao.proprio.get(0, 0)} na raiz) ---")
+    maiores = ocupacao.maiores(k)
+    if not maiores:
+        print("(ninguém fora da raiz)")
+    for posicao, (id_local, total) in enumerate(maiores, 1):
+        print(f"{posicao:>3}. {Roteiro.nome_local(id_local)}: {total} "
+              f"({ocupacao.proprio.get(id_local, 0)} no próprio local)")
+    print("-" * 40)
@@ -0,0 +1,298 @@
+# persistencia.py
+# Diário (write-ahead log) dos comandos que alteram o estado + snapshots
+# periódicos do contexto, para sobreviver a uma queda no meio do festival.
+#
+# Arquivos dentro do diretório de dados:
+#   diario.log    - uma linha por comando: "<seq>\t<linha do comando>"; os
+#                   que leem um arquivo (IMPORTAR, ESTANDES) viram
+#                   "<seq>\t@[verbo, caminho, dados lidos]" (JSON), para a
+#                   recuperação não reler um arquivo que pode ter mudado
+#   snapshot.pkl  - pickle de (seq, contexto, locais) com o estado completo
+#                   (fila, roteiro e históricos de DESFAZER/REFAZER) e a
+#                   tabela de locais cujos ids estão nas pilhas
+#
+# Como os comandos são determinísticos, reexecutar as entradas do diário sobre
+# o último snapshot reconstrói exatamente a sessão que caiu. Na recuperação
+# só a cauda do diário (seq maior que a do snapshot) é reexecutada.
+import io
+import json
+import os
+import pickle
+import sys
+import time
+
+import comandos
+import Roteiro
+
+ARQUIVO_DIARIO = "diario.log"
+ARQUIVO_SNAPSHOT = "snapshot.pkl"
+
+# Início das entradas com os dados de um comando de carga (comandos.CARGAS);
+# nenhum verbo começa com "@", então não se confunde com um comando digitado
+MARCA_CARGA = "@"
+
+
+class _Nulo(io.TextIOBase):
+    """Descarta a saída dos comandos reexecutados na recuperação."""
+
+    def write(self, texto):
+        return len(texto)
+
+
+def _fsync_diretorio(diretorio):
+    # Garante que o os.replace() do snapshot também chegou ao disco
+    try:
+        fd = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        return  # (ex.: Windows não abre diretórios)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def salvar_snapshot(diretorio, ctx, seq):
+    """
+    Grava (seq, ctx, locais) em snapshot.pkl de forma atômica: escreve num
+    arquivo temporário, faz fsync e só então substitui o snapshot anterior.
+    """
+    caminho = os.path.join(diretorio, ARQUIVO_SNAPSHOT)
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        pickle.dump((seq, ctx, Roteiro.locais()), arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+    _fsync_diretorio(diretorio)
+
+
+def carregar_snapshot(diretorio):
+    """Retorna (seq, ctx) do último snapshot, ou (0, None) se não houver."""
+    caminho = os.path.join(diretorio, ARQUIVO_SNAPSHOT)
+    if not os.path.exists(caminho):
+        return 0, None
+    with open(caminho, "rb") as arquivo:
+        seq, ctx, locais = pickle.load(arquivo)
+    Roteiro.restaurar_locais(locais)
+    return seq, ctx
+
+
+def ler_diario(diretorio, depois_de=0):
+    """
+    Gera (seq, linha) das entradas do diário com seq > depois_de.
+    Uma última linha sem quebra de linha é escrita incompleta (queda no
+    meio da gravação) e é ignorada.
+    """
+    caminho = os.path.join(diretorio, ARQUIVO_DIARIO)
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, encoding="utf-8", newline="\n") as arquivo:
+        for registro in arquivo:
+            if not registro.endswith("\n"):
+                break
+            seq, _, linha = registro[:-1].partition("\t")
+            try:
+                seq = int(seq)
+            except ValueError:
+                break
+            if seq > depois_de:
+                yield seq, linha
+
+
+def _aparar_cauda(diretorio):
+    """Remove do fim do diário uma entrada escrita pela metade."""
+    caminho = os.path.join(diretorio, ARQUIVO_DIARIO)
+    if not os.path.exists(caminho):
+        return
+    with open(caminho, "rb+") as arquivo:
+        conteudo = arquivo.read()
+        if conteudo and not conteudo.endswith(b"\n"):
+            arquivo.truncate(conteudo.rfind(b"\n") + 1)
+
+
+def recuperar(diretorio):
+    """
+    Reconstrói a sessão: carrega o snapshot e reexecuta a cauda do diário,
+    sem mostrar a saída dos comandos.
+    Retorna (ctx, seq da última entrada aplicada, quantidade reexecutada).
+    """
+    seq, ctx = carregar_snapshot(diretorio)
+    if ctx is None:
+        ctx = comandos.criar_contexto()
+
+    reexecutados = 0
+    stdout_original = sys.stdout
+    sys.stdout = _Nulo()
+    try:
+        for seq, linha in ler_diario(diretorio, seq):
+            if linha.startswith(MARCA_CARGA):
+                comandos.despachar(ctx, comandos.com_dados(*json.loads(linha[len(MARCA_CARGA):])))
+            else:
+                comandos.executar(ctx, linha)
+            reexecutados += 1
+    finally:
+        sys.stdout = stdout_original
+    return ctx, seq, reexecutados
+
+
+class Diario:
+    """
+    Diário aberto para escrita.
+
+    Commit em grupo: as entradas vão para um buffer e o fsync só acontece
+    quando há `lote_fsync` entradas pendentes ou quando a mais antiga tem
+    mais de `intervalo_fsync` segundos. Quem não pode esperar (o terminal
+    interativo, antes de mostrar o prompt) chama sincronizar().
+    A cada `intervalo_snapshot` entradas um snapshot novo é gravado e o
+    diário recomeça vazio.
+    """
+
+    def __init__(self, diretorio, seq=0, lote_fsync=64, intervalo_fsync=0.05,
+                 intervalo_snapshot=50_000):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio = diretorio
+        self.seq = seq
+        self.lote_fsync = lote_fsync
+        self.intervalo_fsync = intervalo_fsync
+        self.intervalo_snapshot = intervalo_snapshot
+        self.pendentes = []
+        self.desde_snapshot = 0
+        self._inicio_lote = 0.0
+        self._arquivo = open(os.path.join(diretorio, ARQUIVO_DIARIO), "a",
+                             encoding="utf-8", newline="\n")
+
+    def registrar(self, linha):
+        """Acrescenta uma linha de comando ao diário (antes de executá-la)."""
+        self.seq += 1
+        if not self.pendentes:
+            self._inicio_lote = time.monotonic()
+        self.pendentes.append(f"{self.seq}\t{linha.strip()}\n")
+        self.desde_snapshot += 1
+        if (len(self.pendentes) >= self.lote_fsync
+                or time.monotonic() - self._inicio_lote >= self.intervalo_fsync):
+            self.sincronizar()
+
+    def sincronizar(self):
+        """Escreve as entradas pendentes e faz um único fsync para todas."""
+        if not self.pendentes:
+            return
+        self._arquivo.write("".join(self.pendentes))
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self.pendentes = []
+
+    def talvez_snapshot(self, ctx):
+        """Grava um snapshot se já passaram `intervalo_snapshot` entradas."""
+        if self.desde_snapshot >= self.intervalo_snapshot:
+            self.snapshot(ctx)
+
+    def snapshot(self, ctx):
+        """
+        Grava o snapshot do ctx (que já inclui tudo até self.seq) e trunca o
+        diário. Se cair entre os dois passos, as entradas antigas do diário
+        têm seq <= a do snapshot e são ignoradas na recuperação.
+        """
+        self.sincronizar()
+        salvar_snapshot(self.diretorio, ctx, self.seq)
+        self._arquivo.truncate(0)
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self.desde_snapshot = 0
+
+    def fechar(self):
+        self.sincronizar()
+        self._arquivo.close()
+
+
+def executar(ctx, diario, linha):
+    """
+    Como comandos.executar(), mas registra no diário os comandos que
+    alteram o estado antes de executá-los. Um comando de carga lê o
+    arquivo primeiro e vai para o diário (e é executado) com os dados lidos.
+    """
+    analisado = comandos.analisar(linha)
+    if analisado is None:
+        return True
+    comando = analisado.comando
+    if comando is not None and comando.verbo in comandos.CARGAS:
+        caminho = analisado.args[0]
+        dados = comandos.CARGAS[comando.verbo][0](ctx, caminho)
+        diario.registrar(MARCA_CARGA + json.dumps([comando.verbo, caminho, dados], ensure_ascii=False))
+        analisado = comandos.com_dados(comando.verbo, caminho, dados)
+    elif comando is not None and comando.altera:
+        diario.registrar(linha)
+    continuar = comandos.despachar(ctx, analisado)
+    diario.talvez_snapshot(ctx)
+    return continuar
+
+
+def abrir(diretorio, **opcoes):
+    """
+    Recupera a sessão salva em `diretorio` (se houver) e abre o diário para
+    continuar a partir dela. Retorna (ctx, diario, reexecutados).
+    """
+    ctx, seq, reexecutados = recuperar(diretorio)
+    # Novas entradas não podem ser coladas a uma linha incompleta
+    _aparar_cauda(diretorio)
+    diario = Diario(diretorio, seq, **opcoes)
+    diario.desde_snapshot = reexecutados
+    return ctx, diario, reexecutados
+
+
+# --- TESTE RÁPIDO: queda simulada e recuperação ---
+
+def main():
+    import random
+    import shutil
+    import tempfile
+
+    diretorio = tempfile.mkdtemp(prefix="festival_")
+    try:
+        random.seed(7)
+        linhas = []
+        for i in range(20_000):
+            sorteio = random.random()
+            if sorteio < 0.6:
+                linhas.append(f"COMPRAR Visitante{i} {random.choice(['VIP', 'INTEIRA', 'MEIA'])}")
+            elif sorteio < 0.8:
+                linhas.append("ENTRAR")
+            elif sorteio < 0.9:
+                linhas.append(f"CANCELAR {random.randint(1, i + 1)}")
+            else:
+                linhas.append(random.choice(["DESFAZER", "REFAZER", "MODO PRIORIDADE", "IR Palco", "VOLTAR"]))
+
+        stdout_original = sys.stdout
+        sys.stdout = _Nulo()
+        try:
+            ctx, diario, _ = abrir(diretorio, intervalo_snapshot=6_000)
+            for linha in linhas:
+                executar(ctx, diario, linha)
+            diario.fechar()  # "queda" logo após o último fsync
+
+            referencia = comandos.criar_contexto()
+            for linha in linhas:
+                comandos.executar(referencia, linha)
+        finally:
+            sys.stdout = stdout_original
+
+        inicio = time.perf_counter()
+        recuperado, seq, reexecutados = recuperar(diretorio)
+        tempo = time.perf_counter() - inicio
+
+        def _resumo(c):
+            estado = c["estado_fila"]
+            return (
+                {nome: list(fila) for nome, fila in estado["filas"].items()},
+                estado["cancelados"], list(estado["atendidos"]), estado["proximo_id"],
+                c["local_atual"], len(c["historico_undo_fila"]), len(c["historico_redo_fila"]),
+            )
+
+        print(f"Entradas no diário: {seq} (reexecutadas {reexecutados} após o snapshot)")
+        print(f"Recuperação: {tempo * 1000:.1f} ms")
+        print("Estado recuperado confere:", _resumo(recuperado) == _resumo(referencia))
+    finally:
+        shutil.rmtree(diretorio)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,133 +1,322 @@
-# --- Funções Auxiliares de Estado ---
+import pickle
+import sys
+import zlib
+from collections import deque
 
-def _salvar_estado(estado_atual):
-    """Cria uma cópia profunda *manual* e suficiente do estado atual.
-    Sem usar import copy. Lida com: listas, dicionários, e objetos tipo deque (copiados pela sua classe).
+import ingressos
+import Roteiro
+
+# --- Histórico com orçamento de memória ---
+
+# Orçamento padrão dos históricos de DESFAZER/REFAZER
+HISTORICO_MAX_ENTRADAS = 100_000    # além disso as entradas mais antigas são descartadas
+HISTORICO_MAX_QUENTES = 5_000       # entradas mantidas como objetos (acesso O(1))
+HISTORICO_MAX_BYTES = 64 << 20      # estimativa de memória das entradas quentes
+HISTORICO_TAMANHO_BLOCO = 256       # entradas por bloco comprimido
+
+
+# Itens de um contêiner que _estimar_bytes conta além da referência
+_CONTADOS = (list, tuple, deque, set, frozenset, dict, ingressos.Ingresso)
+
+
+def _estimar_bytes(objeto, profundidade=3):
+    """
+    Estimativa (barata) da memória retida por uma entrada do histórico:
+    contêineres contam o próprio tamanho e descem alguns níveis; os
+    registros Ingresso (de COMPRAR/IMPORTAR) contam o objeto, pois só o
+    histórico os guarda (o estado tem as colunas); outros objetos contam
+    só a referência, pois em geral também estão no estado.
+    """
+    if isinstance(objeto, (list, tuple, deque, set, frozenset)):
+        total = sys.getsizeof(objeto)
+        if profundidade:
+            for item in objeto:
+                if isinstance(item, _CONTADOS):
+                    total += _estimar_bytes(item, profundidade - 1)
+        return total
+    if isinstance(objeto, dict):
+        total = sys.getsizeof(objeto)
+        if profundidade:
+            for item in objeto.values():
+                if isinstance(item, _CONTADOS):
+                    total += _estimar_bytes(item, profundidade - 1)
+        return total
+    if type(objeto) is ingressos.Ingresso:
+        return sys.getsizeof(objeto)
+    return 8
+
+
+
+class Historico:
+    """
+    Pilha de DESFAZER/REFAZER com orçamento de memória, usada no lugar das
+    listas (mesma interface: append, pop, clear, len e teste de vazio).
+
+    As entradas recentes ficam "quentes" num deque (append/pop O(1)). Quando
+    passam de max_quentes ou de max_bytes (estimado), as mais antigas vão
+    para a camada "fria": blocos de tamanho_bloco entradas em pickle+zlib.
+    Um pop() com a camada quente vazia descomprime o bloco mais recente.
+    As entradas só citam ids e registros de valor (o estado guarda os
+    ingressos em colunas), então as cópias que voltam do pickle servem.
+    Acima de max_entradas no total o bloco frio mais antigo é descartado.
+    """
+
+    def __init__(self, max_entradas=HISTORICO_MAX_ENTRADAS, max_quentes=HISTORICO_MAX_QUENTES,
+                 max_bytes=HISTORICO_MAX_BYTES, tamanho_bloco=HISTORICO_TAMANHO_BLOCO):
+        self.max_entradas = max_entradas
+        self.max_quentes = max_quentes
+        self.max_bytes = max_bytes
+        self.tamanho_bloco = tamanho_bloco
+        self.quentes = deque()
+        self.tamanhos = deque()      # estimativa de bytes de cada entrada quente
+        self.bytes_quentes = 0
+        self.frios = deque()         # blocos (quantidade de entradas, bytes comprimidos)
+        self.quantidade_fria = 0
+        self.bytes_frios = 0
+        self.descartadas = 0
+
+    def __len__(self):
+        return len(self.quentes) + self.quantidade_fria
+
+    def __bool__(self):
+        return bool(self.quentes) or bool(self.frios)
+
+    def append(self, entrada):
+        tamanho = _estimar_bytes(entrada)
+        self.quentes.append(entrada)
+        self.tamanhos.append(tamanho)
+        self.bytes_quentes += tamanho
+        if len(self.quentes) > self.max_quentes or self.bytes_quentes > self.max_bytes:
+            self._esfriar()
+        if len(self) > self.max_entradas:
+            self._descartar()
+
+    def pop(self):
+        if not self.quentes:
+            if not self.frios:
+                raise IndexError("pop de um histórico vazio")
+            self._aquecer()
+        self.bytes_quentes -= self.tamanhos.pop()
+        return self.quentes.pop()
+
+    def clear(self):
+        self.quentes.clear()
+        self.tamanhos.clear()
+        self.bytes_quentes = 0
+        self.frios.clear()
+        self.quantidade_fria = 0
+        self.bytes_frios = 0
+
+    def _esfriar(self):
+        """Comprime as entradas quentes mais antigas, um bloco por vez, até caber no orçamento."""
+        while len(self.quentes) > 1 and (len(self.quentes) > self.max_quentes
+                                          or self.bytes_quentes > self.max_bytes):
+            quantidade = min(self.tamanho_bloco, len(self.quentes) - 1)
+            bloco = []
+            for _ in range(quantidade):
+                bloco.append(self.quentes.popleft())
+                self.bytes_quentes -= self.tamanhos.popleft()
+            dados = zlib.compress(pickle.dumps(bloco, protocol=pickle.HIGHEST_PROTOCOL))
+            self.frios.append((quantidade, dados))
+            self.quantidade_fria += quantidade
+            self.bytes_frios += len(dados)
+
+    def _aquecer(self):
+        """Traz de volta o bloco frio mais recente."""
+        quantidade, dados = self.frios.pop()
+        self.quantidade_fria -= quantidade
+        self.bytes_frios -= len(dados)
+        for entrada in pickle.loads(zlib.decompress(dados)):
+            tamanho = _estimar_bytes(entrada)
+            self.quentes.append(entrada)
+            self.tamanhos.append(tamanho)
+            self.bytes_quentes += tamanho
+
+    def _descartar(self):
+        """Esquece as entradas mais antigas (blocos frios inteiros primeiro)."""
+        while len(self) > self.max_entradas:
+            if self.frios:
+                quantidade, dados = self.frios.popleft()
+                self.quantidade_fria -= quantidade
+                self.bytes_frios -= len(dados)
+            else:
+                quantidade = 1
+                self.quentes.popleft()
+                self.bytes_quentes -= self.tamanhos.popleft()
+            self.descartadas += quantidade
+
+    def resumo(self):
+        """Tamanhos das camadas, para o comando HISTORICO."""
+        return {
+            'entradas': len(self),
+            'quentes': len(self.quentes),
+            'bytes_quentes': self.bytes_quentes,
+            'frias': self.quantidade_fria,
+            'blocos_frios': len(self.frios),
+            'bytes_frios': self.bytes_frios,
+            'descartadas': self.descartadas,
+        }
+
+
+def exibir_historicos(historicos):
+    """HISTORICO - mostra as camadas quente/fria de cada histórico [(nome, historico)]."""
+    print("\n--- HISTÓRICO DE DESFAZER/REFAZER ---")
+    for nome, historico in historicos:
+        if not isinstance(historico, Historico):
+            print(f"{nome}: {len(historico)} entradas (sem orçamento)")
+            continue
+        r = historico.resumo()
+        print(f"{nome}: {r['entradas']} entradas | quentes {r['quentes']} (~{r['bytes_quentes'] / 1024:.0f} KiB) | "
+              f"frias {r['frias']} em {r['blocos_frios']} blocos ({r['bytes_frios'] / 1024:.0f} KiB comprimidos) | "
+              f"descartadas {r['descartadas']}")
+    print("--------------------------------------")
+
+
+def registrar(estado, desfazer, args_desfazer, refazer, args_refazer):
+    """Anota no comando em execução uma operação e a sua inversa.
+    `desfazer(estado, *args_desfazer)` reverte a alteração e
+    `refazer(estado, *args_refazer)` a repete. Fora de _aplicar_comando
+    (registro None) não faz nada.
     """
-    estado_copiado = {}
-
-    for chave, valor in estado_atual.items():
-        # Lists -> shallow copy
-        if isinstance(valor, list):
-            # Se a lista contém dicionários, copie cada dicionário também (cópia rasa de cada dict).
-            nova_lista = []
-            for item in valor:
-                if isinstance(item, dict):
-                    nova_lista.append(item.copy())
-                else:
-                    nova_lista.append(item)
-            estado_copiado[chave] = nova_lista
-
-        # Dicts -> shallow copy (as chaves internas no seu estado são simples)
-        elif isinstance(valor, dict):
-            novo_dict = {}
-            for k, v in valor.items():
-                # Se v for lista/dict/deque, faça cópia rasa (tratamento limitado)
-                if isinstance(v, list):
-                    novo_dict[k] = v[:]
-                elif isinstance(v, dict):
-                    novo_dict[k] = v.copy()
-                else:
-                    novo_dict[k] = v
-            estado_copiado[chave] = novo_dict
-
-        # Objetos tipo deque (ou semelhantes) -> detecta por métodos e recria usando o mesmo tipo
-        elif hasattr(valor, 'append') and hasattr(valor, 'popleft'):
-            # type(valor)(list(valor)) -> reconstrói deque sem importar collections
-            try:
-                estado_copiado[chave] = type(valor)(list(valor))
-            except Exception:
-                # fallback: transforma em lista
-                estado_copiado[chave] = list(valor)
-
-        # Outros tipos imutáveis (int, str, bool, None) -> atribuição direta
-        else:
-            estado_copiado[chave] = valor
-
-    return estado_copiado
+    registro = estado.get('registro_alteracoes')
+    if registro is not None:
+        registro.append((desfazer, args_desfazer, refazer, args_refazer))
+
+
+def _anotar_linha_tempo(estado, passos):
+    """Leva a alteração aplicada para a linha do tempo do estado (ver linha_tempo.py), se houver."""
+    linha = estado.get('linha_tempo')
+    if linha is not None:
+        linha.registrar(estado, passos)
+
 
 def _aplicar_comando(estado_atual, historico_undo, historico_redo, comando_funcao, *args):
     """
     Wrapper que executa um comando que altera o estado.
-    1. Salva o estado atual em UNDO.
+    1. Abre um registro para as operações inversas do comando.
     2. Limpa REDO.
-    3. Executa a função do comando.
-    4. Retorna o novo estado e os históricos atualizados.
+    3. Executa a função do comando (ela altera o estado e registra o que fez).
+    4. Empilha o registro em UNDO e retorna o estado e os históricos.
+    O custo é proporcional à alteração feita, não ao tamanho do estado.
     """
-    # 1. Salvar o estado ANTES da alteração
-    historico_undo.append(_salvar_estado(estado_atual))
+    # 1. Abrir o registro ANTES da alteração
+    alteracoes = []
+    estado_atual['registro_alteracoes'] = alteracoes
 
     # 2. Limpar o histórico REDO
     historico_redo.clear()
-    
-    # 3. Executar o comando (a função deve retornar o novo estado)
-    novo_estado = comando_funcao(estado_atual, *args)
 
+    # 3. Executar o comando (a função deve retornar o novo estado)
+    try:
+        novo_estado = comando_funcao(estado_atual, *args)
+    finally:
+        estado_atual['registro_alteracoes'] = None
+
+    # 4. Mesmo um comando sem efeito ocupa uma posição no histórico
+    historico_undo.append(alteracoes)
+    if alteracoes:
+        _anotar_linha_tempo(novo_estado, [(refazer, args) for _, _, refazer, args in alteracoes])
     return novo_estado, historico_undo, historico_redo
 
 def desfazer(estado_atual, historico_undo, historico_redo):
     """
     DESFAZER - desfaz a última ação.
-    Move o estado atual para HISTORICO_REDO e restaura o estado do HISTORICO_UNDO.
+    Aplica as operações inversas do último registro (em ordem contrária)
+    e move o registro para HISTORICO_REDO.
     """
     if not historico_undo:
         print("ERRO DESFAZER: Histórico UNDO vazio. Nada a desfazer.")
         return estado_atual, historico_undo, historico_redo
 
-    # Move o estado atual para o REDO
-    historico_redo.append(_salvar_estado(estado_atual))
+    alteracoes = historico_undo.pop()
+    for funcao_desfazer, args, _, _ in reversed(alteracoes):
+        funcao_desfazer(estado_atual, *args)
+    if alteracoes:
+        _anotar_linha_tempo(estado_atual, [(desfazer, args) for desfazer, args, _, _ in reversed(alteracoes)])
 
-    # Restaura o estado anterior (cópia independente)
-    estado_restaurado = _salvar_estado(historico_undo.pop())
+    # O registro vai para o REDO
+    historico_redo.append(alteracoes)
 
     print("INFO DESFAZER: Ação desfeita com sucesso.")
-    return estado_restaurado, historico_undo, historico_redo
+    return estado_atual, historico_undo, historico_redo
 
 
 def refazer(estado_atual, historico_undo, historico_redo):
     """
     REFAZER - refaz a última ação desfeita.
-    Move o estado atual para HISTORICO_UNDO e restaura o estado do HISTORICO_REDO.
+    Repete as operações do último registro do REDO e o devolve ao HISTORICO_UNDO.
     """
     if not historico_redo:
         print("ERRO REFAZER: Histórico REDO vazio. Nada a refazer.")
         return estado_atual, historico_undo, historico_redo
-    
-    # O estado ATUAL se torna o anterior para UNDO
-    historico_undo.append(_salvar_estado(estado_atual))
-    
-    # Restaura o estado refeito do REDO
-    estado_restaurado = _salvar_estado(historico_redo.pop())
-    
+
+    alteracoes = historico_redo.pop()
+    for _, _, funcao_refazer, args in alteracoes:
+        funcao_refazer(estado_atual, *args)
+    if alteracoes:
+        _anotar_linha_tempo(estado_atual, [(refazer, args) for _, _, refazer, args in alteracoes])
+
+    # O registro volta para o UNDO
+    historico_undo.append(alteracoes)
+
     print("INFO REFAZER: Ação refeita com sucesso.")
-    return estado_restaurado, historico_undo, historico_redo
+    return estado_atual, historico_undo, historico_redo
+
+
+# --- Operações elementares de navegação (pares inversos para o histórico) ---
+
+# As pilhas guardam ids de local (Roteiro.id_local), como no Roteiro.
+
+def _mover_para(estado, novo_local):
+    """IR: empilha o local atual em VOLTAR e troca a pilha AVANCAR por uma vazia."""
+    avancar_antigo = estado['avancar_pilha']
+    estado['voltar_pilha'].append(Roteiro.id_local(estado['local_atual']))
+    estado['avancar_pilha'] = []
+    estado['local_atual'] = novo_local
+    return avancar_antigo
+
+
+def _desfazer_mover(estado, avancar_antigo):
+    """Inversa de _mover_para: volta ao local anterior e recoloca a pilha AVANCAR."""
+    estado['local_atual'] = Roteiro.nome_local(estado['voltar_pilha'].pop())
+    estado['avancar_pilha'] = avancar_antigo
+
+
+def _passo_voltar(estado):
+    """VOLTAR: move o local atual para AVANCAR e retira o topo de VOLTAR."""
+    estado['avancar_pilha'].append(Roteiro.id_local(estado['local_atual']))
+    estado['local_atual'] = Roteiro.nome_local(estado['voltar_pilha'].pop())
+
+
+def _passo_avancar(estado):
+    """AVANCAR: move o local atual para VOLTAR e retira o topo de AVANCAR."""
+    estado['voltar_pilha'].append(Roteiro.id_local(estado['local_atual']))
+    estado['local_atual'] = Roteiro.nome_local(estado['avancar_pilha'].pop())
+
+
+def _definir_modo(estado, modo):
+    estado['estado_geral_simulado'] = modo
+
 
 def comando_ir(estado_antigo, caminho):
     """Implementa IR <caminho>. Retorna o novo estado."""
     
-    estado = _salvar_estado(estado_antigo) # Trabalha numa cópia
+    estado = estado_antigo # Alterado no lugar; o histórico guarda só a inversa
     local_atual = estado['local_atual']
-    voltar_pilha = estado['voltar_pilha']
-    avancar_pilha = estado['avancar_pilha']
 
     if not isinstance(caminho, str) or not caminho:
         print("ERRO IR: O caminho deve ser uma string não vazia.")
         return estado_antigo
 
-    # (Lógica IR simplificada, para o foco ser UNDO/REDO)
-    if caminho.startswith('/'):
-        novo_local = caminho.rstrip('/') if caminho != '/' else '/'
-    else:
-        # Lógica de caminho relativo: apensar se não for a raiz
-        if local_atual == "/":
-            novo_local = "/" + caminho
-        else:
-            novo_local = local_atual + "/" + caminho
+    # Mesma resolução do Roteiro (absolutos, relativos, '.' e '..')
+    novo_local = Roteiro.resolver_caminho(local_atual, caminho)
 
     if local_atual != novo_local:
-        voltar_pilha.append(local_atual)
-        avancar_pilha.clear()
-        estado['local_atual'] = novo_local
+        if Roteiro.admitir(novo_local) is None:
+            print(f"ERRO IR: Limite de {Roteiro.MAX_LOCAIS} locais atingido; não é possível ir para '{novo_local}'.")
+            return estado_antigo
+        avancar_antigo = _mover_para(estado, novo_local)
+        registrar(estado, _desfazer_mover, (avancar_antigo,), _mover_para, (novo_local,))
         print(f"INFO IR: Navegando para '{novo_local}'.")
         return estado
     else:
@@ -137,50 +326,44 @@ def comando_ir(estado_antigo, caminho):
 
 def comando_voltar(estado_antigo):
     """Implementa VOLTAR. Retorna o novo estado."""
-    estado = _salvar_estado(estado_antigo)
-    local_atual = estado['local_atual']
-    voltar_pilha = estado['voltar_pilha']
-    avancar_pilha = estado['avancar_pilha']
+    estado = estado_antigo
 
-    if not voltar_pilha:
+    if not estado['voltar_pilha']:
         print("ERRO VOLTAR: Pilha VOLTAR vazia. Não é possível retornar.")
         return estado_antigo
     
-    avancar_pilha.append(local_atual)
-    novo_local = voltar_pilha.pop()
-    estado['local_atual'] = novo_local
+    _passo_voltar(estado)
+    registrar(estado, _passo_avancar, (), _passo_voltar, ())
     
-    print(f"INFO VOLTAR: Retornando para '{novo_local}'.")
+    print(f"INFO VOLTAR: Retornando para '{estado['local_atual']}'.")
     return estado
 
 
 def comando_avancar(estado_antigo):
     """Implementa AVANCAR. Retorna o novo estado."""
-    estado = _salvar_estado(estado_antigo)
-    local_atual = estado['local_atual']
-    voltar_pilha = estado['voltar_pilha']
-    avancar_pilha = estado['avancar_pilha']
+    estado = estado_antigo
 
-    if not avancar_pilha:
+    if not estado['avancar_pilha']:
         print("ERRO AVANCAR: Pilha AVANCAR vazia. Não é possível avançar.")
         return estado_antigo
 
-    voltar_pilha.append(local_atual)
-    novo_local = avancar_pilha.pop()
-    estado['local_atual'] = novo_local
+    _passo_avancar(estado)
+    registrar(estado, _passo_voltar, (), _passo_avancar, ())
     
-    print(f"INFO AVANCAR: Avançando para '{novo_local}'.")
+    print(f"INFO AVANCAR: Avançando para '{estado['local_atual']}'.")
     return estado
 
 def comando_mudar_modo(estado_antigo, novo_modo):
     """Simula um comando de alteração de estado (MODO)."""
-    estado = _salvar_estado(estado_antigo)
+    estado = estado_antigo
+    modo_antigo = estado['estado_geral_simulado']
 
-    if estado['estado_geral_simulado'] == novo_modo:
+    if modo_antigo == novo_modo:
          print(f"INFO MODO: Já está no modo '{novo_modo}'.")
          return estado_antigo
          
-    estado['estado_geral_simulado'] = novo_modo
+    _definir_modo(estado, novo_modo)
+    registrar(estado, _definir_modo, (modo_antigo,), _definir_modo, (novo_modo,))
     print(f"INFO MODO: Alterando modo para '{novo_modo}'.")
     return estado
 
@@ -200,8 +383,8 @@ def estatisticas(estado_atual, historico_undo, historico_redo):
     print(f"Modo: {estado_atual['estado_geral_simulado']}")
     print(f"Histórico VOLTAR: {len(estado_atual['voltar_pilha'])} itens")
     print(f"Histórico AVANCAR: {len(estado_atual['avancar_pilha'])} itens")
-    print(f"Histórico DESFAZER (UNDO): {len(historico_undo)} estados salvos")
-    print(f"Histórico REFAZER (REDO): {len(historico_redo)} estados salvos")
+    print(f"Histórico DESFAZER (UNDO): {len(historico_undo)} ações registradas")
+    print(f"Histórico REFAZER (REDO): {len(historico_redo)} ações registradas")
     print("-------------------------------")
 
 
@@ -0,0 +1,242 @@
+# portaria.py
+# Atendimento concorrente: várias catracas (threads) chamando ENTRAR sobre
+# o mesmo estado da fila, com a mesma política de fila._proximo_a_entrar
+# (via fila._nome_proxima_fila).
+#
+# Travas (quando uma é pega dentro de outra, é sempre nesta ordem, para não
+# haver deadlock):
+#   'escalonador'  - estado do escalonador (escolher/consumir/notificar); só
+#                    durante a escolha da fila, não durante a retirada
+#   'filas'[nome]  - uma por fila: conteúdo, 'pendentes' e situação (na
+#                    tabela) dos ingressos dela
+#   'contabilidade'- relógio lógico, tempos de espera, atendidos, próximo id,
+#                    linhas novas da tabela, estatísticas e índices de nomes
+#                    e posições
+# Compras de categorias diferentes não disputam a mesma trava de fila, e o
+# trabalho da catraca em si (abrir, passar o visitante) fica fora de todas.
+# Uma compra pega o id e entra no deque sob a trava da fila, então cada
+# deque fica em ordem de id (o POSICAO, em posicoes.py, conta com isso).
+#
+# Como a escolha e a retirada não são atômicas, duas catracas podem
+# escolher a mesma categoria ao mesmo tempo; a segunda atende o próximo
+# dela (ou escolhe de novo, se ela esvaziou). Com n catracas, a ordem entre
+# categorias pode diferir da sequencial em até n - 1 atendimentos.
+#
+# As operações da portaria não entram no histórico de DESFAZER (como uma
+# catraca de verdade); MODO e POLITICA devem ser trocados com as catracas paradas.
+import threading
+
+import colunas
+import escalonador
+import fila
+import ingressos
+
+
+def criar_portaria(estado):
+    """Cria as travas da portaria para um estado de fila.criar_estado()."""
+    return {
+        'estado': estado,
+        'escalonador': threading.Lock(),
+        'filas': {nome_fila: threading.Lock() for nome_fila in estado['filas']},
+        'contabilidade': threading.Lock(),
+    }
+
+
+def comprar(portaria, nome, categoria):
+    """
+    COMPRAR concorrente. Retorna o ingresso criado, ou None se a categoria
+    não existir.
+    """
+    estado = portaria['estado']
+    categoria = categoria.upper()
+    if categoria not in estado['escalonador']['categorias']:
+        return None
+
+    nome_fila = fila._nome_fila(estado, categoria)
+    with portaria['filas'][nome_fila]:
+        # O id sai sob a trava da fila: outra compra da mesma fila não entra no meio
+        with portaria['contabilidade']:
+            id_ingresso = estado['proximo_id']
+            estado['proximo_id'] += 1
+            ingresso = ingressos.Ingresso(id_ingresso, nome, categoria, estado['relogio_logico'])
+            estado['ingressos'].acrescentar(ingresso)
+            ingressos.contar_pendente(estado['estatisticas'], categoria)
+            estado['indice_nomes'].adicionar(id_ingresso)
+            estado['posicoes'].incluir(id_ingresso, categoria)
+        estado['filas'][nome_fila].append(id_ingresso)
+        estado['pendentes'][nome_fila] += 1
+        primeiro = estado['pendentes'][nome_fila] == 1
+
+    if primeiro:
+        # A fila deixou de estar vazia: a categoria volta para a heap
+        with portaria['escalonador']:
+            escalonador.notificar(estado, categoria)
+    return ingresso
+
+
+def atender(portaria):
+    """
+    ENTRAR concorrente: escolhe a fila pela política configurada e retira o
+    próximo visitante. Retorna o ingresso atendido (com tempo_espera) ou None.
+    """
+    estado = portaria['estado']
+    tabela = estado['ingressos']
+    while True:
+        with portaria['escalonador']:
+            nome_fila = fila._nome_proxima_fila(estado)
+        if nome_fila is None:
+            return None
+        with portaria['filas'][nome_fila]:
+            # Outra catraca ou um CANCELAR pode ter esvaziado a fila depois da escolha
+            if not estado['pendentes'][nome_fila]:
+                continue
+            atual = estado['filas'][nome_fila]
+            fila._descartar_lapides(estado, atual)
+            id_ingresso = atual.popleft()
+            estado['pendentes'][nome_fila] -= 1
+            tabela.situacao[id_ingresso] = colunas.ATENDIDO
+        break
+
+    categoria = tabela.categoria(id_ingresso)
+    with portaria['escalonador']:
+        escalonador.consumir(estado, categoria)
+
+    with portaria['contabilidade']:
+        estado['relogio_logico'] += 1
+        tempo_espera = estado['relogio_logico'] - tabela.chegadas[id_ingresso]
+        estado['tempo_total_espera'] += tempo_espera
+        estado['contador_atendido'] += 1
+        tabela.esperas[id_ingresso] = tempo_espera
+        estado['atendidos'].append(id_ingresso)
+        estado['posicoes'].excluir(id_ingresso, categoria)
+        ingressos.contar_atendido(estado['estatisticas'], categoria, tempo_espera,
+                                  minuto=estado['relogio_logico'])
+    return tabela.ingresso(id_ingresso)
+
+
+def cancelar(portaria, id_cancelar):
+    """CANCELAR concorrente. Retorna o ingresso cancelado ou None."""
+    estado = portaria['estado']
+    tabela = estado['ingressos']
+    if not fila.pendente(estado, id_cancelar):
+        return None
+
+    categoria = tabela.categoria(id_cancelar)
+    nome_fila = fila._nome_fila(estado, categoria)
+    with portaria['filas'][nome_fila]:
+        # Confere de novo sob a trava: uma catraca pode tê-lo atendido
+        if tabela.situacao[id_cancelar] != colunas.PENDENTE:
+            return None
+        tabela.situacao[id_cancelar] = colunas.CANCELADO
+        estado['cancelados'].add(id_cancelar)
+        estado['pendentes'][nome_fila] -= 1
+        if len(estado['filas'][nome_fila]) > 2 * estado['pendentes'][nome_fila] + 32:
+            fila._compactar_fila(estado, nome_fila)
+
+    with portaria['contabilidade']:
+        ingressos.contar_pendente(estado['estatisticas'], categoria, -1)
+        estado['indice_nomes'].remover(id_cancelar)
+        estado['posicoes'].excluir(id_cancelar, categoria)
+    return tabela.ingresso(id_cancelar)
+
+
+# --- TESTE DE CARGA: vazão por número de catracas ---
+
+def _catraca(portaria, tempo_catraca, atendidos):
+    import time
+
+    contagem = 0
+    while atender(portaria) is not None:
+        contagem += 1
+        time.sleep(tempo_catraca)  # a catraca abre e o visitante passa
+    atendidos.append(contagem)
+
+
+def conferir(estado):
+    """Confere a consistência do estado depois da carga. Retorna a lista de problemas."""
+    problemas = []
+    ids = list(estado['atendidos'])
+    if len(ids) != len(set(ids)):
+        problemas.append("ingresso atendido mais de uma vez")
+    if estado['relogio_logico'] != len(ids) or estado['contador_atendido'] != len(ids):
+        problemas.append("relógio lógico/contador diferente do número de atendidos")
+    esperas = estado['ingressos'].esperas
+    if estado['tempo_total_espera'] != sum(esperas[id_ingresso] for id_ingresso in ids):
+        problemas.append("tempo total de espera diferente da soma dos atendidos")
+    conferencia = ingressos.recalcular_estatisticas(estado)
+    for chave in ("total_pendente", "total_atendido", "tempo_total_espera",
+                  "pendente_por_categoria", "atendido_por_categoria"):
+        if conferencia[chave] != estado['estatisticas'][chave]:
+            problemas.append(f"estatística '{chave}' divergente")
+    for nome_fila, atual in estado['filas'].items():
+        ids_fila = list(fila._iterar_fila(estado, atual))
+        if len(ids_fila) != estado['pendentes'][nome_fila]:
+            problemas.append(f"pendentes de {nome_fila} divergentes")
+        if ids_fila != sorted(ids_fila):
+            problemas.append(f"{nome_fila} fora da ordem de id")
+    for categoria, contagem in estado['posicoes'].contagens.items():
+        if contagem.total != conferencia['pendente_por_categoria'][categoria]:
+            problemas.append(f"posições de {categoria} divergentes")
+    return problemas
+
+
+def teste_carga(catracas=(1, 2, 4, 8, 16), ingressos_por_teste=4_000, tempo_catraca=0.0005,
+                politica='ENVELHECIMENTO'):
+    """
+    Para cada número de catracas: enche a fila, solta as catracas junto com
+    um vendedor (COMPRAR) e um cancelador concorrentes e mede a vazão.
+    Retorna [(catracas, atendidos, segundos, atendidos/s, problemas)].
+    """
+    import random
+    import time
+
+    categorias = list(escalonador.CATEGORIAS)
+    resultados = []
+    for quantidade in catracas:
+        sorteio = random.Random(quantidade)
+        estado = fila.criar_estado(politica=politica)
+        fila._transicao_modo(estado, 'PRIORIDADE')
+        portaria = criar_portaria(estado)
+        for i in range(ingressos_por_teste):
+            comprar(portaria, f"Visitante{i}", sorteio.choice(categorias))
+
+        def vendedor():
+            for i in range(ingressos_por_teste // 4):
+                comprar(portaria, f"Extra{i}", sorteio.choice(categorias))
+
+        def cancelador():
+            for _ in range(ingressos_por_teste // 10):
+                cancelar(portaria, sorteio.randint(1, ingressos_por_teste))
+
+        contagens = []
+        threads = [threading.Thread(target=_catraca, args=(portaria, tempo_catraca, contagens))
+                   for _ in range(quantidade)]
+        threads += [threading.Thread(target=vendedor), threading.Thread(target=cancelador)]
+        inicio = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # O vendedor pode terminar depois das catracas: atende o que sobrou
+        while atender(portaria) is not None:
+            contagens.append(1)
+        tempo = time.perf_counter() - inicio
+
+        total = sum(contagens)
+        resultados.append((quantidade, total, tempo, total / tempo, conferir(estado)))
+    return resultados
+
+
+def main():
+    print("=== PORTARIA: vazão por número de catracas ===")
+    print("(cada catraca leva 0,5 ms para o visitante passar; fila em MODO PRIORIDADE)")
+    base = None
+    for quantidade, total, tempo, vazao, problemas in teste_carga():
+        base = base or vazao
+        estado = "OK" if not problemas else "; ".join(problemas)
+        print(f"{quantidade:>3} catraca(s): {total} atendidos em {tempo:.2f} s "
+              f"-> {vazao:,.0f}/s ({vazao / base:.1f}x)  consistência: {estado}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# posicoes.py
+# Posição de um ingresso na ordem de atendimento em O(log n), para o
+# POSICAO <id>, sem percorrer os deques.
+#
+# Uma árvore de Fenwick por categoria conta os ingressos pendentes por id
+# (o id é o número de chegada). Dentro de uma categoria os pendentes sempre
+# saem em ordem de id, nos dois modos; o que muda é como as categorias se
+# intercalam:
+#   PADRAO: a fila_padrao tem primeiro os ingressos que já existiam na última
+#     troca para PADRAO (id < limite), agrupados pela ordem das categorias,
+#     e depois os comprados desde então, por id.
+#   PRIORIDADE ESTRITA: todas as categorias de prioridade maior vêm antes.
+#   PRIORIDADE ENVELHECIMENTO: ordem de (chegada + atraso, prioridade, id);
+#     como a chegada não diminui com o id, os que passam na frente em cada
+#     categoria são um prefixo dela, achado por bisect na coluna de chegadas
+#     da tabela (colunas.Tabela).
+#   PRIORIDADE PONDERADA: as rodadas do rodízio são contadas por aritmética,
+#     em O(k) para k categorias, a partir do cursor e crédito atuais.
+# A posição considera a fila como está: compras e cancelamentos posteriores
+# podem mudá-la.
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from operator import add
+
+CAPACIDADE_INICIAL = 64
+
+
+def _zeros(quantidade):
+    return array('i', bytes(4 * quantidade))
+
+
+class ContagemIds:
+    """
+    Árvore de Fenwick de contagens por id (1, 2, ...) num array de inteiros
+    de 4 bytes (uma lista gastaria 8 por nó, mais o int dos nós grandes);
+    cresce dobrando.
+    """
+
+    __slots__ = ("arvore", "total")
+
+    def __init__(self):
+        self.arvore = _zeros(CAPACIDADE_INICIAL + 1)
+        self.total = 0
+
+    def somar(self, id_ingresso, delta):
+        arvore = self.arvore
+        while id_ingresso >= len(arvore):
+            # Dobrar a capacidade (potência de 2): os nós novos cobrem só ids
+            # vazios, exceto o último, que cobre tudo
+            capacidade = len(arvore) - 1
+            arvore.extend(_zeros(capacidade))
+            arvore[2 * capacidade] = self.total
+        tamanho = len(arvore)
+        while id_ingresso < tamanho:
+            arvore[id_ingresso] += delta
+            id_ingresso += id_ingresso & -id_ingresso
+        self.total += delta
+
+    def somar_faixa(self, ids, delta):
+        """
+        Soma delta a cada id de `ids` (crescentes) de uma vez: só os nós da
+        faixa [primeiro, último] e os acima do último mudam, então o custo é
+        O(último - primeiro + log n), em vez de O(k log n) com somar().
+        """
+        primeiro, ultimo = ids[0], ids[-1]
+        arvore = self.arvore
+        while ultimo >= len(arvore):
+            capacidade = len(arvore) - 1
+            arvore.extend(_zeros(capacidade))
+            arvore[2 * capacidade] = self.total
+        # acumulado[k] = quantos ids em [primeiro, primeiro + k)
+        marcas = [0] * (ultimo - primeiro + 2)
+        for id_ingresso in ids:
+            marcas[id_ingresso - primeiro + 1] = delta
+        acumulado = list(accumulate(marcas))
+        # O nó `no` cobre (no - lowbit(no), no]; a parte antes de `primeiro` não conta
+        base = primeiro - 1
+        inicios = [no - (no & -no) - base for no in range(primeiro, ultimo + 1)]
+        somas = [acumulado[fim] - (acumulado[inicio] if inicio > 0 else 0)
+                 for fim, inicio in enumerate(inicios, 1)]
+        arvore[primeiro:ultimo + 1] = array('i', map(add, arvore[primeiro:ultimo + 1], somas))
+        no = ultimo + (ultimo & -ultimo)
+        while no < len(arvore):
+            inicio = no - (no & -no) - base
+            arvore[no] += acumulado[-1] - (acumulado[inicio] if inicio > 0 else 0)
+            no += no & -no
+        self.total += delta * len(ids)
+
+    def ate(self, id_ingresso):
+        """Quantos ids <= id_ingresso foram contados."""
+        arvore = self.arvore
+        if id_ingresso >= len(arvore):
+            return self.total
+        soma = 0
+        while id_ingresso > 0:
+            soma += arvore[id_ingresso]
+            id_ingresso &= id_ingresso - 1
+        return soma
+
+
+class OrdemAtendimento:
+    """Contagens de pendentes por categoria e o limite do PADRAO; as chegadas vêm da tabela."""
+
+    __slots__ = ("contagens", "tabela", "limite")
+
+    def __init__(self, categorias, tabela):
+        self.contagens = {categoria: ContagemIds() for categoria in categorias}
+        # tabela.chegadas[id] = chegada_logica do ingresso id (não diminui com o id)
+        self.tabela = tabela
+        # Ids menores que o limite estavam nas filas na última troca para PADRAO
+        self.limite = 1
+
+    def incluir(self, id_ingresso, categoria):
+        """O ingresso passou a estar pendente (compra, DESFAZER de ENTRAR/CANCELAR)."""
+        self.contagens[categoria].somar(id_ingresso, 1)
+
+    def excluir(self, id_ingresso, categoria):
+        """O ingresso deixou de estar pendente (atendido, cancelado ou compra desfeita)."""
+        self.contagens[categoria].somar(id_ingresso, -1)
+
+    def incluir_lote(self, grupos):
+        """Versão em lote de incluir(): grupos = {categoria: ids crescentes} (IMPORTAR)."""
+        for categoria, ids in grupos.items():
+            self.contagens[categoria].somar_faixa(ids, 1)
+
+    def excluir_lote(self, grupos):
+        """Inversa de incluir_lote()."""
+        for categoria, ids in grupos.items():
+            self.contagens[categoria].somar_faixa(ids, -1)
+
+    def posicao(self, estado, id_ingresso):
+        """Posição (1 = o próximo) de um ingresso pendente na ordem de atendimento."""
+        categoria = self.tabela.categoria(id_ingresso)
+        contagens = self.contagens
+        esc = estado['escalonador']
+        ordem = esc['ordem']
+        if estado['modo_atendimento'] == 'PADRAO':
+            if id_ingresso < self.limite:
+                antes = ordem[:ordem.index(categoria)]
+                frente = sum(contagens[cat].ate(self.limite - 1) for cat in antes)
+                return frente + contagens[categoria].ate(id_ingresso - 1) + 1
+            return sum(contagem.ate(id_ingresso - 1) for contagem in contagens.values()) + 1
+
+        na_frente = contagens[categoria].ate(id_ingresso - 1)
+        if esc['politica'] == 'PONDERADA':
+            return _posicao_rodizio(esc, contagens, categoria, na_frente)
+        params = esc['categorias']
+        prioridade = params[categoria]['prioridade']
+        if esc['politica'] == 'ESTRITA':
+            # Empates de prioridade saem pelo nome da categoria, como na heap
+            return na_frente + 1 + sum(
+                contagens[cat].total for cat in ordem
+                if (params[cat]['prioridade'], cat) < (prioridade, categoria))
+
+        # ENVELHECIMENTO
+        chegadas = self.tabela.chegadas
+        chave = chegadas[id_ingresso] + params[categoria]['atraso']
+        for cat in ordem:
+            if cat == categoria:
+                continue
+            alvo = chave - params[cat]['atraso']
+            # Maior id com chegada <= alvo (ou < alvo); a linha 0 da tabela não conta
+            if params[cat]['prioridade'] < prioridade:
+                ultimo = bisect_right(chegadas, alvo, 1) - 1
+            elif params[cat]['prioridade'] > prioridade:
+                ultimo = bisect_left(chegadas, alvo, 1) - 1
+            else:
+                # Mesma chave e prioridade: desempata pelo id
+                ultimo = max(bisect_left(chegadas, alvo, 1) - 1,
+                             min(bisect_right(chegadas, alvo, 1) - 1, id_ingresso - 1))
+            na_frente += contagens[cat].ate(ultimo)
+        return na_frente + 1
+
+
+def _posicao_rodizio(esc, contagens, categoria, na_frente):
+    """
+    PONDERADA: a categoria do cursor termina a vez com o crédito que resta;
+    depois cada rodada dá até max(peso, 1) atendimentos a cada categoria, a
+    partir da seguinte ao cursor (ver escalonador._escolher_rodizio).
+    """
+    ordem = esc['ordem']
+    cursor = esc['cursor']
+    atual = ordem[cursor]
+    restantes = {cat: contagens[cat].total for cat in ordem}
+    primeiros = min(esc['credito'], restantes[atual]) if esc['credito'] > 0 else 0
+    if categoria == atual:
+        if na_frente < primeiros:
+            return na_frente + 1
+        na_frente -= primeiros
+    restantes[atual] -= primeiros
+
+    pesos = {cat: max(1, esc['categorias'][cat]['peso']) for cat in ordem}
+    rodadas = na_frente // pesos[categoria]  # rodadas completas antes da dele
+    vez = (ordem.index(categoria) - cursor - 1) % len(ordem)
+    posicao = primeiros + na_frente + 1
+    for indice, cat in enumerate(ordem):
+        if cat == categoria:
+            continue
+        atendidos = min(restantes[cat], rodadas * pesos[cat])
+        if (indice - cursor - 1) % len(ordem) < vez:
+            # Vem antes dele na rodada em que ele é atendido
+            atendidos += min(pesos[cat], restantes[cat] - atendidos)
+        posicao += atendidos
+    return posicao
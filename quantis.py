@@ -0,0 +1,155 @@
+# quantis.py
+# Percentis e janelas de tempo dos tempos de espera, mantidos a cada
+# atendimento (ver ingressos.contar_atendido), sem guardar as esperas uma a uma.
+#
+# EsbocoQuantis: histograma com baldes logarítmicos (como o DDSketch). Esperas
+#   até LIMITE_EXATO minutos têm um balde cada (valor exato); acima disso, o
+#   balde i cobre (γ^(i-1), γ^i], então o percentil tem erro relativo de no
+#   máximo ERRO_RELATIVO. Inserir e remover (DESFAZER) custam O(1) e a memória
+#   é limitada pelo número de baldes (~550 para esperas de até 1 ano).
+# Janela: os atendimentos dos últimos MINUTOS_JANELA minutos do relógio
+#   lógico; responde pelos últimos N minutos (N <= MINUTOS_JANELA) olhando
+#   só os atendimentos da janela. Registrar custa O(1) amortizado.
+import heapq
+import math
+from collections import deque
+
+ERRO_RELATIVO = 0.01
+LIMITE_EXATO = 128
+MINUTOS_JANELA = 1440  # um dia de festival
+
+_GAMA = (1 + ERRO_RELATIVO) / (1 - ERRO_RELATIVO)
+_LOG_GAMA = math.log(_GAMA)
+_PRIMEIRO_LOG = math.ceil(math.log(LIMITE_EXATO + 1) / _LOG_GAMA)
+
+
+def balde(valor):
+    """Balde de um valor inteiro não negativo (a ordem dos baldes é a dos valores)."""
+    if valor <= LIMITE_EXATO:
+        return valor
+    return LIMITE_EXATO + 1 + math.ceil(math.log(valor) / _LOG_GAMA) - _PRIMEIRO_LOG
+
+
+def _representante(balde):
+    """
+    Valor que representa o balde: o exato, ou o meio relativo 2ab/(a+b) do
+    intervalo (a, b], que fica a no máximo ERRO_RELATIVO de qualquer valor do
+    balde. Não é arredondado: um inteiro perto do meio pode passar do limite.
+    """
+    if balde <= LIMITE_EXATO:
+        return balde
+    expoente = balde - LIMITE_EXATO - 1 + _PRIMEIRO_LOG
+    inicio = max(LIMITE_EXATO + 1, _GAMA ** (expoente - 1))
+    fim = _GAMA ** expoente
+    return 2 * inicio * fim / (inicio + fim)
+
+
+class EsbocoQuantis:
+    """Contagem de valores inteiros não negativos por balde; aceita remoção."""
+
+    __slots__ = ("baldes", "total")
+
+    def __init__(self):
+        self.baldes = {}
+        self.total = 0
+
+    def adicionar(self, valor, vezes=1):
+        """Conta `valor` (vezes=-1 desfaz uma contagem anterior)."""
+        self._somar(valor if valor <= LIMITE_EXATO else balde(valor), vezes)
+
+    def remover(self, valor):
+        self.adicionar(valor, -1)
+
+    def _somar(self, indice, vezes):
+        baldes = self.baldes
+        restante = baldes.get(indice, 0) + vezes
+        if restante:
+            baldes[indice] = restante
+        else:
+            del baldes[indice]
+        self.total += vezes
+
+    def combinar(self, outro):
+        """Soma as contagens de outro esboço a este."""
+        for indice, quantidade in outro.baldes.items():
+            self._somar(indice, quantidade)
+        return self
+
+    def quantis(self, fracoes):
+        """Valores nas frações pedidas (ex.: 0.5, 0.99), pelo posto mais próximo.
+        Retorna None para cada fração se o esboço estiver vazio.
+        """
+        if self.total <= 0:
+            return [None] * len(fracoes)
+        postos = [max(1, math.ceil(fracao * self.total)) for fracao in fracoes]
+        resultados = [None] * len(fracoes)
+        pendentes = sorted(range(len(fracoes)), key=postos.__getitem__)
+        acumulado = 0
+        proximo = 0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            while proximo < len(pendentes) and postos[pendentes[proximo]] <= acumulado:
+                resultados[pendentes[proximo]] = _representante(indice)
+                proximo += 1
+            if proximo == len(pendentes):
+                break
+        return resultados
+
+    def quantil(self, fracao):
+        return self.quantis((fracao,))[0]
+
+
+class Janela:
+    """
+    Atendimentos dos últimos `minutos` do relógio lógico, como
+    (minuto, categoria, espera) em ordem de minuto. Os mais antigos saem
+    conforme o relógio anda (no máximo um por minuto, já que cada ENTRAR
+    avança o relógio); o DESFAZER retira o mais recente.
+    """
+
+    __slots__ = ("eventos", "minutos")
+
+    def __init__(self, minutos=MINUTOS_JANELA):
+        self.eventos = deque()
+        self.minutos = minutos
+
+    def registrar(self, minuto, categoria, espera, sinal=1):
+        """Conta (sinal=1) ou desconta (sinal=-1) um atendimento feito em `minuto`."""
+        eventos = self.eventos
+        if sinal < 0:
+            if eventos and eventos[-1][0] == minuto:
+                eventos.pop()
+            return
+        eventos.append((minuto, categoria, espera))
+        limite = minuto - self.minutos
+        while eventos[0][0] <= limite:
+            eventos.popleft()
+
+    def combinar(self, outra):
+        """Junta os atendimentos de outra janela (ex.: de outro fragmento) a esta."""
+        eventos = deque(heapq.merge(self.eventos, outra.eventos))
+        if eventos:
+            limite = eventos[-1][0] - self.minutos
+            while eventos[0][0] <= limite:
+                eventos.popleft()
+        self.eventos = eventos
+        return self
+
+    def resumo(self, minuto_atual, minutos):
+        """
+        Junta os atendimentos dos minutos (minuto_atual - minutos, minuto_atual].
+        Retorna (atendidos por categoria, soma das esperas, esboço).
+        """
+        limite = minuto_atual - min(minutos, self.minutos)
+        por_categoria = {}
+        soma = 0
+        esboco = EsbocoQuantis()
+        for minuto, categoria, espera in reversed(self.eventos):
+            if minuto <= limite:
+                break
+            if minuto > minuto_atual:
+                continue
+            por_categoria[categoria] = por_categoria.get(categoria, 0) + 1
+            soma += espera
+            esboco.adicionar(espera)
+        return por_categoria, soma, esboco
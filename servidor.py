@@ -0,0 +1,281 @@
+# servidor.py
+# Servidor TCP (asyncio) com o mesmo protocolo de linhas do terminal, para
+# vários quiosques de venda compartilharem uma única bilheteria.
+#
+# Protocolo: o cliente envia um comando por linha (COMPRAR Ana VIP, ENTRAR,
+# LISTAR, ...). Para cada comando o servidor responde com a saída que o
+# terminal mostraria, seguida de uma linha contendo só "." (linhas da saída
+# que começam com "." recebem um "." extra, como no SMTP). As respostas saem
+# na ordem dos comandos, então o cliente pode enviar vários sem esperar
+# (pipelining). SAIR responde e fecha a conexão.
+#
+# Os quiosques só vendem e atendem: o servidor aceita apenas os verbos de
+# VERBOS_PERMITIDOS. Ficam de fora os que leem ou gravam arquivos no
+# servidor (IMPORTAR, ESTANDES, METRICAS), os que controlam o processo e
+# os que dependem de quem enviou o comando anterior (DESFAZER/REFAZER e a
+# navegação IR/VOLTAR/AVANCAR usam históricos e um local únicos, que
+# seriam compartilhados entre todos os quiosques).
+#
+# Todos os comandos rodam no laço de eventos, um de cada vez e sem "await"
+# no meio, então as alterações no estado compartilhado (fila, pilhas,
+# históricos) ficam naturalmente serializadas, sem travas.
+#
+# Uso:
+#   python servidor.py [--host 127.0.0.1] [--porta 7777] [--diario DIR] [--metricas ARQ]
+#   python servidor.py --carga --conexoes 1000 --comandos 50 --pipeline 8
+#   python servidor.py --carga --local        # sobe um servidor só para o teste
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+
+import comandos
+import metricas
+import persistencia
+
+PORTA_PADRAO = 7777
+FIM_RESPOSTA = b".\n"
+TAMANHO_MAXIMO_LINHA = 1 << 16
+
+VERBOS_PERMITIDOS = frozenset((
+    "COMPRAR", "ENTRAR", "ESPIAR", "CANCELAR", "LISTAR", "BUSCAR", "POSICAO", "ESTATISTICAS", "SAIR",
+))
+
+
+class _Captura:
+    """Recebe a saída de um comando (no lugar de sys.stdout)."""
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, texto):
+        self.partes.append(texto)
+        return len(texto)
+
+    def flush(self):
+        pass
+
+    def resposta(self):
+        texto = "".join(self.partes)
+        self.partes = []
+        if texto.endswith("\n"):
+            texto = texto[:-1]
+        linhas = texto.split("\n") if texto else []
+        corpo = "".join(("." + linha if linha.startswith(".") else linha) + "\n" for linha in linhas)
+        return corpo.encode("utf-8") + FIM_RESPOSTA
+
+
+def criar_bilheteria(diretorio_dados=None):
+    """Estado compartilhado do servidor: contexto, diário (opcional) e contadores."""
+    diario = None
+    if diretorio_dados is None:
+        ctx = comandos.criar_contexto()
+    else:
+        ctx, diario, _ = persistencia.abrir(diretorio_dados)
+    return {"ctx": ctx, "diario": diario, "conexoes": 0, "comandos": 0}
+
+
+def executar_linha(bilheteria, linha):
+    """
+    Executa um comando sobre o estado compartilhado e retorna
+    (resposta em bytes, continuar). Síncrono: roda inteiro sem ceder o laço.
+    """
+    captura = _Captura()
+    partes = linha.split(None, 1)
+    if partes and partes[0].upper() not in VERBOS_PERMITIDOS:
+        captura.write(f"ERRO: Comando '{partes[0].upper()}' não é aceito pelo servidor. "
+                      f"Use {', '.join(sorted(VERBOS_PERMITIDOS))}.\n")
+        bilheteria["comandos"] += 1
+        return captura.resposta(), True
+    stdout_original = sys.stdout
+    sys.stdout = captura
+    try:
+        if bilheteria["diario"] is None:
+            continuar = comandos.executar(bilheteria["ctx"], linha)
+        else:
+            continuar = persistencia.executar(bilheteria["ctx"], bilheteria["diario"], linha)
+    finally:
+        sys.stdout = stdout_original
+    bilheteria["comandos"] += 1
+    return captura.resposta(), continuar
+
+
+async def atender_conexao(bilheteria, leitor, escritor):
+    bilheteria["conexoes"] += 1
+    resto = b""
+    try:
+        continuar = True
+        while continuar:
+            dados = await leitor.read(1 << 16)
+            if not dados:
+                break
+            # Processa de uma vez todas as linhas completas que já chegaram
+            # (pipelining) e só então espera o envio das respostas.
+            linhas = (resto + dados).split(b"\n")
+            resto = linhas.pop()
+            if len(resto) > TAMANHO_MAXIMO_LINHA:
+                escritor.write(b"ERRO: Linha longa demais.\n" + FIM_RESPOSTA)
+                break
+            for linha in linhas:
+                resposta, continuar = executar_linha(bilheteria, linha.decode("utf-8", "replace"))
+                escritor.write(resposta)
+                if not continuar:
+                    break
+            if bilheteria["diario"] is not None:
+                # Só confirma ao cliente o que já está no disco
+                bilheteria["diario"].sincronizar()
+            await escritor.drain()
+    except ConnectionError:
+        pass
+    finally:
+        bilheteria["conexoes"] -= 1
+        escritor.close()
+
+
+async def servir(host="127.0.0.1", porta=PORTA_PADRAO, diretorio_dados=None):
+    bilheteria = criar_bilheteria(diretorio_dados)
+    servidor = await asyncio.start_server(
+        lambda leitor, escritor: atender_conexao(bilheteria, leitor, escritor),
+        host, porta, backlog=4096,
+    )
+    print(f"Servidor da bilheteria ouvindo em {host}:{porta}", flush=True)
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        metricas.gravar_agora(bilheteria["ctx"])
+        if bilheteria["diario"] is not None:
+            bilheteria["diario"].fechar()
+
+
+# --- CLIENTE DE CARGA ---
+
+def _linha_aleatoria(sorteio, proximo_id):
+    x = sorteio.random()
+    if x < 0.45:
+        return f"COMPRAR Quiosque{sorteio.randint(1, 500)} {sorteio.choice(('VIP', 'INTEIRA', 'MEIA'))}"
+    if x < 0.75:
+        return "ENTRAR"
+    if x < 0.85:
+        return "ESPIAR"
+    if x < 0.92:
+        return f"CANCELAR {sorteio.randint(1, max(1, proximo_id))}"
+    return "ESTATISTICAS"
+
+
+async def _cliente(host, porta, quantidade, pipeline, semente, latencias):
+    sorteio = random.Random(semente)
+    leitor, escritor = await asyncio.open_connection(host, porta, limit=1 << 20)
+    enviados = []  # instante de envio dos comandos ainda sem resposta
+    feitos = 0
+    try:
+        while feitos < quantidade:
+            while len(enviados) < pipeline and feitos + len(enviados) < quantidade:
+                linha = _linha_aleatoria(sorteio, semente * 10 + feitos)
+                escritor.write(linha.encode("utf-8") + b"\n")
+                enviados.append(time.perf_counter())
+            await escritor.drain()
+            # Lê uma resposta completa (até a linha ".")
+            while (await leitor.readline()) != FIM_RESPOSTA:
+                pass
+            latencias.append(time.perf_counter() - enviados.pop(0))
+            feitos += 1
+    finally:
+        escritor.close()
+
+
+async def carga(host="127.0.0.1", porta=PORTA_PADRAO, conexoes=100, comandos_por_conexao=100,
+                pipeline=1, semente=1):
+    """
+    Abre `conexoes` conexões simultâneas; cada uma envia comandos aleatórios
+    mantendo até `pipeline` comandos sem resposta. Retorna o resumo.
+    """
+    latencias = []
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(
+        *(_cliente(host, porta, comandos_por_conexao, pipeline, semente + i, latencias)
+          for i in range(conexoes)),
+        return_exceptions=True,
+    )
+    tempo = time.perf_counter() - inicio
+    falhas = [r for r in resultados if isinstance(r, BaseException)]
+
+    latencias.sort()
+
+    def _percentil(p):
+        if not latencias:
+            return 0.0
+        return latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000
+
+    return {
+        "conexoes": conexoes,
+        "falhas": len(falhas),
+        "comandos": len(latencias),
+        "tempo": tempo,
+        "comandos_por_s": len(latencias) / tempo if tempo > 0 else 0,
+        "p50_ms": _percentil(0.50),
+        "p99_ms": _percentil(0.99),
+        "max_ms": latencias[-1] * 1000 if latencias else 0.0,
+    }
+
+
+def exibir_carga(resumo):
+    print("\n=== TESTE DE CARGA ===")
+    print(f"Conexões: {resumo['conexoes']} (falhas: {resumo['falhas']})")
+    print(f"Comandos respondidos: {resumo['comandos']} em {resumo['tempo']:.2f} s "
+          f"({resumo['comandos_por_s']:.0f} comandos/s)")
+    print(f"Latência: p50 {resumo['p50_ms']:.2f} ms | p99 {resumo['p99_ms']:.2f} ms | "
+          f"máx {resumo['max_ms']:.2f} ms")
+
+
+def _subir_servidor_local(porta):
+    """Sobe um servidor em outro processo (para não dividir a CPU com o cliente)."""
+    processo = subprocess.Popen([sys.executable, __file__, "--porta", str(porta)],
+                                stdout=subprocess.PIPE, text=True)
+    processo.stdout.readline()  # "Servidor da bilheteria ouvindo em ..."
+    return processo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor TCP da bilheteria")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--diario", metavar="DIRETORIO",
+                        help="grava diário e snapshots em DIRETORIO (ver persistencia.py)")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="liga a coleta de métricas e grava ARQUIVO no formato do Prometheus")
+    parser.add_argument("--intervalo-metricas", type=float, default=metricas.INTERVALO_PADRAO,
+                        metavar="S", help="segundos entre gravações do arquivo de métricas (padrão: 15)")
+    parser.add_argument("--carga", action="store_true", help="roda o cliente de carga")
+    parser.add_argument("--local", action="store_true",
+                        help="com --carga: sobe um servidor próprio para o teste")
+    parser.add_argument("--conexoes", type=int, default=1000)
+    parser.add_argument("--comandos", type=int, default=50, help="comandos por conexão")
+    parser.add_argument("--pipeline", type=int, default=1,
+                        help="comandos enviados sem esperar resposta, por conexão")
+    args = parser.parse_args(argv)
+
+    if not args.carga:
+        if args.metricas is not None:
+            metricas.configurar(args.metricas, args.intervalo_metricas)
+        try:
+            asyncio.run(servir(args.host, args.porta, args.diario))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    processo = _subir_servidor_local(args.porta) if args.local else None
+    try:
+        resumo = asyncio.run(carga(args.host, args.porta, args.conexoes, args.comandos, args.pipeline))
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+    exibir_carga(resumo)
+    return 0 if not resumo["falhas"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# sessoes.py
+# Sessões de navegação por visitante (id do ingresso): cada uma tem o seu
+# local atual e as suas pilhas VOLTAR/AVANCAR, e o SESSAO <id> IR/VOLTAR/
+# AVANCAR usa as mesmas funções do Roteiro que o IR/VOLTAR/AVANCAR do
+# terminal, então o comportamento é idêntico.
+#
+# Para caber muitos visitantes ao mesmo tempo (100 mil sessões ativas com
+# históricos cheios ficam em poucas dezenas de MB):
+#   - os locais são os ids internados de Roteiro.id_local (um caminho é
+#     guardado uma vez só, não uma vez por sessão);
+#   - as pilhas são array('I') (4 bytes por local, sem um objeto int por
+#     item) limitadas a MAX_HISTORICO itens: passando disso, o local mais
+#     antigo é esquecido;
+#   - acima de `capacidade` sessões, a usada há mais tempo é descartada
+#     (LRU); o visitante volta a começar na raiz.
+# Criar, mover e descartar sessões atualiza a ocupação dos locais (ver
+# ocupacao.py), quando ela é passada.
+import sys
+from array import array
+from collections import OrderedDict
+
+import estandes
+import fila
+import Roteiro
+
+MAX_HISTORICO = 32
+CAPACIDADE_PADRAO = 200_000
+
+ACOES = ("IR", "VOLTAR", "AVANCAR", "ONDE", "MAPA", "ROTA")
+USO = "Use SESSAO <id> IR <caminho> | VOLTAR | AVANCAR | ONDE | MAPA | ROTA <destino>."
+
+
+class _Pilha(array):
+    """Pilha de ids de local com no máximo MAX_HISTORICO itens."""
+
+    __slots__ = ()
+
+    def append(self, id_local):
+        if len(self) >= MAX_HISTORICO:
+            del self[0]
+        array.append(self, id_local)
+
+    def clear(self):
+        del self[:]
+
+
+class Sessao:
+    """Local atual (id) e pilhas VOLTAR/AVANCAR de um visitante."""
+
+    __slots__ = ("local", "voltar", "avancar")
+
+    def __init__(self):
+        self.local = 0  # a raiz "/"
+        self.voltar = _Pilha("I")
+        self.avancar = _Pilha("I")
+
+
+class Sessoes:
+    """Sessões por id de ingresso, da usada há mais tempo para a mais recente."""
+
+    __slots__ = ("sessoes", "capacidade", "descartadas")
+
+    def __init__(self, capacidade=CAPACIDADE_PADRAO):
+        self.sessoes = OrderedDict()
+        self.capacidade = capacidade
+        self.descartadas = 0
+
+    def __len__(self):
+        return len(self.sessoes)
+
+    def obter(self, id_visitante, ocupacao=None):
+        """Sessão do visitante (criada na primeira vez), marcada como a mais recente."""
+        sessoes = self.sessoes
+        sessao = sessoes.get(id_visitante)
+        if sessao is not None:
+            sessoes.move_to_end(id_visitante)
+            return sessao
+        sessao = sessoes[id_visitante] = Sessao()
+        if ocupacao is not None:
+            ocupacao.chegar(sessao.local)
+        # A sessão recém-criada nunca é a descartada, nem com capacidade < 1
+        if len(sessoes) > max(self.capacidade, 1):
+            _, descartada = sessoes.popitem(last=False)
+            self.descartadas += 1
+            if ocupacao is not None:
+                ocupacao.sair(descartada.local)
+        return sessao
+
+    def locais(self):
+        """Ids dos locais atuais de todas as sessões."""
+        return [sessao.local for sessao in self.sessoes.values()]
+
+    def bytes(self):
+        """Estimativa da memória das sessões (objetos, pilhas e o dicionário)."""
+        tamanho = sys.getsizeof(self.sessoes)
+        for id_visitante, sessao in self.sessoes.items():
+            tamanho += (sys.getsizeof(id_visitante) + sys.getsizeof(sessao)
+                        + sys.getsizeof(sessao.voltar) + sys.getsizeof(sessao.avancar))
+        return tamanho
+
+
+def _ingresso_valido(estado_fila, id_visitante):
+    # Pendente ou já atendido (um cancelado não tem mais sessão)
+    return fila.pendente(estado_fila, id_visitante) or fila.foi_atendido(estado_fila, id_visitante)
+
+
+def comando(sessoes, estado_fila, mapa, ocupacao, id_texto, acao, *args):
+    """
+    SESSAO <id> <IR caminho|VOLTAR|AVANCAR|ONDE|MAPA|ROTA destino>
+    Navegação do visitante dono do ingresso <id>, com local e pilhas próprios.
+    """
+    try:
+        id_visitante = int(id_texto)
+    except ValueError:
+        print(f"ERRO SESSAO: Id '{id_texto}' inválido. {USO}")
+        return
+    acao = acao.upper()
+    if acao not in ACOES:
+        print(f"ERRO SESSAO: Ação '{acao}' inválida. {USO}")
+        return
+    # Como no terminal: IR e ROTA pedem exatamente um argumento e as demais ignoram os extras
+    if acao in ("IR", "ROTA") and len(args) != 1:
+        print(f"ERRO SESSAO: {USO}")
+        return
+    if id_visitante not in sessoes.sessoes and not _ingresso_valido(estado_fila, id_visitante):
+        print(f"ERRO SESSAO: Ingresso '{id_visitante}' não existe.")
+        return
+
+    sessao = sessoes.obter(id_visitante, ocupacao)
+    local = Roteiro.nome_local(sessao.local)
+    if acao == "IR":
+        local, _, _ = Roteiro.ir_local(args[0], local, sessao.voltar, sessao.avancar)
+    elif acao == "VOLTAR":
+        local, _, _ = Roteiro.voltar_local(local, sessao.voltar, sessao.avancar)
+    elif acao == "AVANCAR":
+        local, _, _ = Roteiro.avancar_local(local, sessao.voltar, sessao.avancar)
+    elif acao == "ONDE":
+        Roteiro.onde(local)
+    elif acao == "MAPA":
+        Roteiro.mapa_simples(sessao.voltar, local, sessao.avancar)
+    else:
+        estandes.rota(mapa, local, args[0])
+    novo = Roteiro.id_local(local)
+    if novo != sessao.local:
+        if ocupacao is not None:
+            ocupacao.mover(sessao.local, novo)
+        sessao.local = novo
+
+
+def resumo(sessoes):
+    """SESSOES - quantas sessões estão ativas, quantas foram descartadas e a memória usada."""
+    print(f"SESSOES: {len(sessoes)} ativa(s) (capacidade {sessoes.capacidade}), "
+          f"{sessoes.descartadas} descartada(s) por desuso, ~{sessoes.bytes() / (1 << 20):.1f} MiB.")
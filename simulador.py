@@ -0,0 +1,331 @@
+# simulador.py
+# Simulação de eventos discretos de um dia de festival, para dimensionar as
+# catracas. O relógio lógico da fila (+1 minuto por ENTRAR) não representa
+# rajadas de chegada nem várias catracas atendendo ao mesmo tempo; aqui o
+# tempo é contínuo (minutos) e anda de evento em evento.
+#
+# Eventos numa heap (tempo, tipo, dado):
+#   chegada - a próxima chegada de uma categoria (Poisson ou em rajadas:
+#             grupos chegando juntos, com tamanho médio `rajada`); cada
+#             categoria tem só uma chegada agendada por vez, então a heap fica
+#             com (categorias + catracas) eventos e cada operação é barata.
+#   saida   - uma catraca termina um atendimento e fica livre.
+# A fila é a do núcleo: filas de ids e pendentes de fila.criar_estado(), a escolha
+# da próxima fila por fila._nome_proxima_fila (MODO PADRAO ou PRIORIDADE com
+# a política configurada) e escalonador.consumir/notificar, como na portaria.
+# A chegada de cada ingresso é o minuto simulado (em _Visitantes, no lugar
+# da tabela de ingressos), então o ENVELHECIMENTO compara chegada + atraso
+# no tempo simulado.
+#
+# Resultado: vazão, ocupação das catracas, curva do tamanho da fila
+# (amostrada a cada `intervalo` minutos) e percentis da espera por
+# categoria (quantis.EsbocoQuantis, em segundos).
+#
+# Uso:
+#   python simulador.py [--catracas 4] [--horas 12] [--modo PRIORIDADE]
+#                       [--taxa VIP=2 --rajada MEIA=4] [--servico 10]
+#   python simulador.py --catracas 3,4,5,6     # compara quantidades de catracas
+import argparse
+import heapq
+import math
+import random
+import time
+from array import array
+
+import escalonador
+import fila
+import ingressos
+import quantis
+
+HORAS_PADRAO = 12
+INTERVALO_AMOSTRA = 10  # minutos entre os pontos da curva da fila
+
+# Por categoria: taxa (visitantes por minuto) e tamanho médio dos grupos
+# (rajada 1 = chegadas de Poisson, uma pessoa por vez)
+CHEGADAS_PADRAO = {
+    'VIP': {'taxa': 2.0, 'rajada': 1},
+    'INTEIRA': {'taxa': 8.0, 'rajada': 1},
+    'MEIA': {'taxa': 10.0, 'rajada': 4},
+}
+
+# Tempo de atendimento de uma catraca, em minutos (cv: só para LOGNORMAL)
+SERVICO_PADRAO = {'distribuicao': 'EXPONENCIAL', 'media': 10 / 60, 'cv': 0.5}
+DISTRIBUICOES = ('EXPONENCIAL', 'CONSTANTE', 'LOGNORMAL')
+
+_CHEGADA, _SAIDA = 0, 1
+
+
+class _Visitantes:
+    """Colunas que o escalonador lê da tabela de ingressos (a chegada), mais a categoria."""
+
+    __slots__ = ("chegadas", "indices")
+
+    def __init__(self):
+        # Linha 0 sem visitante, como em colunas.Tabela
+        self.chegadas = array('d', [0.0])
+        self.indices = array('i', [0])  # posição da categoria em `ordem`
+
+
+def _sorteador_servico(servico, sorteio):
+    """Função sem argumentos que sorteia um tempo de atendimento."""
+    media = servico['media']
+    distribuicao = servico['distribuicao']
+    if distribuicao == 'CONSTANTE':
+        return lambda: media
+    if distribuicao == 'EXPONENCIAL':
+        expovariate = sorteio.expovariate
+        taxa = 1 / media
+        return lambda: expovariate(taxa)
+    if distribuicao == 'LOGNORMAL':
+        # Parâmetros da normal subjacente para a média e o cv pedidos
+        sigma = math.sqrt(math.log(1 + servico.get('cv', 0.5) ** 2))
+        mu = math.log(media) - sigma * sigma / 2
+        lognormvariate = sorteio.lognormvariate
+        return lambda: lognormvariate(mu, sigma)
+    raise ValueError(f"Distribuição '{distribuicao}' inválida. Use {', '.join(DISTRIBUICOES)}.")
+
+
+def _sorteador_grupo(rajada, sorteio):
+    """Tamanho de cada grupo que chega: 1, ou geométrico com média `rajada`."""
+    if rajada <= 1:
+        return lambda: 1
+    log_continua = math.log(1 - 1 / rajada)
+    aleatorio = sorteio.random
+    return lambda: 1 + int(math.log(1 - aleatorio()) / log_continua)
+
+
+def simular(chegadas=None, catracas=4, servico=None, horas=HORAS_PADRAO, modo='PADRAO',
+            politica='ESTRITA', categorias=None, semente=1, intervalo=INTERVALO_AMOSTRA):
+    """
+    Simula `horas` de chegadas (depois disso a bilheteria fecha e a fila
+    termina de ser atendida). Retorna um dicionário com os resultados.
+    """
+    chegadas = CHEGADAS_PADRAO if chegadas is None else chegadas
+    servico = {**SERVICO_PADRAO, **(servico or {})}
+    estado = fila.criar_estado(categorias, politica)
+    if modo == 'PRIORIDADE':
+        fila._transicao_modo(estado, 'PRIORIDADE')
+    elif modo != 'PADRAO':
+        raise ValueError(f"Modo '{modo}' inválido. Use PADRAO ou PRIORIDADE.")
+    ordem = [cat for cat in estado['escalonador']['ordem'] if chegadas.get(cat, {}).get('taxa', 0) > 0]
+
+    # Cada processo de chegada e as catracas têm o seu gerador: mudar uma
+    # categoria não muda os sorteios das outras
+    sorteios = [random.Random(f"{semente}:{cat}") for cat in ordem]
+    aleatorios = [sorteio.random for sorteio in sorteios]
+    taxas_grupo = [chegadas[cat]['taxa'] / max(1, chegadas[cat].get('rajada', 1)) for cat in ordem]
+    grupos = [_sorteador_grupo(chegadas[cat].get('rajada', 1), sorteio) for cat, sorteio in zip(ordem, sorteios)]
+    sortear_servico = _sorteador_servico(servico, random.Random(f"{semente}:catracas"))
+    filas_categoria = [estado['filas'][fila._nome_fila(estado, cat)] for cat in ordem]
+    nomes_fila = [fila._nome_fila(estado, cat) for cat in ordem]
+
+    fim_chegadas = horas * 60
+    eventos = []
+    log = math.log
+    for indice, taxa in enumerate(taxas_grupo):
+        # Intervalo exponencial (como random.expovariate, sem a chamada extra)
+        primeiro = -log(1.0 - aleatorios[indice]()) / taxa
+        if primeiro < fim_chegadas:
+            eventos.append((primeiro, _CHEGADA, indice))
+    heapq.heapify(eventos)
+
+    filas = estado['filas']
+    pendentes = estado['pendentes']
+    visitantes = estado['ingressos'] = _Visitantes()
+    chegadas_visitante, indices_visitante = visitantes.chegadas, visitantes.indices
+    proximo_id = 1
+    total_pendente = 0
+    livres = catracas
+    ocupado = 0.0
+    # Contadores por posição da categoria em `ordem`
+    chegaram = [0] * len(ordem)
+    atendidos = [0] * len(ordem)
+    soma_espera = [0.0] * len(ordem)
+    esbocos = [quantis.EsbocoQuantis() for _ in ordem]
+    curva = []
+    proxima_amostra = 0
+    maior_fila = 0
+    agora = 0.0
+
+    heappush, heappop = heapq.heappush, heapq.heappop
+    proxima_fila = fila._nome_proxima_fila
+    consumir = escalonador.consumir
+    contar_espera = [esboco.adicionar for esboco in esbocos]
+    while eventos:
+        agora, tipo, dado = heappop(eventos)
+        # Os pontos da curva até agora valem o tamanho de antes deste evento
+        while proxima_amostra <= agora:
+            curva.append((proxima_amostra, total_pendente))
+            proxima_amostra += intervalo
+
+        if tipo == _CHEGADA:
+            categoria = ordem[dado]
+            quantidade = grupos[dado]()
+            fila_categoria = filas_categoria[dado]
+            nome_fila = nomes_fila[dado]
+            if quantidade == 1:
+                fila_categoria.append(proximo_id)
+                chegadas_visitante.append(agora)
+                indices_visitante.append(dado)
+            else:
+                fila_categoria.extend(range(proximo_id, proximo_id + quantidade))
+                chegadas_visitante.extend(array('d', [agora]) * quantidade)
+                indices_visitante.extend(array('i', [dado]) * quantidade)
+            proximo_id += quantidade
+            pendentes[nome_fila] += quantidade
+            if pendentes[nome_fila] == quantidade:
+                escalonador.notificar(estado, categoria)
+            total_pendente += quantidade
+            chegaram[dado] += quantidade
+            if total_pendente > maior_fila:
+                maior_fila = total_pendente
+            proxima = agora - log(1.0 - aleatorios[dado]()) / taxas_grupo[dado]
+            if proxima < fim_chegadas:
+                heappush(eventos, (proxima, _CHEGADA, dado))
+        else:
+            livres += 1
+
+        # Catracas livres chamam os próximos, pela política da fila
+        while livres and total_pendente:
+            nome_fila = proxima_fila(estado)
+            id_visitante = filas[nome_fila].popleft()
+            pendentes[nome_fila] -= 1
+            total_pendente -= 1
+            indice = indices_visitante[id_visitante]
+            consumir(estado, ordem[indice])
+            espera = agora - chegadas_visitante[id_visitante]
+            atendidos[indice] += 1
+            soma_espera[indice] += espera
+            contar_espera[indice](round(espera * 60))
+            duracao = sortear_servico()
+            ocupado += duracao
+            livres -= 1
+            heappush(eventos, (agora + duracao, _SAIDA, 0))
+
+    return {
+        'catracas': catracas,
+        'modo': modo,
+        'politica': estado['escalonador']['politica'],
+        'horas': horas,
+        'fim': agora,
+        'chegadas': dict(zip(ordem, chegaram)),
+        'atendidos': dict(zip(ordem, atendidos)),
+        'espera_media': {cat: soma_espera[i] / atendidos[i] if atendidos[i] else 0.0 for i, cat in enumerate(ordem)},
+        'esbocos': dict(zip(ordem, esbocos)),
+        'ocupacao': ocupado / (catracas * agora) if agora else 0.0,
+        'maior_fila': maior_fila,
+        'curva': curva,
+    }
+
+
+def _percentis_segundos(esboco):
+    return esboco.quantis(ingressos.PERCENTIS)
+
+
+def _total(resultado):
+    total = quantis.EsbocoQuantis()
+    for esboco in resultado['esbocos'].values():
+        total.combinar(esboco)
+    return total
+
+
+def _formatar(segundos):
+    return "-" if segundos is None else f"{segundos / 60:.1f}"
+
+
+def exibir(resultado, largura=50):
+    """Relatório de uma simulação: resumo, espera por categoria e curva da fila."""
+    atendidos = sum(resultado['atendidos'].values())
+    horas = resultado['fim'] / 60
+    print(f"\n=== SIMULAÇÃO: {resultado['catracas']} catraca(s), {resultado['modo']}"
+          f" ({resultado['politica']}), {resultado['horas']} h de chegadas ===")
+    print(f"Chegadas: {sum(resultado['chegadas'].values()):,}  Atendidos: {atendidos:,}"
+          f"  Última saída: {resultado['fim']:.0f} min")
+    print(f"Vazão: {atendidos / horas if horas else 0:,.0f} por hora  "
+          f"Ocupação das catracas: {resultado['ocupacao']:.0%}  Maior fila: {resultado['maior_fila']:,}")
+
+    titulos = "  ".join(f"p{round(p * 100):<4}" for p in ingressos.PERCENTIS)
+    print(f"\nEspera (min)      média  {titulos}")
+    linhas = [(cat, resultado['espera_media'][cat], resultado['esbocos'][cat]) for cat in resultado['esbocos']]
+    soma = sum(media * resultado['atendidos'][cat] for cat, media, _ in linhas)
+    linhas.append(("Total", soma / atendidos if atendidos else 0.0, _total(resultado)))
+    for nome, media, esboco in linhas:
+        valores = "  ".join(f"{_formatar(valor):<5}" for valor in _percentis_segundos(esboco))
+        print(f"  {nome:<15} {media:5.1f}  {valores}")
+
+    curva = resultado['curva']
+    if curva:
+        maior = max(tamanho for _, tamanho in curva) or 1
+        passo = max(1, len(curva) // 36)  # no máximo ~36 linhas
+        print("\nFila ao longo do dia:")
+        for minuto, tamanho in curva[::passo]:
+            barra = "█" * round(largura * tamanho / maior)
+            print(f"  {int(minuto) // 60:02d}:{int(minuto) % 60:02d} {tamanho:>8,} {barra}")
+
+
+def _pares(valores, nome):
+    """'CAT=valor' -> {CAT: float}."""
+    pares = {}
+    for texto in valores or ():
+        chave, separador, valor = texto.partition("=")
+        if not separador:
+            raise SystemExit(f"{nome}: use CATEGORIA=valor (recebido '{texto}')")
+        pares[chave.strip().upper()] = float(valor)
+    return pares
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulação de um dia de festival (eventos discretos)")
+    parser.add_argument("--catracas", default="4",
+                        help="quantidade de catracas; várias, separadas por vírgula, para comparar")
+    parser.add_argument("--horas", type=float, default=HORAS_PADRAO, help="horas de chegadas")
+    parser.add_argument("--modo", default="PADRAO", choices=("PADRAO", "PRIORIDADE"))
+    parser.add_argument("--politica", default="ESTRITA", choices=escalonador.POLITICAS)
+    parser.add_argument("--taxa", action="append", metavar="CAT=N",
+                        help="visitantes por minuto de uma categoria (repetível)")
+    parser.add_argument("--rajada", action="append", metavar="CAT=N",
+                        help="tamanho médio dos grupos de uma categoria (1 = Poisson)")
+    parser.add_argument("--servico", type=float, default=SERVICO_PADRAO['media'] * 60,
+                        help="tempo médio de atendimento, em segundos")
+    parser.add_argument("--distribuicao", default=SERVICO_PADRAO['distribuicao'], choices=DISTRIBUICOES)
+    parser.add_argument("--cv", type=float, default=SERVICO_PADRAO['cv'],
+                        help="coeficiente de variação do atendimento (LOGNORMAL)")
+    parser.add_argument("--semente", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    chegadas = {cat: dict(params) for cat, params in CHEGADAS_PADRAO.items()}
+    for nome, campo in (("--taxa", "taxa"), ("--rajada", "rajada")):
+        for cat, valor in _pares(getattr(args, campo), nome).items():
+            if cat not in chegadas:
+                raise SystemExit(f"{nome}: categoria '{cat}' inválida. Use {', '.join(chegadas)}.")
+            chegadas[cat][campo] = valor
+    servico = {'distribuicao': args.distribuicao, 'media': args.servico / 60, 'cv': args.cv}
+
+    resultados = []
+    for catracas in (int(valor) for valor in args.catracas.split(",")):
+        inicio = time.perf_counter()
+        resultado = simular(chegadas, catracas, servico, args.horas, args.modo, args.politica,
+                            semente=args.semente)
+        resultado['segundos'] = time.perf_counter() - inicio
+        resultados.append(resultado)
+
+    if len(resultados) == 1:
+        exibir(resultados[0])
+    else:
+        print(f"\n=== COMPARAÇÃO DE CATRACAS ({args.modo}, {args.politica}, {args.horas} h) ===")
+        print(" catracas  ocupação  espera média  p95 (min)  p99 (min)  maior fila  última saída")
+        for resultado in resultados:
+            atendidos = sum(resultado['atendidos'].values())
+            media = sum(resultado['espera_media'][cat] * resultado['atendidos'][cat]
+                        for cat in resultado['atendidos']) / (atendidos or 1)
+            _, p95, p99 = _percentis_segundos(_total(resultado))
+            print(f" {resultado['catracas']:>8}  {resultado['ocupacao']:>8.0%}  {media:>12.1f}"
+                  f"  {_formatar(p95):>9}  {_formatar(p99):>9}  {resultado['maior_fila']:>10,}"
+                  f"  {resultado['fim']:>8.0f} min")
+    chegadas_total = sum(sum(resultado['chegadas'].values()) for resultado in resultados)
+    segundos = sum(resultado['segundos'] for resultado in resultados)
+    print(f"\n{chegadas_total:,} chegadas simuladas em {segundos:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
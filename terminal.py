@@ -1,154 +1,224 @@
 # terminal.py
-import fila
-import pilha
-import Roteiro
-
-def ajuda():
-    return (
-        "\nComandos disponíveis:\n"
-        "-----------------------------------\n"
-        "COMPRAR <nome> <categoria>\n"
-        "ENTRAR\n"
-        "ESPIAR\n"
-        "CANCELAR <id>\n"
-        "LISTAR\n"
-        "ESTATISTICAS\n"
-        "MODO <PADRAO|PRIORIDADE>\n"
-        "IR <caminho>              (caminhos absolutos (/IA/Visao) ou relativos (Palco, Robótica)\n"
-        "VOLTAR\n"
-        "AVANCAR\n"
-        "ONDE\n"
-        "DESFAZER\n"
-        "REFAZER\n"
-        "SAIR\n"
-        "-----------------------------------"
-    )
-
-def main():
-    # --- ESTADOS INICIAIS (mantidos dentro da função) ---
-    estado_fila = fila.ESTADO_INICIAL.copy()
-    local_atual = "/"
-    voltar_pilha = []
-    avancar_pilha = []
-    estado_pilha = {
-        "local_atual": "/",
-        "voltar_pilha": [],
-        "avancar_pilha": [],
-        "estado_geral_simulado": "Normal",
-    }
-
-    # Historicos separados para fila e para "estado_pilha"
-    historico_undo_fila = []
-    historico_redo_fila = []
-    historico_undo_pilha = []
-    historico_redo_pilha = []
+import sys
+import time
+
+import comandos
+import metricas
+import persistencia
+
+# A ajuda, o contexto e a interpretação dos comandos ficam em comandos.py,
+# compartilhados com o modo em lote e outros front ends.
+ajuda = comandos.ajuda
+criar_contexto = comandos.criar_contexto
+
+
+def executar_comando(ctx, comando, diario=None):
+    """
+    Interpreta uma linha de comando sobre o contexto `ctx`.
+    Retorna False quando o comando é SAIR (o laço deve parar) e True nos demais casos.
+    É usada tanto pelo modo interativo quanto pelo modo em lote.
+    Com um `diario` (persistencia.Diario), os comandos que alteram o estado
+    são registrados antes de executar.
+    """
+    if diario is None:
+        return comandos.executar(ctx, comando)
+    return persistencia.executar(ctx, diario, comando)
+
+
+def abrir_diario(diretorio):
+    """Recupera a sessão salva em `diretorio` e abre o diário. Retorna (ctx, diario)."""
+    inicio = time.perf_counter()
+    ctx, diario, reexecutados = persistencia.abrir(diretorio)
+    if diario.seq:
+        print(f"INFO: Sessão recuperada de '{diretorio}' ({reexecutados} comandos do diário "
+              f"reexecutados em {time.perf_counter() - inicio:.2f} s).")
+    return ctx, diario
+
+
+def main(diretorio_dados=None):
+    # --- ESTADOS INICIAIS (mantidos dentro do contexto) ---
+    diario = None
+    if diretorio_dados is None:
+        ctx = criar_contexto()
+    else:
+        ctx, diario = abrir_diario(diretorio_dados)
 
     print("=== SISTEMA DE TERMINAL ===")
     print("Digite 'AJUDA' para ver os comandos disponíveis.")
 
-    while True:
-        comando = input("\n> ").strip()
-
-        if not comando:
-            continue
-
-        partes = comando.split()
-        cmd = partes[0].upper()
-
-        # --- AJUDA / SAIR ---
-        if cmd == "AJUDA":
-            print(ajuda())
-        elif cmd == "SAIR":
-            print("Encerrando o sistema...")
-            break
-
-        # --- FILA (agora com UNDO/REDO via pilha._aplicar_comando) ---
-        elif cmd == "COMPRAR" and len(partes) >= 3:
-            nome = partes[1]
-            categoria = partes[2]
-            estado_fila, historico_undo_fila, historico_redo_fila = pilha._aplicar_comando(
-                estado_fila, historico_undo_fila, historico_redo_fila, fila.comprar, nome, categoria
-            )
-
-        elif cmd == "ENTRAR":
-            estado_fila, historico_undo_fila, historico_redo_fila = pilha._aplicar_comando(
-                estado_fila, historico_undo_fila, historico_redo_fila, fila.entrar
-            )
-
-        elif cmd == "ESPIAR":
-            estado_fila = fila.espiar(estado_fila)
-
-        elif cmd == "CANCELAR" and len(partes) == 2:
-            estado_fila, historico_undo_fila, historico_redo_fila = pilha._aplicar_comando(
-                estado_fila, historico_undo_fila, historico_redo_fila, fila.cancelar, partes[1]
-            )
-
-        elif cmd == "LISTAR":
-            estado_fila = fila.listar(estado_fila)
-
-        elif cmd == "ESTATISTICAS":
-            estado_fila = fila.estatisticas(estado_fila)
-
-        elif cmd == "MODO" and len(partes) == 2:
-            estado_fila, historico_undo_fila, historico_redo_fila = pilha._aplicar_comando(
-                estado_fila, historico_undo_fila, historico_redo_fila, fila.modo, partes[1]
-            )
-
-        # --- ROTEIRO ---
-        elif cmd == "IR" and len(partes) == 2:
-            local_atual, voltar_pilha, avancar_pilha = Roteiro.ir_local(
-                partes[1], local_atual, voltar_pilha, avancar_pilha
-            )
-
-        elif cmd == "VOLTAR":
-            local_atual, voltar_pilha, avancar_pilha = Roteiro.voltar_local(
-                local_atual, voltar_pilha, avancar_pilha
-            )
-
-        elif cmd == "AVANCAR":
-            local_atual, voltar_pilha, avancar_pilha = Roteiro.avancar_local(
-                local_atual, voltar_pilha, avancar_pilha
-            )
-
-        elif cmd == "ONDE":
-            Roteiro.onde(local_atual)
-
-        # --- PILHA (DESFAZER / REFAZER) para o estado de navegação/simulado (estado_pilha) ---
-        elif cmd == "DESFAZER":
-            # Primeiro tenta desfazer ações na FILA (se houver histórico)
-            if historico_undo_fila:
-                estado_fila, historico_undo_fila, historico_redo_fila = pilha.desfazer(
-                    estado_fila, historico_undo_fila, historico_redo_fila
-                )
-                # mensagem genérica; fila restaurada
-                print("OK: desfaz ação na fila.")
-            # Senão tenta desfazer ações no estado_pilha (navegação)
-            elif historico_undo_pilha:
-                estado_pilha, historico_undo_pilha, historico_redo_pilha = pilha.desfazer(
-                    estado_pilha, historico_undo_pilha, historico_redo_pilha
-                )
-                print("OK: desfaz ação de navegação.")
-            else:
-                print("ERRO DESFAZER: Nada a desfazer.")
-
-        elif cmd == "REFAZER":
-            # tenta refazer na fila primeiro, depois no estado_pilha
-            if historico_redo_fila:
-                estado_fila, historico_undo_fila, historico_redo_fila = pilha.refazer(
-                    estado_fila, historico_undo_fila, historico_redo_fila
-                )
-                print("OK: refaz ação na fila.")
-            elif historico_redo_pilha:
-                estado_pilha, historico_undo_pilha, historico_redo_pilha = pilha.refazer(
-                    estado_pilha, historico_undo_pilha, historico_redo_pilha
-                )
-                print("OK: refaz ação de navegação.")
-            else:
-                print("ERRO REFAZER: Nada a refazer.")
+    try:
+        while True:
+            if diario is not None:
+                # Nada fica só no buffer enquanto o operador digita
+                diario.sincronizar()
+            comando = input("\n> ")
+            if not executar_comando(ctx, comando, diario):
+                break
+    finally:
+        metricas.gravar_agora(ctx)
+        if diario is not None:
+            diario.fechar()
+
+
+# --- MODO EM LOTE ---
+
+# Mensagens que contam como erro no resumo do lote
+PREFIXOS_ERRO = ("ERRO", "Comando inválido")
+
+# Níveis de saída do lote:
+#   completa   - mesma saída do modo interativo (sem o prompt), escrita em blocos
+#   erros      - só as mensagens de erro, com o número da linha
+#   silenciosa - nada além do resumo final
+NIVEIS_SAIDA = ("completa", "erros", "silenciosa")
+
+
+class _SaidaLote:
+    """
+    Substitui sys.stdout durante o lote: conta as mensagens de erro,
+    filtra o que deve aparecer e escreve no destino em blocos grandes.
+    """
+
+    def __init__(self, destino, nivel, tamanho_bloco=1 << 16):
+        self.destino = destino
+        self.nivel = nivel
+        self.tamanho_bloco = tamanho_bloco
+        self.partes = []
+        self.tamanho = 0
+        self.erros = 0
+        self.linha = 0
+        self._linha_erro = None  # linha do lote cujo erro ainda está sendo escrito
+
+    def write(self, texto):
+        if texto.startswith(PREFIXOS_ERRO):
+            self.erros += 1
+            self._linha_erro = self.linha
+            if self.nivel == "erros":
+                self._guardar(f"linha {self.linha}: {texto}")
+                return len(texto)
+        elif self._linha_erro == self.linha and (texto == "\n" or texto.startswith((" ", "\t"))):
+            # A quebra de linha (print() a escreve numa chamada separada) e os
+            # detalhes indentados do mesmo erro (ex.: as linhas inválidas do IMPORTAR)
+            if self.nivel == "erros":
+                self._guardar(texto)
+                return len(texto)
+        else:
+            self._linha_erro = None
+
+        if self.nivel == "completa":
+            self._guardar(texto)
+        return len(texto)
+
+    def _guardar(self, texto):
+        self.partes.append(texto)
+        self.tamanho += len(texto)
+        if self.tamanho >= self.tamanho_bloco:
+            self.flush()
+
+    def flush(self):
+        if self.partes:
+            self.destino.write("".join(self.partes))
+            self.partes = []
+            self.tamanho = 0
+        self.destino.flush()
+
+
+def executar_lote(linhas, nivel="silenciosa", ctx=None, destino=None, diario=None):
+    """
+    Executa uma sequência de comandos (ex.: um arquivo aberto ou sys.stdin)
+    com a mesma semântica do modo interativo, sem prompt.
+    Para no primeiro SAIR, como o laço interativo.
+    Com `diario`, o fsync é feito em grupo e uma última vez no fim do lote.
+    Retorna um dicionário com total de comandos, erros e tempo de parede.
+    """
+    if nivel not in NIVEIS_SAIDA:
+        raise ValueError(f"Nível de saída '{nivel}' inválido. Use {', '.join(NIVEIS_SAIDA)}.")
+    if ctx is None:
+        ctx = criar_contexto()
+    if destino is None:
+        destino = sys.stdout
+
+    saida = _SaidaLote(destino, nivel)
+    stdout_original = sys.stdout
+    comandos = 0
+    inicio = time.perf_counter()
+    sys.stdout = saida
+    try:
+        for numero, linha in enumerate(linhas, 1):
+            if not linha.strip():
+                continue
+            comandos += 1
+            saida.linha = numero
+            if not executar_comando(ctx, linha, diario):
+                break
+    finally:
+        sys.stdout = stdout_original
+        saida.flush()
+        if diario is not None:
+            diario.sincronizar()
+
+    return {
+        "comandos": comandos,
+        "erros": saida.erros,
+        "tempo": time.perf_counter() - inicio,
+    }
 
+
+def exibir_resumo_lote(resumo, destino=None):
+    """Mostra o resumo do lote (total de comandos, erros e tempo)."""
+    if destino is None:
+        destino = sys.stdout
+    tempo = resumo["tempo"]
+    taxa = resumo["comandos"] / tempo if tempo > 0 else 0
+    destino.write(
+        "\n=== RESUMO DO LOTE ===\n"
+        f"Comandos executados: {resumo['comandos']}\n"
+        f"Erros: {resumo['erros']}\n"
+        f"Tempo total: {tempo:.3f} s ({taxa:.0f} comandos/s)\n"
+    )
+    destino.flush()
+
+
+def _main_lote(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Terminal do Festival Tech UNIFEI")
+    parser.add_argument("--lote", metavar="ARQUIVO",
+                        help="executa os comandos do arquivo ('-' para a entrada padrão) sem prompt")
+    parser.add_argument("--saida", choices=NIVEIS_SAIDA, default="silenciosa",
+                        help="nível de saída do modo em lote (padrão: silenciosa)")
+    parser.add_argument("--diario", metavar="DIRETORIO",
+                        help="grava diário e snapshots em DIRETORIO e recupera a sessão salva lá")
+    parser.add_argument("--metricas", metavar="ARQUIVO",
+                        help="liga a coleta de métricas e grava ARQUIVO no formato do Prometheus")
+    parser.add_argument("--intervalo-metricas", type=float, default=metricas.INTERVALO_PADRAO,
+                        metavar="S", help="segundos entre gravações do arquivo de métricas (padrão: 15)")
+    args = parser.parse_args(argv)
+
+    if args.metricas is not None:
+        metricas.configurar(args.metricas, args.intervalo_metricas)
+
+    if args.lote is None:
+        main(args.diario)
+        return 0
+
+    diario = None
+    if args.diario is None:
+        ctx = criar_contexto()
+    else:
+        ctx, diario = abrir_diario(args.diario)
+    try:
+        if args.lote == "-":
+            resumo = executar_lote(sys.stdin, args.saida, ctx, diario=diario)
         else:
-            print("Comando inválido. Digite 'AJUDA' para ver a lista de comandos.")
+            with open(args.lote, encoding="utf-8", buffering=1 << 20) as arquivo:
+                resumo = executar_lote(arquivo, args.saida, ctx, diario=diario)
+    finally:
+        if diario is not None:
+            diario.fechar()
+    metricas.gravar_agora(ctx)
+    exibir_resumo_lote(resumo)
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(_main_lote(sys.argv[1:]))
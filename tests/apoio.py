@@ -0,0 +1,28 @@
+# Funções comuns dos testes.
+import contextlib
+import copy
+import io
+
+import comandos
+import fila
+
+
+def executar(ctx, linhas):
+    """Executa as linhas de comando no contexto e devolve a saída."""
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        for linha in linhas:
+            comandos.executar(ctx, linha)
+    return saida.getvalue()
+
+
+def ordem_de_atendimento(estado):
+    """Ids na ordem em que uma cópia do estado os atende até esvaziar."""
+    estado = copy.deepcopy(estado)
+    estado['linha_tempo'] = None
+    ordem = []
+    while True:
+        id_ingresso, _, _ = fila._atender(estado)
+        if id_ingresso is None:
+            return ordem
+        ordem.append(id_ingresso)
@@ -0,0 +1,92 @@
+# Testes das estruturas em colunas (colunas.py): a FilaIds tem de se
+# comportar como o deque que ela substitui, e a Tabela tem de sobreviver ao
+# pickle (checkpoints do REVER e snapshots da persistência).
+import pickle
+import random
+import unittest
+from collections import deque
+
+import colunas
+import ingressos
+
+
+class TestFilaIds(unittest.TestCase):
+
+    def test_confere_com_deque(self):
+        for semente in range(20):
+            sorteio = random.Random(semente)
+            fila, referencia = colunas.FilaIds(), deque()
+            proximo = 1
+            for i in range(3000):
+                x = sorteio.random()
+                if x < 0.4:
+                    fila.append(proximo)
+                    referencia.append(proximo)
+                    proximo += 1
+                elif x < 0.45:
+                    quantidade = sorteio.randint(0, 40)
+                    fila.extend(range(proximo, proximo + quantidade))
+                    referencia.extend(range(proximo, proximo + quantidade))
+                    proximo += quantidade
+                elif x < 0.8 and referencia:
+                    self.assertEqual(fila.popleft(), referencia.popleft())
+                elif x < 0.9 and referencia:
+                    # appendleft só devolve o que saiu (DESFAZER de ENTRAR)
+                    item = referencia.popleft()
+                    self.assertEqual(fila.popleft(), item)
+                    fila.appendleft(item)
+                    referencia.appendleft(item)
+                elif x < 0.95 and referencia:
+                    self.assertEqual(fila.pop(), referencia.pop())
+                elif x < 0.951:
+                    fila.clear()
+                    referencia.clear()
+                self.assertEqual(len(fila), len(referencia), (semente, i))
+                if referencia:
+                    self.assertEqual((fila[0], fila[-1]), (referencia[0], referencia[-1]))
+            self.assertEqual(list(fila), list(referencia))
+            self.assertEqual(pickle.loads(pickle.dumps(fila)), fila)
+
+    def test_vazia(self):
+        fila = colunas.FilaIds()
+        self.assertFalse(fila)
+        with self.assertRaises(IndexError):
+            fila.popleft()
+        with self.assertRaises(IndexError):
+            fila.pop()
+        with self.assertRaises(IndexError):
+            fila[-1]
+
+
+class TestTabela(unittest.TestCase):
+
+    def test_pickle_preserva_as_linhas(self):
+        tabela = colunas.Tabela()
+        tabela.acrescentar(ingressos.Ingresso(1, "Ana", "VIP", 0))
+        # Lacuna de ids (como num fragmento): as linhas vagas ficam LIVRE
+        tabela.acrescentar_lote([ingressos.Ingresso(4, "Bia", "MEIA", 2),
+                                 ingressos.Ingresso(5, "Caio", "INTEIRA", 3)])
+        tabela.situacao[4] = colunas.ATENDIDO
+        tabela.esperas[4] = 7
+        copia = pickle.loads(pickle.dumps(tabela))
+        self.assertEqual(len(copia), 6)
+        self.assertEqual(bytes(copia.situacao), bytes(tabela.situacao))
+        for id_ingresso in (1, 4, 5):
+            original, recuperado = tabela.ingresso(id_ingresso), copia.ingresso(id_ingresso)
+            self.assertEqual((recuperado.nome, recuperado.categoria, recuperado.chegada_logica,
+                              recuperado.tempo_espera),
+                             (original.nome, original.categoria, original.chegada_logica,
+                              original.tempo_espera))
+        self.assertEqual(copia.situacao[2], colunas.LIVRE)
+
+    def test_truncar_desfaz_o_acrescentar(self):
+        tabela = colunas.Tabela()
+        tabela.acrescentar(ingressos.Ingresso(1, "Ana", "VIP", 0))
+        tabela.acrescentar(ingressos.Ingresso(2, "Bia", "MEIA", 1))
+        tabela.truncar(2)
+        self.assertEqual(len(tabela), 2)
+        self.assertEqual(tabela.ingresso(1).nome, "Ana")
+
+
+if __name__ == "__main__":
+    unittest.main()
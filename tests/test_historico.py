@@ -0,0 +1,62 @@
+# Testes do histórico com orçamento de memória (pilha.Historico): o
+# DESFAZER/REFAZER tem de se comportar exatamente como com listas simples.
+import random
+import unittest
+
+import comandos
+import pilha
+from tests import apoio
+
+
+def _contexto(historico):
+    ctx = comandos.criar_contexto()
+    for chave in ("historico_undo_fila", "historico_redo_fila",
+                  "historico_undo_pilha", "historico_redo_pilha"):
+        ctx[chave] = historico()
+    return ctx
+
+
+def _comparar(caso, linhas):
+    pequeno = _contexto(lambda: pilha.Historico(max_quentes=2, tamanho_bloco=2))
+    caso.assertEqual(apoio.executar(pequeno, linhas), apoio.executar(_contexto(list), linhas))
+
+
+class TestHistoricoFrio(unittest.TestCase):
+
+    def test_desfazer_modo_mantem_os_ingressos_originais(self):
+        # Desfazer a partir dos blocos frios (cópias das entradas) tem de
+        # deixar as filas e o índice de nomes como com listas simples
+        linhas = ["COMPRAR Ana VIP", "COMPRAR Bob MEIA", "MODO PRIORIDADE"]
+        linhas += [f"COMPRAR V{i} INTEIRA" for i in range(6)]
+        linhas += ["DESFAZER"] * 7 + ["ENTRAR", "BUSCAR Ana"]
+        _comparar(self, linhas)
+
+    def test_sequencias_aleatorias(self):
+        for semente in range(30):
+            sorteio = random.Random(semente)
+            linhas = []
+            for _ in range(300):
+                x = sorteio.random()
+                if x < 0.35:
+                    linhas.append(f"COMPRAR N{sorteio.randint(1, 20)} {sorteio.choice(['VIP', 'MEIA', 'INTEIRA'])}")
+                elif x < 0.5:
+                    linhas.append("ENTRAR")
+                elif x < 0.58:
+                    linhas.append(f"CANCELAR {sorteio.randint(1, 100)}")
+                elif x < 0.62:
+                    linhas.append(f"MODO {sorteio.choice(['PADRAO', 'PRIORIDADE'])}")
+                elif x < 0.64:
+                    linhas.append(f"POLITICA {sorteio.choice(['ESTRITA', 'PONDERADA', 'ENVELHECIMENTO'])}")
+                elif x < 0.8:
+                    linhas.append("DESFAZER")
+                elif x < 0.9:
+                    linhas.append("REFAZER")
+                else:
+                    linhas.append(f"BUSCAR N{sorteio.randint(1, 20)}")
+            linhas += ["ESTATISTICAS", "LISTAR"]
+            with self.subTest(semente=semente):
+                _comparar(self, linhas)
+
+
+if __name__ == "__main__":
+    unittest.main()
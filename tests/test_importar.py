@@ -0,0 +1,103 @@
+# Testes do IMPORTAR: importar um CSV tem de deixar a fila igual a comprar
+# os mesmos ingressos um a um (filas, índices e estatísticas), e o
+# DESFAZER/REFAZER do lote inteiro tem de voltar exatamente ao estado de
+# antes e de depois. Os tamanhos incluem lotes acima de
+# indice_nomes.TAMANHO_BLOCO, que tomam o caminho da reconstrução do índice.
+import os
+import random
+import tempfile
+import unittest
+
+import comandos
+import fila
+import ingressos
+from tests import apoio
+
+CATEGORIAS = ('VIP', 'meia', 'Inteira ')
+TAMANHOS = (0, 1, 5, 40, 700)
+
+
+def _foto(estado):
+    """O que o IMPORTAR altera: filas, índices e estatísticas."""
+    tabela = estado['ingressos']
+    filas = {nome_fila: [(item, tabela.nomes[item], tabela.categoria(item), item in estado['cancelados'])
+                         for item in itens]
+             for nome_fila, itens in estado['filas'].items()}
+    nomes = [(tabela.nomes[id_ingresso], id_ingresso) for id_ingresso in estado['indice_nomes'].buscar("")]
+    estatisticas = {chave: estado['estatisticas'][chave]
+                    for chave in ("total_pendente", "pendente_por_categoria", "total_atendido")}
+    return (filas, dict(estado['pendentes']), estado['proximo_id'], fila.ids_pendentes(estado),
+            nomes, estatisticas)
+
+
+class TestImportar(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(self.diretorio.cleanup)
+        self.caminho = os.path.join(self.diretorio.name, "lote.csv")
+
+    def _gravar(self, sorteio, linhas):
+        with open(self.caminho, "w", encoding="utf-8") as arquivo:
+            if sorteio.random() < 0.5:
+                arquivo.write("categoria;nome\n")
+                arquivo.writelines(f"{categoria};{nome}\n" for nome, categoria in linhas)
+            else:
+                arquivo.writelines(f"{nome},{categoria}\n" for nome, categoria in linhas)
+
+    def _sortear_comando(self, sorteio, estado):
+        x = sorteio.random()
+        if x < 0.4:
+            return f"COMPRAR Ana {sorteio.choice(['VIP', 'MEIA', 'INTEIRA'])}"
+        if x < 0.7:
+            return "ENTRAR"
+        if x < 0.85:
+            return f"CANCELAR {sorteio.randint(1, estado['proximo_id'])}"
+        return sorteio.choice(["MODO PRIORIDADE", "MODO PADRAO", "POLITICA PONDERADA", "POLITICA ENVELHECIMENTO"])
+
+    def test_igual_a_comprar_um_a_um(self):
+        for semente in range(6):
+            sorteio = random.Random(semente)
+            importado, comprado = comandos.criar_contexto(), comandos.criar_contexto()
+            for i in range(80):
+                if sorteio.random() < 0.15:
+                    linhas = [(f"N{sorteio.randint(0, 50)}", sorteio.choice(CATEGORIAS))
+                              for _ in range(sorteio.choice(TAMANHOS))]
+                    self._gravar(sorteio, linhas)
+                    apoio.executar(importado, [f"IMPORTAR {self.caminho}"])
+                    apoio.executar(comprado, [f"COMPRAR {nome} {categoria.strip()}" for nome, categoria in linhas])
+                    self.assertEqual(_foto(importado["estado_fila"]), _foto(comprado["estado_fila"]), (semente, i))
+                else:
+                    linha = self._sortear_comando(sorteio, importado["estado_fila"])
+                    apoio.executar(importado, [linha])
+                    apoio.executar(comprado, [linha])
+            estado = importado["estado_fila"]
+            self.assertEqual(_foto(estado), _foto(comprado["estado_fila"]), semente)
+            self.assertEqual(apoio.ordem_de_atendimento(estado), apoio.ordem_de_atendimento(comprado["estado_fila"]))
+            recalculadas = ingressos.recalcular_estatisticas(estado)
+            for chave in ("total_pendente", "pendente_por_categoria", "total_atendido"):
+                self.assertEqual(recalculadas[chave], estado['estatisticas'][chave], (semente, chave))
+
+    def test_desfazer_e_refazer_o_lote(self):
+        for semente in range(6):
+            sorteio = random.Random(semente)
+            ctx = comandos.criar_contexto()
+            for i in range(60):
+                estado = ctx["estado_fila"]
+                if sorteio.random() < 0.2:
+                    linhas = [(f"N{sorteio.randint(0, 50)}", sorteio.choice(CATEGORIAS))
+                              for _ in range(sorteio.choice(TAMANHOS[1:]))]
+                    self._gravar(sorteio, linhas)
+                    antes = _foto(estado)
+                    apoio.executar(ctx, [f"IMPORTAR {self.caminho}"])
+                    depois = _foto(ctx["estado_fila"])
+                    apoio.executar(ctx, ["DESFAZER"])
+                    self.assertEqual(_foto(ctx["estado_fila"]), antes, (semente, i))
+                    apoio.executar(ctx, ["REFAZER"])
+                    self.assertEqual(_foto(ctx["estado_fila"]), depois, (semente, i))
+                else:
+                    apoio.executar(ctx, [self._sortear_comando(sorteio, estado)])
+
+
+if __name__ == "__main__":
+    unittest.main()
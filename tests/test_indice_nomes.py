@@ -0,0 +1,60 @@
+# Testes do índice de nomes do BUSCAR: com blocos pequenos (muitas divisões
+# e junções), a busca e a contagem por prefixo têm de dar o mesmo que
+# percorrer todos os ingressos pendentes e atendidos.
+import contextlib
+import io
+import random
+import unittest
+from unittest import mock
+
+import comandos
+import fila
+import indice_nomes
+
+NOMES = ("Ana", "ana", "ANAlice", "Bia", "Beto", "Çarla", "Straße")
+PREFIXOS = ("", "a", "AN", "anal", "b", "be", "ç", "STRASS", "z")
+
+
+def _varredura(estado, prefixo):
+    prefixo = indice_nomes.normalizar(prefixo)
+    nomes = estado['ingressos'].nomes
+    todos = fila.ids_pendentes(estado) + list(estado['atendidos'])
+    return sorted((nomes[id_ingresso].casefold(), id_ingresso) for id_ingresso in todos
+                  if nomes[id_ingresso].casefold().startswith(prefixo))
+
+
+class TestIndiceNomes(unittest.TestCase):
+
+    def test_prefixos_conferem_com_varredura(self):
+        with mock.patch.object(indice_nomes, "TAMANHO_BLOCO", 4):
+            for semente in range(15):
+                sorteio = random.Random(semente)
+                ctx = comandos.criar_contexto()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for i in range(400):
+                        x = sorteio.random()
+                        if x < 0.5:
+                            linha = f"COMPRAR {sorteio.choice(NOMES)}{i % 5} {sorteio.choice(['VIP', 'MEIA', 'INTEIRA'])}"
+                        elif x < 0.7:
+                            linha = "ENTRAR"
+                        elif x < 0.8:
+                            linha = f"CANCELAR {sorteio.randint(1, i + 1)}"
+                        elif x < 0.9:
+                            linha = "DESFAZER"
+                        elif x < 0.96:
+                            linha = "REFAZER"
+                        else:
+                            linha = f"MODO {sorteio.choice(['PADRAO', 'PRIORIDADE'])}"
+                        comandos.executar(ctx, linha)
+                estado = ctx["estado_fila"]
+                indice = estado['indice_nomes']
+                for prefixo in PREFIXOS:
+                    esperado = _varredura(estado, prefixo)
+                    nomes = estado['ingressos'].nomes
+                    obtido = [(nomes[id_ingresso].casefold(), id_ingresso) for id_ingresso in indice.buscar(prefixo)]
+                    self.assertEqual(obtido, esperado, (semente, prefixo))
+                    self.assertEqual(indice.contar(prefixo), len(esperado), (semente, prefixo))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# Testes do LISTAR paginado (fila.listar): percorrer as páginas pelo CURSOR
+# tem de mostrar a fila do LISTAR completo, mesmo com ingressos atendidos,
+# cancelados ou comprados entre uma página e a seguinte.
+import random
+import re
+import unittest
+
+import comandos
+import fila
+from tests import apoio
+
+_ITEM = re.compile(r"^\s+\d+\. ID (\d+) ")
+_CURSOR = re.compile(r"LISTAR CURSOR=(\S+)")
+
+
+def _ids(saida):
+    return [int(m.group(1)) for m in map(_ITEM.match, saida.splitlines()) if m]
+
+
+def _pagina(ctx, linha):
+    saida = apoio.executar(ctx, [linha])
+    cursor = _CURSOR.search(saida)
+    return _ids(saida), cursor.group(1) if cursor else None
+
+
+class TestListarPaginado(unittest.TestCase):
+
+    def _percorrer(self, ctx, sorteio, categoria, mexer):
+        """Percorre as páginas; entre elas, `mexer` sorteia alguns comandos."""
+        estado = ctx["estado_fila"]
+        filtro = f" CATEGORIA={categoria}" if categoria else ""
+        pendentes_no_inicio = set(fila.ids_pendentes(estado))
+        sempre_pendentes = set(pendentes_no_inicio)
+        mostrados = []
+        ids, cursor = _pagina(ctx, f"LISTAR LIMITE={sorteio.randint(1, 7)}{filtro}")
+        while True:
+            completa = _ids(apoio.executar(ctx, ["LISTAR"]))
+            posicoes = {id_ingresso: i for i, id_ingresso in enumerate(completa)}
+            # A página segue a ordem do LISTAR completo de agora
+            self.assertEqual(ids, sorted(ids, key=posicoes.__getitem__))
+            mostrados += ids
+            if cursor is None:
+                break
+            if mexer:
+                apoio.executar(ctx, [sorteio.choice(
+                    ["ENTRAR", "ENTRAR", f"CANCELAR {sorteio.randint(1, estado['proximo_id'])}",
+                     f"COMPRAR X {sorteio.choice(['VIP', 'MEIA', 'INTEIRA'])}"]) for _ in range(sorteio.randint(0, 4))])
+                sempre_pendentes &= set(fila.ids_pendentes(estado))
+            ids, cursor = _pagina(ctx, f"LISTAR CURSOR={cursor}")
+        self.assertEqual(len(mostrados), len(set(mostrados)), "ingresso repetido")
+        if categoria:
+            sempre_pendentes = {id_ingresso for id_ingresso in sempre_pendentes
+                                if estado['ingressos'].categoria(id_ingresso) == categoria}
+        self.assertLessEqual(sempre_pendentes, set(mostrados), "ingresso pendente pulado")
+        return mostrados
+
+    def _montar(self, sorteio, modo):
+        ctx = comandos.criar_contexto()
+        linhas = [f"COMPRAR N{i} {sorteio.choice(['VIP', 'MEIA', 'INTEIRA'])}"
+                  for i in range(sorteio.randint(0, 120))]
+        linhas += [f"CANCELAR {sorteio.randint(1, 120)}" for _ in range(sorteio.randint(0, 40))]
+        linhas.append(f"MODO {modo}")
+        apoio.executar(ctx, linhas)
+        return ctx
+
+    def test_paginas_sem_mudancas_formam_o_listar_completo(self):
+        for semente in range(20):
+            sorteio = random.Random(semente)
+            for modo in ("PADRAO", "PRIORIDADE"):
+                ctx = self._montar(sorteio, modo)
+                for categoria in (None, "VIP", "MEIA"):
+                    mostrados = self._percorrer(ctx, sorteio, categoria, mexer=False)
+                    completa = _ids(apoio.executar(ctx, ["LISTAR"]))
+                    if categoria is None:
+                        self.assertEqual(mostrados, completa)
+                    else:
+                        tabela = ctx["estado_fila"]['ingressos']
+                        self.assertEqual(mostrados, [id_ingresso for id_ingresso in completa
+                                                     if tabela.categoria(id_ingresso) == categoria])
+
+    def test_paginas_com_atendimentos_e_cancelamentos(self):
+        for semente in range(60):
+            sorteio = random.Random(semente)
+            for modo in ("PADRAO", "PRIORIDADE"):
+                ctx = self._montar(sorteio, modo)
+                self._percorrer(ctx, sorteio, sorteio.choice([None, "VIP", "INTEIRA"]), mexer=True)
+
+    def test_ancora_cancelada_e_compactada(self):
+        # A âncora some do deque (compactação das lápides): a página seguinte
+        # continua depois dela, sem voltar ao começo da fila
+        ctx = comandos.criar_contexto()
+        apoio.executar(ctx, [f"COMPRAR N{i} VIP" for i in range(100)])
+        ids, cursor = _pagina(ctx, "LISTAR LIMITE=20")
+        self.assertEqual(ids, list(range(1, 21)))
+        apoio.executar(ctx, [f"CANCELAR {i}" for i in range(11, 81)])
+        self.assertNotIn(20, ctx["estado_fila"]['cancelados'])
+        ids, _ = _pagina(ctx, f"LISTAR CURSOR={cursor}")
+        self.assertEqual(ids, list(range(81, 101)))
+
+    def test_opcoes_invalidas(self):
+        ctx = comandos.criar_contexto()
+        apoio.executar(ctx, ["COMPRAR Ana VIP"])
+        for opcoes in ("LIMITE=0", "INICIO=-1", "CATEGORIA=XX", "CURSOR=!!", "FOO=1", "LIMITE"):
+            self.assertIn("ERRO LISTAR", apoio.executar(ctx, [f"LISTAR {opcoes}"]), opcoes)
+        _, cursor = _pagina(ctx, "LISTAR LIMITE=1")
+        self.assertIsNone(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
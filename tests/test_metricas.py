@@ -0,0 +1,49 @@
+# Testes do comando METRICAS (metricas.py): o arquivo da linha de comando
+# continua valendo depois de desligar e ligar a coleta.
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import comandos
+import metricas
+
+
+class TestMetricas(unittest.TestCase):
+
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.arquivo = os.path.join(diretorio.name, "metricas.prom")
+        self.addCleanup(metricas.configurar, None)
+        self.addCleanup(metricas.desligar)
+        metricas.configurar(self.arquivo, 3600)
+        self.ctx = comandos.criar_contexto()
+
+    def _executar(self, linha):
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            comandos.executar(self.ctx, linha)
+        return saida.getvalue()
+
+    def test_ligar_de_novo_mantem_o_arquivo(self):
+        self._executar("METRICAS DESLIGAR")
+        self._executar("METRICAS LIGAR")
+        self.assertEqual((metricas.coletor.arquivo, metricas.coletor.intervalo), (self.arquivo, 3600))
+        self._executar("METRICAS ZERAR")
+        self.assertEqual(metricas.coletor.arquivo, self.arquivo)
+        self._executar("COMPRAR Ana VIP")
+        metricas.gravar_agora(self.ctx)
+        with open(self.arquivo, encoding="utf-8") as arquivo:
+            self.assertIn('festival_comandos_total{verbo="COMPRAR"} 1', arquivo.read())
+
+    def test_argumentos_a_mais(self):
+        for linha in ("METRICAS LIGAR foo", "METRICAS DESLIGAR agora", "METRICAS ZERAR 1"):
+            self.assertIn("ERRO METRICAS", self._executar(linha))
+        self.assertIsNotNone(metricas.coletor)
+        self.assertEqual(metricas.coletor.arquivo, self.arquivo)
+
+
+if __name__ == "__main__":
+    unittest.main()
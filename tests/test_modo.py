@@ -0,0 +1,56 @@
+# Testes do DESFAZER/REFAZER do MODO: o registro guarda só o modo, o limite
+# do PADRAO e as lápides, e os deques anteriores são remontados das filas.
+import random
+import unittest
+
+import comandos
+from tests import apoio
+
+
+def _foto(estado):
+    """Deques (com as lápides marcadas) e os contadores que o MODO troca."""
+    cancelados = estado['cancelados']
+    filas = {nome_fila: [(item, item in cancelados) for item in fila]
+             for nome_fila, fila in estado['filas'].items()}
+    return (filas, sorted(cancelados), dict(estado['pendentes']),
+            estado['posicoes'].limite, estado['modo_atendimento'])
+
+
+class TestDesfazerModo(unittest.TestCase):
+
+    def test_desfazer_e_refazer_remontam_os_deques(self):
+        for semente in range(20):
+            sorteio = random.Random(semente)
+            ctx = comandos.criar_contexto()
+            for i in range(200):
+                x = sorteio.random()
+                if x < 0.5:
+                    linha = f"COMPRAR N{i} {sorteio.choice(['VIP', 'MEIA', 'INTEIRA'])}"
+                elif x < 0.65:
+                    linha = "ENTRAR"
+                elif x < 0.85:
+                    linha = f"CANCELAR {sorteio.randint(1, i + 1)}"
+                elif x < 0.9:
+                    linha = "DESFAZER"
+                else:
+                    linha = f"MODO {sorteio.choice(['PADRAO', 'PRIORIDADE'])}"
+                antes = _foto(ctx["estado_fila"])
+                apoio.executar(ctx, [linha])
+                if linha.startswith("MODO") and _foto(ctx["estado_fila"]) != antes:
+                    depois = _foto(ctx["estado_fila"])
+                    apoio.executar(ctx, ["DESFAZER"])
+                    self.assertEqual(_foto(ctx["estado_fila"]), antes, (semente, i))
+                    apoio.executar(ctx, ["REFAZER"])
+                    self.assertEqual(_foto(ctx["estado_fila"]), depois, (semente, i))
+
+    def test_linha_do_tempo_nao_guarda_a_fila(self):
+        ctx = comandos.criar_contexto()
+        apoio.executar(ctx, [f"COMPRAR N{i} VIP" for i in range(2000)])
+        linha = ctx["estado_fila"]["linha_tempo"]
+        inicio = linha.bytes
+        apoio.executar(ctx, ["MODO PRIORIDADE", "DESFAZER"] * 10)
+        self.assertLess((linha.bytes - inicio) / 20, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
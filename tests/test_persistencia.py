@@ -0,0 +1,55 @@
+# Testes do diário (persistencia.py): a recuperação reconstrói a sessão
+# mesmo quando os arquivos lidos pelos comandos mudaram depois.
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import persistencia
+from tests import apoio
+
+
+class TestDiario(unittest.TestCase):
+
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp(prefix="festival_teste_")
+        self.addCleanup(shutil.rmtree, self.diretorio)
+
+    def _escrever(self, nome, texto):
+        caminho = os.path.join(self.diretorio, nome)
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.write(texto)
+        return caminho
+
+    def _sessao(self, linhas):
+        dados = os.path.join(self.diretorio, "dados")
+        with contextlib.redirect_stdout(io.StringIO()):
+            ctx, diario, _ = persistencia.abrir(dados)
+            for linha in linhas:
+                persistencia.executar(ctx, diario, linha)
+            diario.fechar()
+        return ctx, dados
+
+    def test_recuperacao_nao_rele_os_arquivos(self):
+        csv = self._escrever("lote.csv", "nome,categoria\nAna,VIP\nBob,MEIA\nCris,INTEIRA\n")
+        ruim = self._escrever("ruim.csv", "nome,categoria\nDan,XYZ\n")
+        mapa = self._escrever("mapa.txt", "Palco IA 40\nIA IA/Visao 10\nPalco Robotica 25\n")
+        linhas = [f"IMPORTAR {csv}", "COMPRAR Eva VIP", f"IMPORTAR {ruim}", "DESFAZER",
+                  f"ESTANDES {mapa}", "IR IA/Visao", "ENTRAR", f"IMPORTAR {csv}"]
+        ctx, dados = self._sessao(linhas)
+
+        # Os arquivos mudam (ou somem) depois da sessão
+        self._escrever("lote.csv", "nome,categoria\nZeca,MEIA\n")
+        os.remove(mapa)
+
+        recuperado, _, reexecutados = persistencia.recuperar(dados)
+        self.assertEqual(reexecutados, len(linhas))
+        consultas = ["LISTAR", "ESTATISTICAS", "ROTA /Robotica", "HISTORICO",
+                     "DESFAZER", "DESFAZER", "LISTAR"]
+        self.assertEqual(apoio.executar(recuperado, consultas), apoio.executar(ctx, consultas))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# Testes da portaria concorrente (portaria.py).
+import sys
+import threading
+import unittest
+
+import escalonador
+import fila
+import portaria
+
+
+class TestPortaria(unittest.TestCase):
+
+    def setUp(self):
+        # Trocas de thread frequentes, para as corridas aparecerem
+        intervalo = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, intervalo)
+
+    def _carga(self, modo, politica):
+        estado = fila.criar_estado(politica=politica)
+        if modo == 'PRIORIDADE':
+            fila._transicao_modo(estado, 'PRIORIDADE')
+        travas = portaria.criar_portaria(estado)
+        categorias = list(escalonador.CATEGORIAS)
+
+        def vendedor(numero):
+            for i in range(300):
+                portaria.comprar(travas, f"V{numero}-{i}", categorias[(numero + i) % len(categorias)])
+
+        def catraca():
+            for _ in range(200):
+                portaria.atender(travas)
+
+        def cancelador():
+            for id_ingresso in range(1, 1200, 7):
+                portaria.cancelar(travas, id_ingresso)
+
+        threads = [threading.Thread(target=vendedor, args=(numero,)) for numero in range(4)]
+        threads += [threading.Thread(target=catraca) for _ in range(3)]
+        threads.append(threading.Thread(target=cancelador))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return estado
+
+    def test_consistencia_e_ordem_de_id(self):
+        for modo in ('PADRAO', 'PRIORIDADE'):
+            for politica in escalonador.POLITICAS:
+                with self.subTest(modo=modo, politica=politica):
+                    estado = self._carga(modo, politica)
+                    self.assertEqual(portaria.conferir(estado), [])
+                    self.assertEqual(estado['proximo_id'], 1201)
+
+
+if __name__ == "__main__":
+    unittest.main()
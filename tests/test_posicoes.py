@@ -0,0 +1,75 @@
+# Testes do POSICAO (posicoes.py): a posição de cada pendente tem de ser a
+# ordem em que ele sairia se a fila fosse atendida até esvaziar, em todos
+# os modos e políticas, com categorias configuradas à vontade.
+import contextlib
+import io
+import random
+import unittest
+
+import comandos
+import fila
+from tests import apoio
+
+POLITICAS = ('ESTRITA', 'PONDERADA', 'ENVELHECIMENTO')
+
+
+class TestPosicoes(unittest.TestCase):
+
+    def _conferir(self, estado, contexto):
+        esperado = {id_ingresso: posicao
+                    for posicao, id_ingresso in enumerate(apoio.ordem_de_atendimento(estado), 1)}
+        obtido = {id_ingresso: estado['posicoes'].posicao(estado, id_ingresso)
+                  for id_ingresso in fila.ids_pendentes(estado)}
+        self.assertEqual(obtido, esperado, contexto)
+
+    def test_posicao_confere_com_o_atendimento(self):
+        for semente in range(12):
+            sorteio = random.Random(semente)
+            categorias = {f"C{k}": {'prioridade': sorteio.randint(0, 2), 'peso': sorteio.randint(0, 3),
+                                    'atraso': sorteio.randint(0, 6)}
+                          for k in range(sorteio.randint(1, 4))}
+            estado = fila.criar_estado(categorias, sorteio.choice(POLITICAS))
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(300):
+                    x = sorteio.random()
+                    if x < 0.5:
+                        fila.comprar(estado, "X", sorteio.choice(list(categorias)))
+                    elif x < 0.75:
+                        fila.entrar(estado)
+                    elif x < 0.85:
+                        fila.cancelar(estado, sorteio.randint(1, i + 1))
+                    elif x < 0.9:
+                        fila.politica(estado, sorteio.choice(POLITICAS))
+                    else:
+                        fila.modo(estado, sorteio.choice(['PADRAO', 'PRIORIDADE']))
+                    if i % 15 == 0:
+                        self._conferir(estado, (semente, i, estado['modo_atendimento'],
+                                                estado['escalonador']['politica']))
+
+    def test_posicao_depois_de_desfazer_e_refazer(self):
+        for semente in range(8):
+            sorteio = random.Random(semente)
+            ctx = comandos.criar_contexto()
+            with contextlib.redirect_stdout(io.StringIO()):
+                for i in range(300):
+                    x = sorteio.random()
+                    if x < 0.45:
+                        linha = f"COMPRAR Ana {sorteio.choice(['VIP', 'MEIA', 'INTEIRA'])}"
+                    elif x < 0.62:
+                        linha = "ENTRAR"
+                    elif x < 0.72:
+                        linha = f"CANCELAR {sorteio.randint(1, i + 1)}"
+                    elif x < 0.8:
+                        linha = "DESFAZER"
+                    elif x < 0.86:
+                        linha = "REFAZER"
+                    else:
+                        linha = sorteio.choice(["MODO PRIORIDADE", "MODO PADRAO"]
+                                               + [f"POLITICA {politica}" for politica in POLITICAS])
+                    comandos.executar(ctx, linha)
+                    if i % 15 == 0:
+                        self._conferir(ctx["estado_fila"], (semente, i))
+
+
+if __name__ == "__main__":
+    unittest.main()
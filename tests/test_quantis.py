@@ -0,0 +1,102 @@
+# Testes dos percentis (quantis.py): até LIMITE_EXATO o esboço tem de dar o
+# valor exato da lista ordenada; acima, o valor exato com erro relativo de no
+# máximo ERRO_RELATIVO, inclusive depois de remoções e de combinar esboços.
+import math
+import random
+import unittest
+
+import quantis
+
+FRACOES = (0.0, 0.01, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0)
+
+
+def _exato(valores, fracao):
+    """Posto mais próximo na lista ordenada (a mesma definição do esboço)."""
+    ordenados = sorted(valores)
+    return ordenados[max(1, math.ceil(fracao * len(ordenados))) - 1]
+
+
+class TestEsbocoQuantis(unittest.TestCase):
+
+    def _conferir(self, esboco, valores, contexto):
+        obtidos = esboco.quantis(FRACOES)
+        for fracao, obtido in zip(FRACOES, obtidos):
+            esperado = _exato(valores, fracao)
+            if esperado <= quantis.LIMITE_EXATO:
+                self.assertEqual(obtido, esperado, (contexto, fracao))
+            else:
+                self.assertLessEqual(abs(obtido - esperado), quantis.ERRO_RELATIVO * esperado,
+                                     (contexto, fracao, esperado, obtido))
+
+    def test_abaixo_do_limite_exato(self):
+        for semente in range(20):
+            sorteio = random.Random(semente)
+            valores = [sorteio.randint(0, quantis.LIMITE_EXATO) for _ in range(sorteio.randint(1, 500))]
+            esboco = quantis.EsbocoQuantis()
+            for valor in valores:
+                esboco.adicionar(valor)
+            self.assertEqual(esboco.quantis(FRACOES), [_exato(valores, fracao) for fracao in FRACOES])
+
+    def test_acima_do_limite_exato(self):
+        for semente in range(20):
+            sorteio = random.Random(semente)
+            valores = [int(sorteio.lognormvariate(5, 2)) for _ in range(sorteio.randint(1, 2000))]
+            valores += [quantis.LIMITE_EXATO, quantis.LIMITE_EXATO + 1, 525600]
+            esboco = quantis.EsbocoQuantis()
+            for valor in valores:
+                esboco.adicionar(valor)
+            self._conferir(esboco, valores, semente)
+
+    def test_remover_e_combinar(self):
+        for semente in range(20):
+            sorteio = random.Random(semente)
+            valores = [int(sorteio.expovariate(1 / 300)) for _ in range(600)]
+            esboco = quantis.EsbocoQuantis()
+            for valor in valores:
+                esboco.adicionar(valor)
+            for _ in range(200):
+                esboco.remover(valores.pop(sorteio.randrange(len(valores))))
+            outros = [int(sorteio.expovariate(1 / 50)) for _ in range(300)]
+            outro = quantis.EsbocoQuantis()
+            for valor in outros:
+                outro.adicionar(valor)
+            esboco.combinar(outro)
+            self.assertEqual(esboco.total, len(valores) + len(outros))
+            self._conferir(esboco, valores + outros, semente)
+
+    def test_vazio(self):
+        esboco = quantis.EsbocoQuantis()
+        esboco.adicionar(7)
+        esboco.remover(7)
+        self.assertEqual(esboco.quantis((0.5, 0.99)), [None, None])
+        self.assertEqual(esboco.baldes, {})
+
+
+class TestJanela(unittest.TestCase):
+
+    def test_resumo_confere_com_os_eventos(self):
+        sorteio = random.Random(7)
+        janela = quantis.Janela(minutos=60)
+        eventos = []
+        minuto = 0
+        for _ in range(1000):
+            minuto += sorteio.randint(0, 3)
+            evento = (minuto, sorteio.choice(["VIP", "MEIA"]), sorteio.randint(0, 400))
+            janela.registrar(*evento)
+            eventos.append(evento)
+            if sorteio.random() < 0.1:
+                janela.registrar(minuto, None, None, sinal=-1)
+                eventos.pop()
+            ultimos = sorteio.randint(1, 90)
+            dentro = [e for e in eventos if minuto - min(ultimos, 60) < e[0] <= minuto]
+            por_categoria, soma, esboco = janela.resumo(minuto, ultimos)
+            esperado = {}
+            for _, categoria, _ in dentro:
+                esperado[categoria] = esperado.get(categoria, 0) + 1
+            self.assertEqual(por_categoria, esperado)
+            self.assertEqual(soma, sum(e[2] for e in dentro))
+            self.assertEqual(esboco.total, len(dentro))
+
+
+if __name__ == "__main__":
+    unittest.main()
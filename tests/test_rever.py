@@ -0,0 +1,67 @@
+# Testes do REVER (linha_tempo.py): depois de uma sequência qualquer de
+# comandos, DESFAZER, REFAZER, MODO e POLITICA, reconstruir cada minuto do
+# relógio tem de dar a fila que havia na última vez que o relógio marcou
+# aquele minuto, sem mexer no estado atual. O intervalo entre checkpoints é
+# fixado em poucas alterações para as reconstruções atravessarem vários
+# segmentos.
+import contextlib
+import io
+import random
+import unittest
+from unittest import mock
+
+import comandos
+import fila
+import linha_tempo
+
+
+def _foto(estado):
+    """Listagem, estatísticas com percentis e a espera de cada atendido."""
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        fila.listar(estado)
+        fila.estatisticas(estado, "QUANTIS")
+    esperas = [(id_ingresso, estado['ingressos'].esperas[id_ingresso]) for id_ingresso in estado['atendidos']]
+    return saida.getvalue(), esperas
+
+
+def _sortear_comando(sorteio, i):
+    x = sorteio.random()
+    if x < 0.45:
+        return f"COMPRAR Ana{i % 7} {sorteio.choice(['VIP', 'MEIA', 'INTEIRA'])}"
+    if x < 0.7:
+        return "ENTRAR"
+    if x < 0.8:
+        return f"CANCELAR {sorteio.randint(1, i + 1)}"
+    if x < 0.88:
+        return "DESFAZER"
+    if x < 0.95:
+        return "REFAZER"
+    return sorteio.choice(["MODO PRIORIDADE", "MODO PADRAO", "POLITICA PONDERADA", "POLITICA ESTRITA"])
+
+
+class TestRever(unittest.TestCase):
+
+    def test_reconstroi_cada_minuto(self):
+        with mock.patch.object(linha_tempo, "INTERVALO_MINIMO", 25), \
+                mock.patch.object(linha_tempo, "INTERVALO_POR_INGRESSO", 0):
+            for semente in range(4):
+                sorteio = random.Random(semente)
+                ctx = comandos.criar_contexto()
+                vistos = {0: _foto(ctx["estado_fila"])}
+                with contextlib.redirect_stdout(io.StringIO()):
+                    for i in range(600):
+                        comandos.executar(ctx, _sortear_comando(sorteio, i))
+                        estado = ctx["estado_fila"]
+                        vistos[estado['relogio_logico']] = _foto(estado)
+                atual = _foto(estado)
+                self.assertGreater(len(estado['linha_tempo'].segmentos), 1)
+                for relogio, esperado in vistos.items():
+                    reconstruido = estado['linha_tempo'].reconstruir(relogio)
+                    self.assertIsNotNone(reconstruido, (semente, relogio))
+                    self.assertEqual(_foto(reconstruido), esperado, (semente, relogio))
+                self.assertEqual(_foto(estado), atual, semente)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# Testes da navegação do Roteiro e da tabela de locais internados.
+import contextlib
+import io
+import unittest
+
+import comandos
+import Roteiro
+from tests import apoio
+
+
+class TestRoteiro(unittest.TestCase):
+
+    def test_pilhas_de_strings(self):
+        # Chamadores antigos guardam os caminhos nas pilhas
+        voltar, avancar = ["/", "/Palco"], []
+        with contextlib.redirect_stdout(io.StringIO()) as saida:
+            local, voltar, avancar = Roteiro.voltar_local("/IA", voltar, avancar)
+            self.assertEqual(local, "/Palco")
+            local, voltar, avancar = Roteiro.avancar_local(local, voltar, avancar)
+            self.assertEqual(local, "/IA")
+            local, voltar, avancar = Roteiro.ir_local("Visao", local, voltar, avancar)
+            self.assertEqual(local, "/IA/Visao")
+            local, voltar, avancar = Roteiro.voltar_local(local, voltar, avancar)
+            self.assertEqual(local, "/IA")
+            Roteiro.mapa_simples(voltar, local, avancar)
+        self.assertIn("(2) /Palco", saida.getvalue())
+        self.assertIn("(1) /IA/Visao", saida.getvalue())
+
+    def test_consultas_nao_internam_locais(self):
+        ctx = comandos.criar_contexto()
+        antes = len(Roteiro.locais())
+        apoio.executar(ctx, ["ROTA /NuncaVisto/A", "OCUPACAO /NuncaVisto/B", "SESSAO 1 ROTA /NuncaVisto/C"])
+        self.assertEqual(len(Roteiro.locais()), antes)
+
+    def test_limite_da_tabela(self):
+        limite = Roteiro.MAX_LOCAIS
+        self.addCleanup(setattr, Roteiro, "MAX_LOCAIS", limite)
+        ctx = comandos.criar_contexto()
+        apoio.executar(ctx, ["IR /Limite"])
+        # Cabe /Limite/A, mas não /Limite/B/C (dois locais novos)
+        Roteiro.MAX_LOCAIS = len(Roteiro.locais()) + 1
+        saida = apoio.executar(ctx, ["IR /Limite/A", "IR /Limite/B/C", "ONDE"])
+        self.assertIn("Limite de", saida)
+        self.assertIn("Local atual: /Limite/A", saida)
+        self.assertEqual(len(Roteiro.locais()), Roteiro.MAX_LOCAIS)
+        self.assertIsNone(Roteiro.buscar_id("/Limite/B"))
+
+
+if __name__ == "__main__":
+    unittest.main()
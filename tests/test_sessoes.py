@@ -0,0 +1,158 @@
+# Testes das sessões de navegação por visitante (sessoes.py) e da
+# ocupação que elas mantêm (ocupacao.py).
+import contextlib
+import io
+import random
+import unittest
+from collections import OrderedDict
+from unittest import mock
+
+import comandos
+import estandes
+import fila
+import ocupacao
+import Roteiro
+import sessoes
+
+LOCAIS = ("Palco", "/IA", "IA/Visao", "..", ".", "/", "Robotica", "../Palco", "/A/B/C")
+
+
+def _recontar(ids_locais):
+    """Contagens próprias e totais (com os sub-locais, sem a raiz) contadas do zero."""
+    proprio, total = {}, {}
+    for id_local in ids_locais:
+        proprio[id_local] = proprio.get(id_local, 0) + 1
+        partes = [parte for parte in Roteiro.nome_local(id_local).split("/") if parte]
+        for tamanho in range(1, len(partes) + 1):
+            id_area = Roteiro.id_local("/" + "/".join(partes[:tamanho]))
+            total[id_area] = total.get(id_area, 0) + 1
+    return proprio, total
+
+
+def _estado_com_ingressos(quantidade):
+    estado = fila.criar_estado()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for numero in range(quantidade):
+            fila.comprar(estado, f"V{numero}", "VIP")
+    return estado
+
+
+def _sessao(todas, estado, contagem, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        sessoes.comando(todas, estado, estandes.MapaEstandes(), contagem, *args)
+
+
+class TestSessoes(unittest.TestCase):
+
+    def test_capacidade_menor_que_um_mantem_a_sessao_atual(self):
+        estado = _estado_com_ingressos(3)
+        for capacidade in (0, -2):
+            todas = sessoes.Sessoes(capacidade)
+            contagem = ocupacao.Ocupacao()
+            for id_visitante in ("1", "2", "3", "1"):
+                _sessao(todas, estado, contagem, id_visitante, "IR", "/IA")
+                self.assertEqual(len(todas), 1)
+                self.assertEqual(contagem.visitantes, 1)
+                self.assertTrue(all(quantidade >= 0 for quantidade in contagem.proprio.values()))
+
+    def test_sem_ocupacao(self):
+        estado = _estado_com_ingressos(1)
+        todas = sessoes.Sessoes()
+        _sessao(todas, estado, None, "1", "IR", "/IA/Visao")
+        _sessao(todas, estado, None, "1", "VOLTAR")
+        self.assertEqual(todas.sessoes[1].local, 0)
+
+    def test_cancelado_continua_invalido_depois_do_modo(self):
+        # O MODO esvazia as lápides: o cancelado não pode voltar a valer
+        ctx = comandos.criar_contexto()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for linha in ("COMPRAR Ana VIP", "COMPRAR Bia VIP", "COMPRAR Caio VIP",
+                          "CANCELAR 2", "MODO PRIORIDADE"):
+                comandos.executar(ctx, linha)
+        saida = io.StringIO()
+        with contextlib.redirect_stdout(saida):
+            comandos.executar(ctx, "SESSAO 2 IR Palco")
+        self.assertIn("ERRO SESSAO: Ingresso '2' não existe.", saida.getvalue())
+        self.assertNotIn(2, ctx["sessoes"].sessoes)
+
+    def test_atendidos_e_pendentes_sao_validos(self):
+        ctx = comandos.criar_contexto()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for linha in ("COMPRAR Ana VIP", "COMPRAR Bia VIP", "ENTRAR", "ENTRAR", "DESFAZER",
+                          "SESSAO 1 IR Palco", "SESSAO 2 IR Palco", "SESSAO 3 IR Palco"):
+                comandos.executar(ctx, linha)
+        self.assertEqual(list(ctx["sessoes"].sessoes), [1, 2])
+
+    def test_descarte_lru_confere_com_modelo(self):
+        # Modelo: um contexto do terminal por visitante ativo, na ordem de
+        # uso; o descartado perde o contexto e volta a começar na raiz
+        with mock.patch.object(sessoes, "MAX_HISTORICO", 1_000):
+            for semente in range(10):
+                sorteio = random.Random(semente)
+                estado = _estado_com_ingressos(8)
+                todas = sessoes.Sessoes(sorteio.randint(1, 5))
+                modelo = OrderedDict()
+                descartadas = 0
+                for passo in range(300):
+                    id_visitante = sorteio.randint(1, 8)
+                    x = sorteio.random()
+                    acao = (f"IR {sorteio.choice(LOCAIS)}" if x < 0.5
+                            else "VOLTAR" if x < 0.7 else "AVANCAR" if x < 0.9 else "ONDE")
+                    _sessao(todas, estado, None, str(id_visitante), *acao.split())
+
+                    ctx = modelo.pop(id_visitante, None) or comandos.criar_contexto()
+                    modelo[id_visitante] = ctx
+                    if len(modelo) > todas.capacidade:
+                        modelo.popitem(last=False)
+                        descartadas += 1
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        comandos.executar(ctx, acao)
+
+                    self.assertEqual(list(todas.sessoes), list(modelo), (semente, passo))
+                    self.assertEqual(todas.descartadas, descartadas)
+                    for id_ativo, ctx_ativo in modelo.items():
+                        sessao = todas.sessoes[id_ativo]
+                        self.assertEqual(Roteiro.nome_local(sessao.local), ctx_ativo["local_atual"])
+                        self.assertEqual([Roteiro.nome_local(id_local) for id_local in sessao.voltar],
+                                         [Roteiro.nome_local(local) for local in ctx_ativo["voltar_pilha"]],
+                                         (semente, passo))
+
+
+class TestOcupacao(unittest.TestCase):
+
+    def _conferir(self, contagem, ids_locais, k, contexto):
+        proprio, total = _recontar(ids_locais)
+        self.assertEqual({id_local: quantidade for id_local, quantidade in contagem.proprio.items() if quantidade},
+                         proprio, contexto)
+        self.assertEqual(contagem.total, total, contexto)
+        self.assertEqual(contagem.visitantes, len(ids_locais), contexto)
+        heap = contagem.heap
+        for posicao in range(1, len(heap)):
+            self.assertFalse(contagem._antes(heap[posicao], heap[(posicao - 1) // 2]), contexto)
+        self.assertEqual(contagem.posicoes, {id_local: posicao for posicao, id_local in enumerate(heap)})
+        esperado = sorted(total.items(), key=lambda par: (-par[1], par[0]))[:k]
+        self.assertEqual(contagem.maiores(k), esperado, contexto)
+
+    def test_confere_com_recontagem(self):
+        locais = LOCAIS + ("/A", "/A/B", "/IA/Visao/Sala", "x/y")
+        for semente in range(10):
+            sorteio = random.Random(semente)
+            ctx = comandos.criar_contexto()
+            ctx["sessoes"].capacidade = sorteio.randint(1, 6)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for _ in range(10):
+                    comandos.executar(ctx, "COMPRAR V VIP")
+                for passo in range(300):
+                    local = sorteio.choice(locais)
+                    if sorteio.random() < 0.3:
+                        linha = sorteio.choice([f"IR {local}", "VOLTAR", "AVANCAR"])
+                    else:
+                        linha = f"SESSAO {sorteio.randint(1, 10)} " + sorteio.choice(
+                            [f"IR {local}", "VOLTAR", "AVANCAR", "ONDE"])
+                    comandos.executar(ctx, linha)
+                    ids_locais = [Roteiro.id_local(ctx["local_atual"])] + ctx["sessoes"].locais()
+                    self._conferir(ctx["ocupacao"], ids_locais, sorteio.randint(1, 8), (semente, passo))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+# Testes do modo em lote do terminal (terminal.executar_lote).
+import io
+import os
+import tempfile
+import unittest
+
+import terminal
+
+
+class TestLote(unittest.TestCase):
+
+    def test_saida_de_erros_mantem_os_detalhes(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, encoding="utf-8") as arquivo:
+            arquivo.write("nome,categoria\nAna,XX\n,VIP\n")
+        self.addCleanup(os.remove, arquivo.name)
+        destino = io.StringIO()
+        resumo = terminal.executar_lote(["COMPRAR Bob VIP", f"IMPORTAR {arquivo.name}", "LISTAR", "CANCELAR 99"],
+                                        nivel="erros", destino=destino)
+        self.assertEqual(resumo["erros"], 2)
+        self.assertEqual(destino.getvalue().splitlines(), [
+            f"linha 2: ERRO IMPORTAR: 2 linha(s) inválida(s) em '{arquivo.name}'; nada foi importado.",
+            "  linha 2: categoria 'XX' inválida",
+            "  linha 3: nome vazio",
+            "linha 4: ERRO: Ingresso 99 não encontrado ou já foi atendido.",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()